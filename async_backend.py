@@ -0,0 +1,249 @@
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from frontier import url_host
+from metrics import CrawlMetrics
+from throttle import parse_retry_after
+from recrawl import GONE_STATUSES
+from retry import RetryPolicy, CircuitBreaker, RETRY_STATUSES
+from robots import RobotsBlocked
+
+# aiohttp takes a noticeable share of startup time, so it is only imported once an
+# async crawl starts (see load_aiohttp)
+aiohttp = None
+aiodns = None
+
+
+def is_available():
+    return importlib.util.find_spec("aiohttp") is not None
+
+
+def load_aiohttp():
+    global aiohttp, aiodns
+    if aiohttp is None:
+        import aiohttp as module
+        try:
+            import aiodns  # noqa: F401 - lets aiohttp resolve hosts without blocking the loop
+        except ImportError:
+            aiodns = None
+        aiohttp = module
+
+
+class AsyncFetcher:
+    # Fetches pages on a single asyncio event loop running in its own thread.
+    # submit() hands back a concurrent.futures.Future, so the crawl loop waits on
+    # async fetches exactly like it waits on worker threads. `extract` returns
+    # (record, links, (parse seconds, extract seconds)) like parsers.extract_body_timed,
+    # and every phase is timed into `metrics` the same way the thread engine does.
+    def __init__(self, extract, throttle, get_headers, get_proxy=None, max_connections=500,
+                 per_host_limit=2, timeout=(5, 10), parse_executor=None, cache=None,
+                 recrawl=None, robots=None, retry_policy=None, breaker=None, metrics=None,
+                 profiler=None):
+        self.extract = extract
+        self.throttle = throttle
+        self.get_headers = get_headers
+        self.get_proxy = get_proxy
+        self.cache = cache
+        self.recrawl = recrawl
+        self.robots = robots
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout  # (connect, read) seconds
+        self.retry_policy = retry_policy or RetryPolicy(retries=0)
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics if metrics is not None else CrawlMetrics()
+        self.profiler = profiler
+        
+        # Parsing is CPU work, so it runs off the loop to keep fetches flowing, either on
+        # the executor passed in (e.g. a process pool) or on a private thread pool
+        self.parse_pool = None
+        self.parse_executor = parse_executor
+        if parse_executor is None:
+            self.parse_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+            self.parse_executor = self.parse_pool
+            if profiler is not None:
+                # Parser processes cannot be profiled, parser threads can
+                self.extract = partial(profiler.call, extract)
+        
+        self.loop = None
+        self.thread = None
+        self.session = None
+        self.connection_slots = None
+        self.host_slots = {}
+    
+    def start(self):
+        if not is_available():
+            raise RuntimeError("The async engine needs the aiohttp package (pip install aiohttp)")
+        load_aiohttp()
+        
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._open_session(), self.loop).result()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        if self.profiler is None:
+            self.loop.run_forever()
+            return
+        self.profiler.enable()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.profiler.disable()
+    
+    async def _open_session(self):
+        resolver = aiohttp.AsyncResolver() if aiodns is not None else None
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_limit,
+                                         resolver=resolver, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(sock_connect=self.timeout[0],
+                                                                           sock_read=self.timeout[1]))
+        self.connection_slots = asyncio.BoundedSemaphore(self.max_connections)
+    
+    def submit(self, url, options):
+        return asyncio.run_coroutine_threadsafe(self._process_url(url, options), self.loop)
+    
+    def _host_slot(self, host):
+        slot = self.host_slots.get(host)
+        if slot is None:
+            slot = asyncio.BoundedSemaphore(self.per_host_limit)
+            self.host_slots[host] = slot
+        return slot
+    
+    async def _process_url(self, url, options):
+        self.breaker.check(url_host(url))
+        
+        # robots.txt may have to be downloaded first, which blocks, so it runs off the loop
+        if self.robots is not None:
+            allowed = await self.loop.run_in_executor(None, self.robots.check, url, self.throttle)
+            if not allowed:
+                raise RobotsBlocked(url)
+        
+        body, encoding = await self._fetch(url)
+        
+        # Pages whose content did not change since the last crawl are not parsed again
+        fingerprint = None
+        if self.recrawl is not None:
+            fingerprint = self.recrawl.fingerprint(body)
+            if self.recrawl.unchanged(url, fingerprint):
+                previous = await self.loop.run_in_executor(None, self.recrawl.previous, url)
+                if previous is not None:
+                    return previous[0], previous[1], fingerprint
+        
+        page_data, next_urls, (parse_time, extract_time) = await self.loop.run_in_executor(
+            self.parse_executor, self.extract, body, encoding, url, options)
+        host = url_host(url)
+        self.metrics.observe("parse", parse_time, host)
+        self.metrics.observe("extract", extract_time, host)
+        return page_data, next_urls, fingerprint
+    
+    async def _fetch(self, url):
+        host = url_host(url)
+        async with self._host_slot(host):
+            wait_time = self.throttle.reserve(host)
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            self.metrics.observe("wait", max(0.0, wait_time), host)
+            
+            proxy = self.get_proxy() if self.get_proxy else None
+            cached = self.cache.lookup(url) if self.cache is not None else None
+            
+            try:
+                # Timeouts, dropped connections and 429/5xx answers are tried again after a backoff
+                retry_after = None
+                for attempt in range(self.retry_policy.retries + 1):
+                    if attempt:
+                        backoff = self.retry_policy.backoff(attempt - 1, retry_after)
+                        await asyncio.sleep(backoff)
+                        self.metrics.observe("backoff", backoff, host)
+                        retry_after = None
+                    
+                    headers = self.get_headers()
+                    if cached is not None:
+                        headers.update(self.cache.conditional_headers(cached))
+                    
+                    try:
+                        async with self.connection_slots:
+                            response, body = await self._get(url, host, headers, proxy)
+                            if response.status == 304 and cached is not None:
+                                cached_body = await self.loop.run_in_executor(None, self.cache.load, cached)
+                                if cached_body is not None:
+                                    self.breaker.success(host)
+                                    return cached_body, cached["encoding"]
+                                # The cached file is gone, so fetch the page in full
+                                cached = None
+                                response, body = await self._get(url, host, self.get_headers(), proxy)
+                    except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                        error = e
+                        continue
+                    
+                    if response.status in RETRY_STATUSES and attempt < self.retry_policy.retries:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        continue
+                    
+                    if response.status >= 500:
+                        self.breaker.failure(host)
+                    else:
+                        self.breaker.success(host)
+                    if response.status in GONE_STATUSES and self.recrawl is not None:
+                        self.recrawl.mark_gone(url)
+                    response.raise_for_status()
+                    
+                    if self.cache is not None:
+                        await self.loop.run_in_executor(None, self.cache.store, url, body,
+                                                        response.charset, response.headers)
+                    return body, response.charset
+                
+                # Every attempt failed to connect or timed out
+                self.breaker.failure(host)
+                raise error
+            finally:
+                self.throttle.done(host)
+    
+    async def _get(self, url, host, headers, proxy):
+        # Every outcome is reported to the throttle, so the host's pace can adapt
+        started = time.monotonic()
+        try:
+            async with self.session.get(url, headers=headers, proxy=proxy) as response:
+                # The response is handed over once its headers are in, like requests' elapsed
+                headers_read = time.monotonic()
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.throttle.record(host, time.monotonic() - started, None)
+            raise
+        self.metrics.observe("connect", headers_read - started, host)
+        self.metrics.observe("download", time.monotonic() - headers_read, host)
+        self.metrics.count("bytes", host, len(body))
+        self.throttle.record(host, time.monotonic() - started, response.status,
+                             parse_retry_after(response.headers.get('Retry-After')))
+        return response, body
+    
+    async def _shutdown(self):
+        # Cancel fetches that are still running so the loop can stop cleanly
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+    
+    def close(self):
+        if self.loop is None:
+            return
+        
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+        except Exception:
+            pass
+        
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(wait=False, cancel_futures=True)
+        self.loop = None
@@ -0,0 +1,238 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import Pipe, Process
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_site import SiteGraph, serve, add_site_arguments, site_settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENGINES = ["threads", "async", "processes"]  # processes: threads that parse in worker processes
+FORMATS = ["jsonl", "csv", "json", "txt", "xlsx"]
+
+
+# Phases from the crawl's own metrics, the same for every engine
+TIMED_PHASES = ["connect", "download", "parse"]
+
+
+def latency_summary(histogram):
+    # Estimated from the histogram buckets (see metrics.Histogram.quantile)
+    if histogram is None or not histogram.count:
+        return None
+    return {"count": histogram.count, "p50_ms": round(histogram.quantile(0.5) * 1000, 2),
+            "p99_ms": round(histogram.quantile(0.99) * 1000, 2)}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def missing_dependency(engine=None, parser=None, output_format=None):
+    # Why a case cannot run here, or None
+    from parsers import available_parsers
+    if engine == "async" and importlib.util.find_spec("aiohttp") is None:
+        return "aiohttp is not installed"
+    if parser is not None and parser not in available_parsers():
+        return f"{parser} is not installed"
+    if output_format == "xlsx" and importlib.util.find_spec("openpyxl") is None:
+        return "openpyxl is not installed"
+    return None
+
+
+def run_crawl_case(case):
+    # Runs in its own interpreter (see crawl_case), so peak RSS belongs to this crawl alone
+    from engine import Crawler, CrawlConfig, CrawlListener
+    
+    class ErrorCounter(CrawlListener):
+        def __init__(self):
+            self.errors = 0
+        
+        def log(self, message, tag=None):
+            if tag == "error":
+                self.errors += 1
+    
+    connection, site_end = Pipe()
+    server = Process(target=serve, args=(case["site"], site_end), daemon=True)
+    server.start()
+    start_url = connection.recv()
+    folder = tempfile.mkdtemp(prefix="crawl_benchmark_")
+    try:
+        config = CrawlConfig(start_url, output_folder=folder, output_format=case["output_format"],
+                             max_depth=case["site"]["graph"]["pages"], delay=0, html_parser=case["parser"],
+                             use_async=case["engine"] == "async",
+                             parse_processes=case["parse_processes"] if case["engine"] == "processes" else 0,
+                             max_workers=case["workers"], per_host_limit=case["per_host"],
+                             async_connections=case["workers"], save_checkpoints=False, use_http_cache=False,
+                             follow_external=True)  # the other hosts are the same site on other ports
+        listener = ErrorCounter()
+        crawler = Crawler(config, listener=listener)
+        started = time.perf_counter()
+        result = crawler.run()
+        elapsed = time.perf_counter() - started
+    finally:
+        connection.send("stop")
+        requests = connection.recv()
+        server.join(5)
+        shutil.rmtree(folder, ignore_errors=True)
+    
+    phases = crawler.metrics.phase_summary()
+    return {"engine": case["engine"], "parser": config.html_parser, "pages": result.pages,
+            "expected_pages": case["site"]["graph"]["pages"], "requests": requests, "errors": listener.errors,
+            "seconds": round(elapsed, 3), "pages_per_sec": round(result.pages / elapsed, 1) if elapsed else None,
+            **{phase: latency_summary(phases.get(phase)) for phase in TIMED_PHASES},
+            "peak_rss_mb": peak_rss_mb(), "error": result.error}
+
+
+def crawl_case(case):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        return {"engine": case["engine"], "parser": case["parser"], "error": output.stderr.strip()[-500:]}
+    return json.loads(output.stdout)
+
+
+def sink_records(settings, parser):
+    # The records a crawl of the synthetic site produces, extracted without any network
+    from engine import CrawlConfig
+    from parsers import extract_body
+    graph = SiteGraph(**settings["graph"])
+    graph.ports = [8000 + host for host in range(graph.hosts)]
+    options = CrawlConfig(graph.url(0)).options()
+    return [extract_body(graph.html(page), "utf-8", graph.url(page), options, parser)[0]
+            for page in range(graph.pages)]
+
+
+def sink_case(output_format, records, folder):
+    from sinks import open_sink
+    # A one-record warm-up loads the format's libraries (openpyxl for xlsx) outside the timing
+    warm_up = open_sink(output_format, os.path.join(folder, f"warm_up.{output_format}"))
+    warm_up.write(records[0])
+    warm_up.close()
+    
+    path = os.path.join(folder, f"benchmark.{output_format}")
+    started = time.perf_counter()
+    sink = open_sink(output_format, path)
+    for record in records:
+        sink.write(record)
+    sink.close()
+    elapsed = time.perf_counter() - started
+    return {"format": output_format, "pages": len(records), "seconds": round(elapsed, 3),
+            "pages_per_sec": round(len(records) / elapsed, 1) if elapsed else None,
+            "bytes": os.path.getsize(path)}
+
+
+def print_table(results):
+    site = results["site"]
+    print(f"Site: {site['graph']['pages']} pages, fan-out {site['graph']['fanout']}, "
+          f"{site['graph']['page_size']} bytes, {site['graph']['hosts']} hosts, "
+          f"latency {site['server']['latency'] * 1000:g} ms, error rate {site['server']['error_rate']:g}")
+    print()
+    print(f"{'engine':10} {'parser':12} {'pages':>7} {'pages/s':>8} "
+          + "".join(f"{phase + ' p50/p99 ms':>22}" for phase in TIMED_PHASES) + f" {'RSS MB':>7}")
+    for crawl in results["crawls"]:
+        if "skipped" in crawl:
+            print(f"{crawl['engine']:10} {crawl['parser']:12} skipped: {crawl['skipped']}")
+            continue
+        if "pages" not in crawl:
+            print(f"{crawl['engine']:10} {crawl['parser']:12} failed: {crawl['error']}")
+            continue
+        latency = [f"{crawl[name]['p50_ms']:.1f}/{crawl[name]['p99_ms']:.1f}" if crawl[name] else "-"
+                   for name in TIMED_PHASES]
+        print(f"{crawl['engine']:10} {crawl['parser']:12} {crawl['pages']:>7} {crawl['pages_per_sec']:>8.1f} "
+              + "".join(f"{value:>22}" for value in latency) + f" {crawl['peak_rss_mb'] or '-':>7}")
+    print()
+    print(f"{'format':10} {'pages':>7} {'seconds':>8} {'pages/s':>9} {'MB':>7}")
+    for sink in results["sinks"]:
+        if "skipped" in sink:
+            print(f"{sink['format']:10} skipped: {sink['skipped']}")
+            continue
+        print(f"{sink['format']:10} {sink['pages']:>7} {sink['seconds']:>8.3f} {sink['pages_per_sec']:>9.1f} "
+              f"{sink['bytes'] / 1024 / 1024:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a generated local site and measure the scraper")
+    add_site_arguments(parser)
+    parser.add_argument("--engines", default="threads,async", help=f"comma separated from: {', '.join(ENGINES)}")
+    parser.add_argument("--parsers", default="lxml,html.parser")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="output sinks to time")
+    parser.add_argument("--workers", type=int, default=8, help="threads, or connections for the async engine")
+    parser.add_argument("--per-host", type=int, default=8, help="requests in flight per host")
+    parser.add_argument("--parse-processes", type=int, default=2, help="used by the processes engine")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("-o", "--output", metavar="FILE", help="also write the JSON results to FILE")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.case:
+        print(json.dumps(run_crawl_case(json.loads(args.case))))
+        return 0
+    
+    settings = site_settings(args)
+    results = {"started": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+               "platform": platform.platform(), "site": settings,
+               "crawl_settings": {"workers": args.workers, "per_host": args.per_host,
+                                  "parse_processes": args.parse_processes},
+               "crawls": [], "sinks": []}
+    
+    parsers = [name.strip() for name in args.parsers.split(",") if name.strip()]
+    for engine in [name.strip() for name in args.engines.split(",") if name.strip()]:
+        if engine not in ENGINES:
+            raise SystemExit(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+        for html_parser in parsers:
+            reason = missing_dependency(engine=engine, parser=html_parser)
+            if reason:
+                results["crawls"].append({"engine": engine, "parser": html_parser, "skipped": reason})
+                continue
+            print(f"Crawling with {engine} and {html_parser}...", file=sys.stderr, flush=True)
+            results["crawls"].append(crawl_case({
+                "engine": engine, "parser": html_parser, "site": settings, "output_format": "jsonl",
+                "workers": args.workers, "per_host": args.per_host, "parse_processes": args.parse_processes,
+            }))
+    
+    available = [name for name in parsers if not missing_dependency(parser=name)]
+    if available:
+        print("Timing output sinks...", file=sys.stderr, flush=True)
+        records = sink_records(settings, available[0])
+        folder = tempfile.mkdtemp(prefix="sink_benchmark_")
+        try:
+            for output_format in [name.strip() for name in args.formats.split(",") if name.strip()]:
+                reason = missing_dependency(output_format=output_format)
+                if reason:
+                    results["sinks"].append({"format": output_format, "skipped": reason})
+                    continue
+                results["sinks"].append(sink_case(output_format, records, folder))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    failed = any("error" in crawl and crawl["error"] for crawl in results["crawls"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each entry point imports before it can do anything, and how long that may take
+# on top of the bare interpreter start (milliseconds, median of the runs)
+TARGETS = {
+    "app": ("import tool", 500),
+    "engine": ("import engine", 400),
+    "cli": ("import cli; cli.build_parser()", 400),
+}
+
+# Slow to import and only needed by one feature; none of the entry points may load them
+DEFERRED_MODULES = ["pandas", "selenium", "aiohttp", "fake_useragent", "openpyxl"]
+
+
+def time_command(code, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def loaded_modules(code):
+    check = f"{code}\nimport sys\nprint(' '.join(sorted(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    names = set(output.split())
+    return [name for name in DEFERRED_MODULES if name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure startup time of the app, engine and command line")
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the time budgets (slow machines)")
+    args = parser.parse_args()
+    
+    interpreter = time_command("pass", args.runs)
+    results = {"interpreter_ms": round(interpreter, 1), "targets": {}}
+    failed = False
+    for name, (code, budget) in TARGETS.items():
+        elapsed = time_command(code, args.runs) - interpreter
+        eager = loaded_modules(code)
+        ok = elapsed <= budget * args.scale and not eager
+        failed = failed or not ok
+        results["targets"][name] = {"ms": round(elapsed, 1), "budget_ms": budget * args.scale,
+                                    "eager_imports": eager, "ok": ok}
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Interpreter start: {interpreter:.0f} ms")
+        for name, result in results["targets"].items():
+            status = "ok" if result["ok"] else "SLOW"
+            line = f"{name:8} {result['ms']:7.0f} ms  (budget {result['budget_ms']:.0f} ms)  {status}"
+            if result["eager_imports"]:
+                line += f"  loaded at startup: {', '.join(result['eager_imports'])}"
+            print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import argparse
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+WORDS = ("crawler page link table value report market price update service network product "
+         "customer account support release version feature design system content data").split()
+
+
+class SiteGraph:
+    # A generated site: `pages` pages spread over `hosts` servers, each linking to `fanout`
+    # others. Page i always links to page i + 1, so every page is reachable from page 0.
+    # The same seed always gives the same pages and links.
+    def __init__(self, pages=500, fanout=10, page_size=20000, hosts=1, seed=1):
+        self.pages = max(1, pages)
+        self.fanout = max(1, fanout)
+        self.page_size = page_size
+        self.hosts = max(1, hosts)
+        self.seed = seed
+        self.ports = []  # filled in once the servers listen
+    
+    def url(self, page):
+        return f"http://127.0.0.1:{self.ports[page % self.hosts]}/page/{page}"
+    
+    def links(self, page):
+        rng = random.Random(self.seed * 1_000_003 + page)
+        targets = [(page + 1) % self.pages]
+        targets += [rng.randrange(self.pages) for _ in range(self.fanout - 1)]
+        return targets
+    
+    @lru_cache(maxsize=None)
+    def html(self, page):
+        rng = random.Random(self.seed * 7_919 + page)
+        parts = [f"<html><head><title>Page {page}</title></head><body>",
+                 f"<h1>Page {page}</h1>",
+                 "<ul>" + "".join(f"<li><a href=\"{self.url(target)}\">Page {target}</a></li>"
+                                  for target in self.links(page)) + "</ul>",
+                 "<table><tr><th>Name</th><th>Value</th></tr>" +
+                 "".join(f"<tr><td>{rng.choice(WORDS)}</td><td>{rng.randrange(1000)}</td></tr>" for _ in range(5)) +
+                 "</table>",
+                 f"<img src=\"/images/{page}.png\" alt=\"Picture {page}\">"]
+        size = sum(len(part) for part in parts)
+        section = 0
+        while size < self.page_size:
+            # Body text in headed sections until the page reaches its size
+            section += 1
+            text = " ".join(rng.choice(WORDS) for _ in range(80))
+            part = f"<h2>Section {section}</h2><p>{text}</p>"
+            parts.append(part)
+            size += len(part)
+        parts.append("</body></html>")
+        return "".join(parts).encode('utf-8')
+
+
+class SyntheticSite:
+    # Serves a SiteGraph on local ports. Every response waits `latency` seconds (plus up to
+    # `jitter`), and a share of the pages (`error_rate`) answers 503 to its first request,
+    # so the retry path is exercised the same way on every run.
+    def __init__(self, graph, latency=0.02, jitter=0.0, error_rate=0.0):
+        self.graph = graph
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.servers = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failed_once = set()
+    
+    def is_flaky(self, page):
+        return random.Random(self.graph.seed * 104_729 + page).random() < self.error_rate
+    
+    def handler(self):
+        site = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+            
+            def do_GET(self):
+                with site.lock:
+                    site.requests += 1
+                delay = site.latency + (random.uniform(0, site.jitter) if site.jitter else 0)
+                if delay > 0:
+                    time.sleep(delay)
+                
+                parts = self.path.strip("/").split("/")
+                if parts[0] == "" or parts == ["index.html"]:
+                    page = 0
+                elif len(parts) == 2 and parts[0] == "page" and parts[1].isdigit() and int(parts[1]) < site.graph.pages:
+                    page = int(parts[1])
+                else:
+                    self.respond(404, b"Not found", "text/plain")
+                    return
+                
+                if site.is_flaky(page):
+                    with site.lock:
+                        first = page not in site.failed_once
+                        site.failed_once.add(page)
+                    if first:
+                        self.respond(503, b"Try again", "text/plain")
+                        return
+                self.respond(200, site.graph.html(page), "text/html; charset=utf-8")
+            
+            def respond(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        for _ in range(self.graph.hosts):
+            server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+            server.daemon_threads = True
+            self.servers.append(server)
+            self.graph.ports.append(server.server_address[1])
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self.graph.url(0)
+    
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+
+def serve(settings, connection):
+    # Runs a site in its own process, so the server never competes with the crawler for the GIL.
+    # The start URL is sent over `connection`; the site stops when anything is sent back.
+    site = SyntheticSite(SiteGraph(**settings["graph"]), **settings["server"])
+    connection.send(site.start())
+    connection.recv()
+    connection.send(site.requests)
+    site.stop()
+
+
+def add_site_arguments(parser):
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fanout", type=int, default=10, help="links per page")
+    parser.add_argument("--page-size", type=int, default=20000, help="bytes of HTML per page")
+    parser.add_argument("--hosts", type=int, default=1, help="servers (ports) the pages are spread over")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of pages that fail their first request")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def site_settings(args):
+    return {
+        "graph": {"pages": args.pages, "fanout": args.fanout, "page_size": args.page_size,
+                  "hosts": args.hosts, "seed": args.seed},
+        "server": {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a generated site for crawl benchmarks")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+    settings = site_settings(args)
+    site = SyntheticSite(SiteGraph(**settings["graph"]), **settings["server"])
+    print(f"Serving {args.pages} pages, start at {site.start()} (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from frontier import canonicalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS urls (key TEXT PRIMARY KEY, url TEXT NOT NULL, depth INTEGER NOT NULL,
+                                 state INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS pages (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL,
+                                  depth INTEGER NOT NULL, record TEXT NOT NULL);
+"""
+
+# urls.state
+QUEUED = 0
+DONE = 1
+FAILED = 2
+BLOCKED = 3  # disallowed by robots.txt
+
+
+def checkpoint_path(folder, start_url, job_id=None):
+    # A scheduled job has a file of its own, so a manual crawl of the same site never touches it
+    if job_id is not None:
+        return os.path.join(folder, "checkpoints", f"job_{job_id}.sqlite3")
+    digest = hashlib.sha1(start_url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(folder, "checkpoints", f"crawl_{digest}.sqlite3")
+
+
+class CrawlCheckpoint:
+    # Frontier, seen set and finished pages of one crawl, kept in SQLite so a crawl that
+    # was stopped or crashed can pick up where it left off. Changes are buffered and
+    # written in one transaction every `batch_size` changes or `flush_interval` seconds.
+    def __init__(self, path, batch_size=500, flush_interval=2.0):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        
+        self.new_urls = []
+        self.finished_urls = []
+        self.new_pages = []
+        self.last_flush = time.monotonic()
+    
+    @staticmethod
+    def summary(path):
+        # Status of a saved crawl, or None when there is none
+        if not os.path.exists(path):
+            return None
+        
+        conn = sqlite3.connect(path)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            pages = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            queued = conn.execute("SELECT COUNT(*) FROM urls WHERE state = ?", (QUEUED,)).fetchone()[0]
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+        
+        return {"status": meta.get("status"), "start_url": meta.get("start_url"), "pages": pages, "queued": queued}
+    
+    def start(self, start_url):
+        # Forget any previous crawl stored in this file
+        with self.conn:
+            self.conn.execute("DELETE FROM urls")
+            self.conn.execute("DELETE FROM pages")
+            self.conn.execute("DELETE FROM meta")
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ("start_url", start_url),
+                ("started", time.strftime("%Y-%m-%d %H:%M:%S")),
+                ("status", "running"),
+            ])
+    
+    def add_url(self, key, url, depth):
+        self.new_urls.append((key, url, depth))
+        self.maybe_flush()
+    
+    def finish_url(self, url, depth, record=None, blocked=False):
+        key = canonicalize_url(url)
+        if blocked:
+            self.finished_urls.append((BLOCKED, key))
+        elif record is None:
+            self.finished_urls.append((FAILED, key))
+        else:
+            self.finished_urls.append((DONE, key))
+            self.new_pages.append((url, depth, json.dumps(record, ensure_ascii=False)))
+        self.maybe_flush()
+    
+    def maybe_flush(self):
+        changes = len(self.new_urls) + len(self.finished_urls)
+        if changes >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        if self.new_urls or self.finished_urls:
+            with self.conn:
+                # URLs are always inserted before their state can change
+                self.conn.executemany("INSERT OR IGNORE INTO urls (key, url, depth) VALUES (?, ?, ?)", self.new_urls)
+                self.conn.executemany("UPDATE urls SET state = ? WHERE key = ?", self.finished_urls)
+                self.conn.executemany("INSERT INTO pages (url, depth, record) VALUES (?, ?, ?)", self.new_pages)
+            self.new_urls = []
+            self.finished_urls = []
+            self.new_pages = []
+        self.last_flush = time.monotonic()
+    
+    def seen_keys(self):
+        for (key,) in self.conn.execute("SELECT key FROM urls"):
+            yield key
+    
+    def queued_urls(self):
+        # Anything not finished is queued again, including pages that were in flight
+        return self.conn.execute("SELECT url, depth FROM urls WHERE state = ? ORDER BY rowid", (QUEUED,)).fetchall()
+    
+    def pages(self):
+        for (record,) in self.conn.execute("SELECT record FROM pages ORDER BY id"):
+            yield json.loads(record)
+    
+    def depth_counts(self):
+        # depth -> URLs discovered, depth -> URLs finished
+        discovered = {}
+        completed = {}
+        for depth, state, count in self.conn.execute("SELECT depth, state, COUNT(*) FROM urls GROUP BY depth, state"):
+            discovered[depth] = discovered.get(depth, 0) + count
+            if state != QUEUED:
+                completed[depth] = completed.get(depth, 0) + count
+        return discovered, completed
+    
+    def mark_complete(self):
+        self.flush()
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('status', 'complete')")
+    
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
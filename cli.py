@@ -0,0 +1,344 @@
+import argparse
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import time
+
+from engine import Crawler, CrawlConfig, CrawlListener, CONTENT_OPTIONS, DEFAULTS
+from metrics import serve_metrics
+from distributed import (Coordinator, Worker, SqliteFrontierStore, serve_store, connect_store, parse_address,
+                         store_path, check_settings)
+from scheduler import Scheduler, Job, parse_time, parse_duration, parse_weekday
+
+
+class ConsoleListener(CrawlListener):
+    # Log lines go to stdout (errors to stderr); the status line is repeated every few seconds
+    def __init__(self, quiet=False, status_interval=5.0, prefix=""):
+        self.quiet = quiet
+        self.status_interval = status_interval
+        self.prefix = prefix
+        self.last_status = 0
+    
+    def log(self, message, tag=None):
+        if self.quiet and tag == "url":
+            return
+        if self.prefix:
+            # Several crawls share the console, so every line says which one it is from
+            message = "".join(f"{self.prefix}{line}\n" if line else "\n" for line in message.rstrip("\n").split("\n"))
+        stream = sys.stderr if tag == "error" else sys.stdout
+        stream.write(message)
+        stream.flush()
+    
+    def update_status(self, message):
+        now = time.monotonic()
+        if now - self.last_status >= self.status_interval:
+            self.last_status = now
+            print(f"{self.prefix}[status] {message}", file=sys.stderr, flush=True)
+
+
+def read_proxies(path):
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def add_crawl_arguments(crawl):
+    # Crawl settings shared by "crawl" and "schedule add"
+    crawl.add_argument("-o", "--output-folder", default=DEFAULTS["output_folder"])
+    crawl.add_argument("-f", "--format", dest="output_format", default=DEFAULTS["output_format"],
+                       choices=["xlsx", "json", "jsonl", "csv", "txt"])
+    crawl.add_argument("-d", "--depth", dest="max_depth", type=int, default=DEFAULTS["max_depth"])
+    crawl.add_argument("--delay", type=float, default=DEFAULTS["delay"],
+                       help="seconds between requests to the same host")
+    crawl.add_argument("--content", default=",".join(name for name in CONTENT_OPTIONS if DEFAULTS[name]),
+                       help=f"what to extract, comma separated from: {', '.join(CONTENT_OPTIONS)}")
+    crawl.add_argument("--engine", choices=["threads", "async", "selenium", "hybrid"], default="threads")
+    crawl.add_argument("--workers", dest="max_workers", type=int, default=DEFAULTS["max_workers"])
+    crawl.add_argument("--per-host", dest="per_host_limit", type=int, default=DEFAULTS["per_host_limit"])
+    crawl.add_argument("--connections", dest="async_connections", type=int, default=DEFAULTS["async_connections"],
+                       help="requests in flight with the async engine")
+    crawl.add_argument("--pool-size", dest="connection_pool_size", type=int, default=DEFAULTS["connection_pool_size"],
+                       help="keep-alive connections per host")
+    crawl.add_argument("--retries", dest="max_retries", type=int, default=DEFAULTS["max_retries"])
+    crawl.add_argument("--connect-timeout", type=int, default=DEFAULTS["connect_timeout"])
+    crawl.add_argument("--read-timeout", type=int, default=DEFAULTS["read_timeout"])
+    crawl.add_argument("--browsers", dest="browser_instances", type=int, default=DEFAULTS["browser_instances"])
+    crawl.add_argument("--browser-max-pages", type=int, default=DEFAULTS["browser_max_pages"])
+    crawl.add_argument("--parser", dest="html_parser", choices=["html.parser", "lxml"],
+                       help="html.parser (default), or lxml: faster, but broken markup can give other text")
+    crawl.add_argument("--parse-processes", type=int, default=DEFAULTS["parse_processes"])
+    crawl.add_argument("--proxies", metavar="FILE", help="file with one proxy per line")
+    crawl.add_argument("--external", dest="follow_external", action="store_true", help="follow links to other sites")
+    crawl.add_argument("--ignore-robots", dest="respect_robots", action="store_false")
+    crawl.add_argument("--sitemaps", dest="use_sitemaps", action="store_true", help="seed the crawl from sitemaps")
+    crawl.add_argument("--bloom", dest="low_memory_dedupe", action="store_true",
+                       help="track seen URLs in a Bloom filter")
+    crawl.add_argument("--no-checkpoints", dest="save_checkpoints", action="store_false")
+    crawl.add_argument("--no-cache", dest="use_http_cache", action="store_false")
+    crawl.add_argument("--cache-mb", dest="http_cache_mb", type=int, default=DEFAULTS["http_cache_mb"])
+    crawl.add_argument("--recrawl", dest="incremental_recrawl", action="store_true",
+                       help="report pages added, changed or removed since the last crawl")
+    crawl.add_argument("--metrics-file", metavar="FILE",
+                       help="keep per-phase and per-host timings in FILE (Prometheus text format)")
+    crawl.add_argument("--profile", dest="profile_file", metavar="FILE", help="save a cProfile of the crawl to FILE")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Web Scraper Pro without the window")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    crawl = commands.add_parser("crawl", help="crawl a site and save what was scraped")
+    crawl.add_argument("url")
+    add_crawl_arguments(crawl)
+    crawl.add_argument("--resume", action="store_true", help="continue an unfinished crawl of the same URL")
+    crawl.add_argument("--metrics-port", type=int, help="serve the timings at http://127.0.0.1:PORT/metrics")
+    crawl.add_argument("-q", "--quiet", action="store_true", help="do not list every scraped URL")
+    
+    schedule = commands.add_parser("schedule", help="manage and run recurring crawls")
+    schedule.add_argument("--file", default=os.path.join(DEFAULTS["output_folder"], "schedules.json"),
+                          help="where the jobs are kept")
+    actions = schedule.add_subparsers(dest="action", required=True)
+    
+    add = actions.add_parser("add", help="add a recurring crawl")
+    add.add_argument("url")
+    when = add.add_mutually_exclusive_group(required=True)
+    when.add_argument("--daily", metavar="HH:MM")
+    when.add_argument("--weekly", nargs=2, metavar=("DAY", "HH:MM"))
+    when.add_argument("--every", metavar="DURATION", help="interval such as 30m, 2h or 1d")
+    when.add_argument("--once", metavar="HH:MM")
+    add.add_argument("--name")
+    add.add_argument("--misfire-grace", default="1h",
+                     help="how late a run may still start, e.g. after downtime (default 1h)")
+    add_crawl_arguments(add)
+    
+    actions.add_parser("list", help="show the jobs and when they run next")
+    
+    remove = actions.add_parser("remove", help="delete a job")
+    remove.add_argument("job_id")
+    
+    run = actions.add_parser("run", help="run due jobs until stopped (replaces one cron entry per crawl)")
+    run.add_argument("--max-jobs", type=int, default=2, help="crawls running at the same time")
+    run.add_argument("--per-host", type=int, default=1, help="crawls running against one site at the same time")
+    run.add_argument("-q", "--quiet", action="store_true", help="do not list every scraped URL")
+    
+    coordinator = commands.add_parser("coordinator", help="share one crawl between worker processes or machines")
+    coordinator.add_argument("url")
+    add_crawl_arguments(coordinator)
+    coordinator.add_argument("--store", metavar="FILE", help="SQLite file holding the shared frontier "
+                                                             "(default: in the output folder)")
+    coordinator.add_argument("--listen", metavar="HOST:PORT", help="serve the frontier to workers on other machines")
+    coordinator.add_argument("--auth-key", default=os.environ.get("SCRAPER_AUTH_KEY"),
+                             help="shared secret for --listen (default: $SCRAPER_AUTH_KEY, or a random one)")
+    coordinator.add_argument("--local-workers", type=int, default=0, help="worker processes to start on this machine")
+    coordinator.add_argument("--resume", action="store_true", help="continue an unfinished crawl in the same store")
+    coordinator.add_argument("-q", "--quiet", action="store_true", help="do not list every scraped URL")
+    
+    worker = commands.add_parser("worker", help="crawl the URLs a coordinator hands out")
+    source = worker.add_mutually_exclusive_group(required=True)
+    source.add_argument("--connect", metavar="HOST:PORT", help="address of a coordinator started with --listen")
+    source.add_argument("--store", metavar="FILE", help="the coordinator's SQLite file, on this machine")
+    worker.add_argument("--auth-key", default=os.environ.get("SCRAPER_AUTH_KEY"))
+    worker.add_argument("--batch-size", type=int, default=50, help="URLs leased at a time")
+    worker.add_argument("-o", "--output-folder", help="local folder for the HTTP cache (default: the coordinator's)")
+    worker.add_argument("-q", "--quiet", action="store_true", help="do not list every scraped URL")
+    return parser
+
+
+def crawl_settings(args):
+    content = {name.strip() for name in args.content.split(",") if name.strip()}
+    unknown = content - set(CONTENT_OPTIONS)
+    if unknown:
+        raise SystemExit(f"Unknown content: {', '.join(sorted(unknown))}")
+    
+    settings = {name: getattr(args, name) for name in [
+        "output_folder", "output_format", "max_depth", "delay", "max_workers", "per_host_limit",
+        "async_connections", "connection_pool_size", "max_retries", "connect_timeout", "read_timeout",
+        "browser_instances", "browser_max_pages", "html_parser", "parse_processes", "follow_external",
+        "respect_robots", "use_sitemaps", "low_memory_dedupe", "save_checkpoints", "use_http_cache",
+        "http_cache_mb", "incremental_recrawl", "metrics_file", "profile_file",
+    ]}
+    settings.update({name: name in content for name in CONTENT_OPTIONS})
+    settings["use_async"] = args.engine == "async"
+    settings["use_selenium"] = args.engine == "selenium"
+    settings["use_hybrid"] = args.engine == "hybrid"
+    if args.proxies:
+        settings["proxies"] = read_proxies(args.proxies)
+        settings["use_proxy"] = True
+    settings["output_folder"] = os.path.abspath(settings["output_folder"])
+    for name in ("metrics_file", "profile_file"):
+        if settings[name]:
+            settings[name] = os.path.abspath(settings[name])
+    return settings
+
+
+def crawl_config(args):
+    return CrawlConfig(args.url, **crawl_settings(args))
+
+
+def run_crawl(args):
+    crawler = Crawler(crawl_config(args), listener=ConsoleListener(quiet=args.quiet))
+    resume = args.resume and crawler.saved_crawl() is not None
+    if args.metrics_port:
+        serve_metrics(lambda: crawler.metrics, args.metrics_port)
+    
+    # The first Ctrl+C stops the crawl and saves what was scraped; a second one aborts
+    def interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("\nStopping, press Ctrl+C again to abort", file=sys.stderr, flush=True)
+        crawler.stop()
+    
+    signal.signal(signal.SIGINT, interrupt)
+    result = crawler.run(resume)
+    if result.error is not None:
+        return 1
+    if result.stopped:
+        return 130
+    return 0 if result.pages else 2
+
+
+def schedule_job(args):
+    try:
+        if args.daily:
+            schedule = {"kind": "daily", "at": args.daily}
+        elif args.weekly:
+            schedule = {"kind": "weekly", "weekday": parse_weekday(args.weekly[0]), "at": args.weekly[1]}
+        elif args.every:
+            schedule = {"kind": "interval", "every": parse_duration(args.every)}
+        else:
+            schedule = {"kind": "once", "at": args.once}
+        parse_time(schedule.get("at", "00:00"))
+        grace = parse_duration(args.misfire_grace)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    return Job(args.url, settings=crawl_settings(args), name=args.name, misfire_grace=grace, **schedule)
+
+
+def run_schedule(args):
+    if args.action == "run":
+        scheduler = Scheduler(args.file, max_jobs=args.max_jobs, per_host=args.per_host,
+                              listener_factory=lambda job: ConsoleListener(quiet=args.quiet, prefix=f"[{job.name}] "),
+                              notify=lambda message: print(f"[scheduler] {message}", flush=True))
+        print(f"[scheduler] {len(scheduler.list_jobs())} jobs in {args.file}; Ctrl+C to stop", flush=True)
+        
+        def interrupt(signum, frame):
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            print("\nStopping running crawls, press Ctrl+C again to abort", file=sys.stderr, flush=True)
+            scheduler.stop(wait=False)
+        
+        signal.signal(signal.SIGINT, interrupt)
+        signal.signal(signal.SIGTERM, interrupt)
+        
+        # The loop runs on its own thread, so the signal handler never waits for its lock
+        scheduler.start()
+        while scheduler.thread.is_alive():
+            scheduler.thread.join(0.5)
+        scheduler.stop(wait=True)
+        return 0
+    
+    scheduler = Scheduler(args.file)
+    if args.action == "add":
+        job = scheduler.add_job(schedule_job(args))
+        print(job.describe())
+    elif args.action == "list":
+        for job in scheduler.list_jobs():
+            print(job.describe() + ("" if job.enabled else "  (done)"))
+    elif args.action == "remove":
+        if not scheduler.remove_job(args.job_id):
+            print(f"No job {args.job_id}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def run_coordinator(args):
+    config = crawl_config(args)
+    try:
+        check_settings(config.settings())
+    except ValueError as e:
+        raise SystemExit(str(e))
+    path = os.path.abspath(args.store or store_path(config.output_folder, config.start_url))
+    store = SqliteFrontierStore(path)
+    coordinator = Coordinator(store, config, listener=ConsoleListener(quiet=args.quiet))
+    workers = []
+    
+    if args.listen:
+        address = parse_address(args.listen)
+        authkey = args.auth_key or secrets.token_hex(16)
+        serve_store(store, address, authkey.encode('utf-8'))
+        key_hint = "" if args.auth_key else f" --auth-key {authkey}"
+        print(f"Workers connect with: python cli.py worker --connect {address[0]}:{address[1]}{key_hint}", flush=True)
+    
+    def start_workers():
+        for _ in range(max(0, args.local_workers)):
+            command = [sys.executable, os.path.abspath(__file__), "worker", "--store", path]
+            workers.append(subprocess.Popen(command + (["-q"] if args.quiet else [])))
+    
+    def interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("\nStopping, press Ctrl+C again to abort", file=sys.stderr, flush=True)
+        coordinator.stop()
+    
+    signal.signal(signal.SIGINT, interrupt)
+    result = coordinator.run(args.resume, started=start_workers)
+    
+    # Workers notice the end on their next call; give remote ones a moment before the socket closes
+    for process in workers:
+        process.wait()
+    if args.listen:
+        time.sleep(5)
+    store.close()
+    
+    if result.error is not None:
+        return 1
+    if result.stopped:
+        return 130
+    return 0 if result.pages else 2
+
+
+def run_worker(args):
+    try:
+        if args.connect:
+            if not args.auth_key:
+                raise SystemExit("--auth-key (or SCRAPER_AUTH_KEY) is needed to connect to a coordinator")
+            store = connect_store(parse_address(args.connect), args.auth_key.encode('utf-8'))
+        else:
+            store = SqliteFrontierStore(args.store)
+    except (OSError, ValueError) as e:
+        print(f"Could not reach the coordinator: {e}", file=sys.stderr)
+        return 1
+    
+    output_folder = os.path.abspath(args.output_folder) if args.output_folder else None
+    worker = Worker(store, listener=ConsoleListener(quiet=args.quiet), batch_size=args.batch_size,
+                    output_folder=output_folder)
+    
+    # The first Ctrl+C hands the leased URLs back to the other workers; a second one aborts
+    def interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        worker.stop()
+    
+    signal.signal(signal.SIGINT, interrupt)
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        worker.run()
+    except Exception as e:
+        # Usually the coordinator went away
+        print(f"Worker stopped: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "crawl":
+        return run_crawl(args)
+    if args.command == "schedule":
+        return run_schedule(args)
+    if args.command == "coordinator":
+        return run_coordinator(args)
+    if args.command == "worker":
+        return run_worker(args)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
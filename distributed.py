@@ -0,0 +1,592 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import AuthenticationError
+from multiprocessing.managers import BaseManager
+from queue import Queue, Empty
+from urllib.parse import urljoin
+
+from engine import Crawler, CrawlConfig, CrawlListener, CrawlResult
+from frontier import Frontier, canonicalize_url, url_host
+from retry import HostUnavailable
+from robots import RobotsBlocked, RobotsCache, read_sitemaps
+from sinks import open_sink
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS urls (key TEXT PRIMARY KEY, url TEXT NOT NULL, depth INTEGER NOT NULL,
+                                 partition INTEGER NOT NULL, state INTEGER NOT NULL DEFAULT 0,
+                                 worker TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0);
+CREATE INDEX IF NOT EXISTS urls_queue ON urls (state, partition, depth);
+CREATE INDEX IF NOT EXISTS urls_worker ON urls (worker);
+CREATE TABLE IF NOT EXISTS pages (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL,
+                                  worker TEXT, record TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, last_seen REAL NOT NULL, pages INTEGER NOT NULL DEFAULT 0);
+"""
+
+# urls.state
+QUEUED = 0
+LEASED = 1
+DONE = 2
+FAILED = 3
+
+# Hosts are hashed into this many partitions, and every partition belongs to one live worker
+PARTITIONS = 64
+
+# Settings the workers cannot honour: they crawl with the threaded loop below, and the
+# coordinator has no index of the last crawl to compare the pages with
+UNSUPPORTED_SETTINGS = {"use_async": "the async engine", "incremental_recrawl": "incremental recrawl"}
+
+
+def store_path(folder, start_url):
+    digest = hashlib.sha1(start_url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(folder, "distributed", f"crawl_{digest}.sqlite3")
+
+
+def host_partition(url):
+    host = url_host(url)
+    digest = hashlib.blake2b(host.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % PARTITIONS
+
+
+def owned_partitions(workers, worker_id):
+    # Rendezvous hashing: each partition goes to the worker with the highest score for it,
+    # so a worker joining or leaving only moves that worker's share of the hosts
+    if worker_id not in workers:
+        return []
+    owned = []
+    for partition in range(PARTITIONS):
+        owner = max(workers, key=lambda worker: hashlib.blake2b(f"{worker}/{partition}".encode('utf-8'),
+                                                               digest_size=8).digest())
+        if owner == worker_id:
+            owned.append(partition)
+    return owned
+
+
+def check_settings(settings):
+    unsupported = [name for setting, name in UNSUPPORTED_SETTINGS.items() if settings.get(setting)]
+    if unsupported:
+        raise ValueError(f"Distributed crawls do not support {' or '.join(unsupported)}")
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    # "host:port" or ":port" -> (host, port)
+    host, _, port = text.rpartition(":")
+    try:
+        return host or default_host, int(port)
+    except ValueError:
+        raise ValueError(f"Expected an address like 127.0.0.1:8765, got {text!r}")
+
+
+class FrontierStore:
+    # What the coordinator and the workers need from the shared frontier and seen set.
+    # Workers only call setup-free methods (crawl_info, lease, complete, release, status),
+    # and only with plain values, so any store can also be served over a socket.
+    def setup(self, start_url, settings, resume=False):
+        raise NotImplementedError
+    
+    def crawl_info(self):
+        raise NotImplementedError
+    
+    def add_urls(self, urls):
+        raise NotImplementedError
+    
+    def lease(self, worker_id, limit, lease_seconds):
+        raise NotImplementedError
+    
+    def complete(self, worker_id, results, lease_seconds):
+        raise NotImplementedError
+    
+    def release(self, worker_id, keys):
+        raise NotImplementedError
+    
+    def status(self):
+        raise NotImplementedError
+    
+    def finish(self, status):
+        raise NotImplementedError
+    
+    def pages(self):
+        raise NotImplementedError
+
+
+class SqliteFrontierStore(FrontierStore):
+    # Reference store: one SQLite file. Processes on the same machine can open the file
+    # directly; workers on other machines reach it through serve_store(). Every change
+    # is one IMMEDIATE transaction, so two workers can never lease the same URL.
+    def __init__(self, path, worker_timeout=30, max_attempts=3):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.worker_timeout = worker_timeout  # seconds without a call before a worker's hosts move
+        self.max_attempts = max_attempts  # leases that may expire before a URL is given up on
+        
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+    
+    def setup(self, start_url, settings, resume=False):
+        # Starts a new crawl, or continues the one in this file; returns True when resumed
+        with self.transaction() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if resume and meta.get("start_url") == start_url and meta.get("status") != "complete":
+                # Leases held by workers of the earlier run are void
+                conn.execute("UPDATE urls SET state = ?, worker = NULL, lease_until = NULL WHERE state = ?",
+                             (QUEUED, LEASED))
+                conn.execute("DELETE FROM workers")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('status', 'running')")
+                return True
+            
+            conn.execute("DELETE FROM urls")
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM workers")
+            conn.execute("DELETE FROM meta")
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ("start_url", start_url),
+                ("settings", json.dumps(settings)),
+                ("started", time.strftime("%Y-%m-%d %H:%M:%S")),
+                ("status", "running"),
+            ])
+            self.insert_urls(conn, [(start_url, 0)])
+        return False
+    
+    def crawl_info(self):
+        with self.lock:
+            meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if "start_url" not in meta:
+            return None
+        return {"start_url": meta["start_url"], "settings": json.loads(meta["settings"]), "status": meta["status"]}
+    
+    def insert_urls(self, conn, urls):
+        rows = [(canonicalize_url(url), url.split('#', 1)[0], depth, host_partition(url)) for url, depth in urls]
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO urls (key, url, depth, partition) VALUES (?, ?, ?, ?)", rows)
+        return conn.total_changes - before
+    
+    def add_urls(self, urls):
+        # Queues (url, depth) pairs that were never seen; returns how many were new
+        with self.transaction() as conn:
+            return self.insert_urls(conn, urls)
+    
+    def heartbeat(self, conn, worker_id, now, lease_seconds):
+        # A worker that calls in keeps its hosts and its leases
+        conn.execute("INSERT INTO workers (id, last_seen) VALUES (?, ?) "
+                     "ON CONFLICT (id) DO UPDATE SET last_seen = excluded.last_seen", (worker_id, now))
+        conn.execute("UPDATE urls SET lease_until = ? WHERE state = ? AND worker = ?",
+                     (now + lease_seconds, LEASED, worker_id))
+    
+    def expire_leases(self, conn, now):
+        # URLs leased by a worker that died go back to the queue, until they failed too often
+        conn.execute("UPDATE urls SET state = ?, worker = NULL, lease_until = NULL "
+                     "WHERE state = ? AND lease_until < ? AND attempts + 1 >= ?",
+                     (FAILED, LEASED, now, self.max_attempts))
+        conn.execute("UPDATE urls SET state = ?, worker = NULL, lease_until = NULL, attempts = attempts + 1 "
+                     "WHERE state = ? AND lease_until < ?", (QUEUED, LEASED, now))
+    
+    def lease(self, worker_id, limit, lease_seconds):
+        # Up to `limit` queued URLs from the hosts this worker owns, as (key, url, depth)
+        now = time.time()
+        with self.transaction() as conn:
+            self.heartbeat(conn, worker_id, now, lease_seconds)
+            self.expire_leases(conn, now)
+            status = conn.execute("SELECT value FROM meta WHERE key = 'status'").fetchone()
+            if status is None or status[0] != "running":
+                return []
+            
+            workers = [worker for (worker,) in conn.execute("SELECT id FROM workers WHERE last_seen >= ?",
+                                                             (now - self.worker_timeout,))]
+            # A host that just moved here stays with its old worker until that worker's leases are done
+            busy = {partition for (partition,) in conn.execute("SELECT DISTINCT partition FROM urls "
+                                                               "WHERE state = ? AND worker != ?", (LEASED, worker_id))}
+            partitions = [partition for partition in owned_partitions(workers, worker_id) if partition not in busy]
+            if not partitions:
+                return []
+            
+            placeholders = ",".join("?" * len(partitions))
+            batch = conn.execute(f"SELECT key, url, depth FROM urls WHERE state = ? AND partition IN ({placeholders}) "
+                                 f"ORDER BY depth, rowid LIMIT ?", (QUEUED, *partitions, limit)).fetchall()
+            conn.executemany("UPDATE urls SET state = ?, worker = ?, lease_until = ? WHERE key = ?",
+                             [(LEASED, worker_id, now + lease_seconds, key) for key, url, depth in batch])
+        return batch
+    
+    def complete(self, worker_id, results, lease_seconds):
+        # Records finished URLs as (key, record or None, [(link, depth), ...]) and queues the
+        # new links in the same transaction. Results for a lease that already expired and went
+        # to another worker are dropped, so a page is never stored twice. Returns how many counted.
+        now = time.time()
+        accepted = 0
+        pages = 0
+        with self.transaction() as conn:
+            for key, record, links in results:
+                state = DONE if record is not None else FAILED
+                updated = conn.execute("UPDATE urls SET state = ?, worker = NULL, lease_until = NULL "
+                                       "WHERE key = ? AND state = ? AND worker = ?",
+                                       (state, key, LEASED, worker_id)).rowcount
+                if not updated:
+                    continue
+                accepted += 1
+                if record is not None:
+                    pages += 1
+                    conn.execute("INSERT INTO pages (key, worker, record) VALUES (?, ?, ?)",
+                                 (key, worker_id, json.dumps(record, ensure_ascii=False)))
+                if links:
+                    self.insert_urls(conn, links)
+            
+            self.heartbeat(conn, worker_id, now, lease_seconds)
+            conn.execute("UPDATE workers SET pages = pages + ? WHERE id = ?", (pages, worker_id))
+        return accepted
+    
+    def release(self, worker_id, keys):
+        # Hands leased URLs back without counting it as a failed attempt
+        with self.transaction() as conn:
+            conn.executemany("UPDATE urls SET state = ?, worker = NULL, lease_until = NULL "
+                             "WHERE key = ? AND state = ? AND worker = ?",
+                             [(QUEUED, key, LEASED, worker_id) for key in keys])
+    
+    def status(self):
+        now = time.time()
+        with self.lock:
+            meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+            counts = {state: 0 for state in (QUEUED, LEASED, DONE, FAILED)}
+            discovered = {}
+            completed = {}
+            for depth, state, count in self.conn.execute("SELECT depth, state, COUNT(*) FROM urls GROUP BY depth, state"):
+                counts[state] += count
+                discovered[depth] = discovered.get(depth, 0) + count
+                if state in (DONE, FAILED):
+                    completed[depth] = completed.get(depth, 0) + count
+            pages = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            workers = self.conn.execute("SELECT COUNT(*) FROM workers WHERE last_seen >= ?",
+                                        (now - self.worker_timeout,)).fetchone()[0]
+        return {"status": meta.get("status"), "queued": counts[QUEUED], "leased": counts[LEASED],
+                "done": counts[DONE], "failed": counts[FAILED], "pages": pages, "workers": workers,
+                "discovered": discovered, "completed": completed}
+    
+    def finish(self, status):
+        # "complete" or "stopped"; workers stop asking for work either way
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('status', ?)", (status,))
+    
+    def pages(self):
+        # Only used by the coordinator, next to the file
+        conn = sqlite3.connect(self.path)
+        try:
+            for (record,) in conn.execute("SELECT record FROM pages ORDER BY id"):
+                yield json.loads(record)
+        finally:
+            conn.close()
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class StoreManager(BaseManager):
+    pass
+
+
+def serve_store(store, address, authkey):
+    # Shares `store` over TCP on a background thread. Calls are pickled, so only listen on
+    # networks you trust and always set an auth key.
+    StoreManager.register("get_store", callable=lambda: store)
+    manager = StoreManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def connect_store(address, authkey):
+    # A proxy for the coordinator's store with the same methods
+    StoreManager.register("get_store")
+    manager = StoreManager(address=address, authkey=authkey)
+    try:
+        manager.connect()
+    except AuthenticationError:
+        raise ConnectionError("the coordinator rejected the auth key")
+    return manager.get_store()
+
+
+class Coordinator:
+    # Owns the shared frontier of one crawl: seeds it, reports progress while workers crawl,
+    # and writes the output file once the frontier is empty
+    def __init__(self, store, config, listener=None, poll_interval=1.0):
+        self.store = store
+        self.config = config
+        self.listener = listener or CrawlListener()
+        self.poll_interval = poll_interval
+        self.crawler = Crawler(config, listener=self.listener)
+        self.stop_requested = False
+    
+    def stop(self):
+        self.stop_requested = True
+    
+    def log(self, message, tag=None):
+        self.listener.log(message, tag)
+    
+    def seed_sitemaps(self):
+        # Pages listed in the site's sitemaps are queued one level below the start page
+        start_url = self.config.start_url
+        self.listener.update_status("Reading sitemaps...")
+        self.crawler.open_resources()
+        try:
+            robots = self.crawler.robots or RobotsCache(self.crawler.fetch_raw)
+            sitemap_urls = robots.sitemaps(start_url) or [urljoin(start_url, "/sitemap.xml")]
+            urls = [(url, 1) for url in read_sitemaps(self.crawler.fetch_raw, sitemap_urls)
+                    if self.config.follow_external or self.crawler.is_same_domain(start_url, url)]
+            seeded = self.store.add_urls(urls)
+        finally:
+            self.crawler.close_resources()
+        self.log(f"Queued {seeded} pages from sitemaps\n", "success")
+    
+    def run(self, resume=False, started=None):
+        # Returns a CrawlResult like Crawler.run; `started` is called once the store is ready for workers
+        config = self.config
+        os.makedirs(config.output_folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(config.output_folder, f"scraped_data_{timestamp}.{config.output_format}")
+        result = CrawlResult(output_file)
+        sink = None
+        try:
+            check_settings(config.settings())
+            if self.store.setup(config.start_url, config.settings(), resume):
+                status = self.store.status()
+                self.log(f"Resuming crawl: {status['pages']} pages already scraped, "
+                         f"{status['queued']} queued\n", "success")
+            elif config.use_sitemaps and config.max_depth > 0:
+                self.seed_sitemaps()
+            if started is not None:
+                started()
+            self.log("Waiting for workers\n")
+            
+            # Workers lease, crawl and report on their own; the frontier is empty once
+            # nothing is queued and every leased URL was reported back
+            while not self.stop_requested:
+                status = self.store.status()
+                if not status["queued"] and not status["leased"]:
+                    break
+                self.listener.update_status(f"Scraping ({status['workers']} workers, {status['leased']} in progress) - "
+                                            f"{self.crawler.describe_progress(status['discovered'], status['completed'])}")
+                self.listener.update_progress(self.crawler.estimate_progress(status['discovered'], status['completed'],
+                                                                             config.max_depth))
+                time.sleep(self.poll_interval)
+            
+            self.store.finish("stopped" if self.stop_requested else "complete")
+            result.stopped = self.stop_requested
+            
+            # Pages are kept in the store while the crawl runs and exported once at the end
+            sink = open_sink(config.output_format, output_file)
+            for page_data in self.store.pages():
+                sink.write(page_data)
+            result.pages = sink.pages
+            output_file = result.output_file = sink.path
+            if sink.pages:
+                sink.close()
+            
+            status = self.store.status()
+            if self.stop_requested:
+                self.log("\nScraping stopped by user\n", "error")
+                self.log("Start the coordinator again with --resume to continue the crawl\n")
+            elif sink.pages:
+                self.log("\nScraping completed!\n\n", "success")
+            else:
+                self.log("\nNo data scraped\n", "error")
+            if sink.pages:
+                self.log(f"Pages scraped: {sink.pages} ({status['failed']} failed)\n")
+                self.log(f"Data saved to:\n{output_file}\n\n", "success")
+                self.listener.update_status(f"Scraping finished. Data saved to {output_file}")
+        
+        except Exception as e:
+            result.error = str(e)
+            self.log(f"\nError: {str(e)}\n", "error")
+            self.listener.update_status(f"Error: {str(e)}")
+        
+        finally:
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception:
+                    pass
+        
+        self.listener.crawl_finished(result)
+        return result
+
+
+class Worker:
+    # Crawls the URLs it leases from a shared store with the usual engine (threads, selenium
+    # or hybrid), and reports page records and discovered links back in batches. Each host
+    # belongs to one worker at a time, so the per-host delay and limits still hold.
+    def __init__(self, store, worker_id=None, listener=None, batch_size=50, lease_seconds=300,
+                 report_interval=1.0, idle_interval=2.0, output_folder=None):
+        self.store = store
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self.listener = listener or CrawlListener()
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = lease_seconds
+        self.report_interval = report_interval
+        self.idle_interval = idle_interval
+        self.output_folder = output_folder  # local cache and browser data; defaults to the crawl's
+        self.stop_requested = False
+        self.pages = 0
+    
+    def stop(self):
+        self.stop_requested = True
+    
+    def log(self, message, tag=None):
+        self.listener.log(message, tag)
+    
+    def run(self):
+        # Returns the number of pages this worker scraped
+        info = self.store.crawl_info()
+        if info is None:
+            raise RuntimeError("The coordinator has not started a crawl yet")
+        settings = dict(info["settings"])
+        check_settings(settings)
+        if self.output_folder:
+            settings["output_folder"] = self.output_folder
+        config = CrawlConfig(info["start_url"], **settings)
+        start_url = config.start_url
+        options = config.options()
+        
+        crawler = Crawler(config, listener=self.listener)
+        max_workers = crawler.open_resources()
+        per_host_limit = max(1, config.per_host_limit)
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        
+        frontier = Frontier()  # leased URLs, queued per host
+        keys = {}  # url -> store key of a leased URL
+        in_flight = {}  # host -> requests currently running
+        pending = {}  # future -> (url, depth, host)
+        finished = Queue()
+        results = []  # (key, record or None, links) not reported yet
+        released = []  # keys to hand back
+        reported = set()  # links sent since the last lease, to save the store the duplicates
+        last_report = time.monotonic()
+        
+        self.log(f"Worker {self.worker_id} crawling {start_url}\n", "success")
+        try:
+            while not self.stop_requested:
+                if time.monotonic() - last_report >= self.report_interval:
+                    self.report(results, released)
+                    results, released = [], []
+                    last_report = time.monotonic()
+                    self.listener.update_status(f"Worker {self.worker_id}: {self.pages} pages, "
+                                                f"{len(pending)} in progress, {len(frontier)} leased")
+                
+                # Lease more while the local queue runs low, so workers never sit idle between batches
+                if len(frontier) + len(pending) <= self.batch_size // 2:
+                    batch = self.store.lease(self.worker_id, self.batch_size, self.lease_seconds)
+                    if batch:
+                        # The store dedupes anyway; this only trims one batch's worth of repeats
+                        reported.clear()
+                    for key, url, depth in batch:
+                        keys[url] = key
+                        frontier.push(url, depth)
+                
+                if not frontier and not pending:
+                    if results or released:
+                        self.report(results, released)
+                        results, released = [], []
+                    info = self.store.crawl_info()
+                    if info is None or info["status"] != "running":
+                        break
+                    time.sleep(self.idle_interval)
+                    continue
+                
+                batch = frontier.pop_batch(lambda host: crawler.breaker.limit(host, per_host_limit) - in_flight.get(host, 0),
+                                           max_workers - len(pending))
+                for url, depth, host in batch:
+                    in_flight[host] = in_flight.get(host, 0) + 1
+                    future = pool.submit(crawler.process_url, url, options)
+                    pending[future] = (url, depth, host)
+                    future.add_done_callback(finished.put)
+                
+                if not pending:
+                    # Only hosts that are waiting out their circuit breaker are left
+                    time.sleep(0.2)
+                    continue
+                
+                try:
+                    done = [finished.get(timeout=0.5)]
+                except Empty:
+                    done = []
+                while not finished.empty():
+                    done.append(finished.get_nowait())
+                
+                for future in done:
+                    url, depth, host = pending.pop(future)
+                    in_flight[host] -= 1
+                    key = keys.pop(url)
+                    
+                    try:
+                        page = future.result()
+                    except HostUnavailable as e:
+                        if e.deferred:
+                            # Back in the shared queue; it may be leased again once the host recovers
+                            released.append(key)
+                            continue
+                        self.log(f"Error scraping {url}: {str(e)}\n", "error")
+                        page = None
+                    except RobotsBlocked:
+                        page = None
+                    except Exception as e:
+                        self.log(f"Error scraping {url}: {str(e)}\n", "error")
+                        page = None
+                    
+                    if page is None:
+                        results.append((key, None, []))
+                        continue
+                    
+                    page_data, next_urls, fingerprint = page
+                    self.pages += 1
+                    self.log(f"Scraped: {url}\n", "url")
+                    
+                    links = []
+                    if depth < config.max_depth:
+                        for next_url in next_urls:
+                            if not (config.follow_external or crawler.is_same_domain(start_url, next_url)):
+                                continue
+                            link_key = canonicalize_url(next_url)
+                            if link_key not in reported:
+                                reported.add(link_key)
+                                links.append((next_url, depth + 1))
+                    results.append((key, page_data, links))
+        
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Whatever was leased but not crawled goes back for the other workers
+            released.extend(keys.values())
+            try:
+                self.report(results, released)
+            except Exception as e:
+                self.log(f"Could not report the last results: {str(e)}\n", "error")
+            crawler.close_resources()
+        
+        self.log(f"Worker {self.worker_id} finished: {self.pages} pages scraped\n", "success")
+        return self.pages
+    
+    def report(self, results, released):
+        # Also renews the leases of everything still queued here, so it is called even with nothing to say
+        self.store.complete(self.worker_id, results, self.lease_seconds)
+        if released:
+            self.store.release(self.worker_id, released)
@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+from queue import Queue, Empty
+
+# Resources a headless browser never needs to render the text we extract
+BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+]
+
+
+def block_resources(driver):
+    # Chrome only: drop image, font, stylesheet and media requests before they are sent
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_RESOURCES})
+    except Exception:
+        pass
+
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    # Reusable browsers shared by the crawl's worker threads. Browsers are started on
+    # demand up to `size`, checked before every use, and replaced after `max_pages`
+    # pages because a long-lived browser keeps growing in memory.
+    def __init__(self, create_driver, size=2, max_pages=100):
+        self.create_driver = create_driver
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.lock = threading.Lock()
+        self.idle = Queue()
+        self.created = 0
+        self.closed = False
+    
+    def acquire(self):
+        while True:
+            if self.closed:
+                raise RuntimeError("The browser pool was closed")
+            
+            try:
+                pooled = self.idle.get_nowait()
+            except Empty:
+                with self.lock:
+                    can_create = self.created < self.size
+                    if can_create:
+                        self.created += 1
+                if can_create:
+                    try:
+                        return PooledDriver(self.create_driver())
+                    except Exception:
+                        with self.lock:
+                            self.created -= 1
+                        raise
+                try:
+                    pooled = self.idle.get(timeout=0.5)
+                except Empty:
+                    # Look again: a retired browser may have freed a slot meanwhile
+                    continue
+            
+            if self.is_healthy(pooled.driver):
+                return pooled
+            self.discard(pooled)
+    
+    def release(self, pooled):
+        pooled.pages += 1
+        if self.closed or pooled.pages >= self.max_pages:
+            self.discard(pooled)
+        else:
+            self.idle.put(pooled)
+    
+    @contextmanager
+    def driver(self):
+        pooled = self.acquire()
+        try:
+            yield pooled.driver
+        finally:
+            self.release(pooled)
+    
+    def is_healthy(self, driver):
+        # A crashed browser or a lost chromedriver session fails this trivial script
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+    
+    def discard(self, pooled):
+        with self.lock:
+            self.created -= 1
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+    
+    def close(self):
+        # Browsers still loading a page are shut down when they are handed back
+        self.closed = True
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except Empty:
+                break
+            self.discard(pooled)
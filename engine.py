@@ -0,0 +1,820 @@
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from queue import Queue, Empty
+from urllib.parse import urlparse, urljoin
+
+import requests
+
+import async_backend
+from async_backend import AsyncFetcher
+from checkpoint import CrawlCheckpoint, checkpoint_path
+from driver_pool import DriverPool, block_resources
+from frontier import Frontier, BloomFilter, url_host
+from http_cache import HttpCache
+from hybrid import RenderMemory, needs_browser, browser_helped, NEEDED, STATIC, WASTED
+from metrics import CrawlMetrics, CrawlProfiler
+from parsers import extract_body_timed, default_parser
+from recrawl import RecrawlIndex, recrawl_path, GONE_STATUSES, UNCHANGED, REMOVED
+from retry import RetryPolicy, CircuitBreaker, HostUnavailable, RETRY_STATUSES
+from robots import RobotsBlocked, RobotsCache, read_sitemaps
+from sessions import SessionPool, ACCEPT_ENCODING
+from sinks import open_sink
+from throttle import HostThrottle, parse_retry_after
+from user_agents import UserAgents
+
+# Every crawl setting with its default; the Tk app and the command line both start from these
+DEFAULTS = {
+    "output_folder": os.path.join(os.getcwd(), "scraper_output"),
+    "output_format": "xlsx",
+    "max_depth": 1,
+    "delay": 0.5,
+    # Content to extract
+    "headings": True,
+    "paragraphs": True,
+    "lists": True,
+    "tables": True,
+    "images": False,
+    "links": False,
+    # Fetching
+    "use_selenium": False,
+    "use_hybrid": False,
+    "use_async": False,
+    "use_proxy": False,
+    "proxies": [],
+    "follow_external": False,
+    "respect_robots": True,
+    "use_sitemaps": False,
+    "max_workers": 4,
+    "per_host_limit": 1,
+    "async_connections": 500,
+    "connection_pool_size": 10,
+    "max_retries": 2,
+    "connect_timeout": 5,
+    "read_timeout": 10,
+    "browser_instances": 2,
+    "browser_max_pages": 100,
+    # Parsing and storage
+    "html_parser": None,  # None is html.parser; "lxml" is faster but opt-in (see parsers.default_parser)
+    "parse_processes": 0,
+    "low_memory_dedupe": False,
+    "save_checkpoints": True,
+    "use_http_cache": True,
+    "http_cache_mb": 500,
+    "incremental_recrawl": False,
+    # Diagnostics
+    "metrics_file": None,  # Prometheus text file, rewritten every few seconds during the crawl
+    "profile_file": None,  # cProfile stats of the whole crawl
+}
+
+CONTENT_OPTIONS = ['headings', 'paragraphs', 'lists', 'tables', 'images', 'links']
+
+
+def normalize_start_url(url):
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+class CrawlConfig:
+    # Settings of one crawl. Unknown names are rejected so that typos do not pass silently.
+    def __init__(self, start_url, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise TypeError(f"Unknown crawl settings: {', '.join(sorted(unknown))}")
+        
+        self.start_url = normalize_start_url(start_url)
+        
+        for name, default in DEFAULTS.items():
+            setattr(self, name, settings.get(name, default))
+        if self.html_parser is None:
+            self.html_parser = default_parser()
+    
+    def options(self):
+        return {name: getattr(self, name) for name in CONTENT_OPTIONS}
+    
+    def settings(self):
+        # Everything but the start URL, e.g. to store a scheduled crawl
+        return {name: getattr(self, name) for name in DEFAULTS}
+
+
+class CrawlResult:
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.pages = 0
+        self.changes_file = None
+        self.stopped = False
+        self.error = None
+    
+    @property
+    def completed(self):
+        return self.pages > 0 and not self.stopped and self.error is None
+
+
+class CrawlListener:
+    # Receives a crawl's progress. Every method is called from the thread running the crawl.
+    def log(self, message, tag=None):
+        pass
+    
+    def update_status(self, message):
+        pass
+    
+    def update_progress(self, value):
+        pass
+    
+    def crawl_finished(self, result):
+        pass
+
+
+class Crawler:
+    # Fetches, extracts and exports one crawl, without any user interface. The Tk app
+    # and the command line are both listeners of this class. `job_id` is set for scheduled
+    # crawls, which keep their checkpoint and recrawl index apart from manual crawls.
+    def __init__(self, config, listener=None, ua=None, job_id=None):
+        self.config = config
+        self.job_id = job_id
+        self.listener = listener if listener is not None else CrawlListener()
+        self.ua = ua if ua is not None else UserAgents()
+        self.stop_requested = False
+        
+        # Pool of Selenium browsers (created for each crawl in Selenium or Hybrid mode)
+        self.drivers = None
+        self.render_memory = None
+        
+        # HTTP session pool and parser processes (created for each crawl)
+        self.sessions = None
+        self.http_cache = None
+        self.recrawl = None
+        self.robots = None
+        self.parse_pool = None
+        
+        # Timings of the current crawl, and its profiler when one was asked for
+        self.metrics = CrawlMetrics()
+        self.profiler = None
+    
+    def stop(self):
+        # The crawl finishes the pages in flight and saves what it has
+        self.stop_requested = True
+    
+    def saved_crawl(self):
+        # Status of an unfinished crawl of the same URL that can be resumed, or None
+        if not self.config.save_checkpoints:
+            return None
+        path = checkpoint_path(self.config.output_folder, self.config.start_url, self.job_id)
+        saved = CrawlCheckpoint.summary(path)
+        if saved and saved["status"] == "running" and saved["queued"]:
+            return saved
+        return None
+    
+    def log(self, message, tag=None):
+        self.listener.log(message, tag)
+    
+    def get_random_proxy(self):
+        if not self.config.proxies:
+            return None
+        return random.choice(self.config.proxies)
+    
+    def get_request_proxy(self):
+        if self.config.use_proxy and self.config.proxies:
+            return self.get_random_proxy()
+        return None
+    
+    def get_random_user_agent(self):
+        return self.ua.random
+    
+    def create_selenium_driver(self):
+        # Selenium is slow to import, so only crawls that start a browser load it
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        
+        options = Options()
+        options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        
+        # Return as soon as the DOM is ready instead of waiting for every subresource
+        options.page_load_strategy = 'eager'
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        
+        if self.config.use_proxy and self.config.proxies:
+            proxy = self.get_random_proxy()
+            options.add_argument(f'--proxy-server={proxy}')
+        
+        user_agent = self.get_random_user_agent()
+        options.add_argument(f'user-agent={user_agent}')
+        
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(self.timeouts[0] + self.timeouts[1])
+        block_resources(driver)
+        return driver
+    
+    def close_selenium_drivers(self):
+        if self.drivers is not None:
+            self.drivers.close()
+            self.drivers = None
+    
+    def scrape_with_selenium(self, url):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        
+        try:
+            # Each worker borrows its own browser, so several pages load at once
+            with self.drivers.driver() as driver:
+                started = time.monotonic()
+                driver.get(url)
+                self.throttle.record(url_host(url), time.monotonic() - started)
+                self.metrics.observe("render", time.monotonic() - started, url_host(url))
+                
+                # Wait for page to load
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+                
+                # Get the page source after JavaScript execution
+                return driver.page_source, None
+        
+        except Exception as e:
+            self.log(f"Error with Selenium: {str(e)}\n", "error")
+            return None
+    
+    def scrape_with_requests(self, url):
+        headers = {
+            'User-Agent': self.get_random_user_agent()
+        }
+        
+        # Sessions are pooled per host and proxy, so connections stay open between pages
+        session = self.sessions.get(url, self.get_request_proxy())
+        
+        # Pages cached by an earlier crawl are only downloaded again if they changed
+        cached = self.http_cache.lookup(url) if self.http_cache is not None else None
+        host = url_host(url)
+        
+        # Timeouts, dropped connections and 429/5xx answers are tried again after a backoff
+        retry_after = None
+        for attempt in range(self.retry_policy.retries + 1):
+            if attempt:
+                with self.metrics.timer("backoff", host):
+                    time.sleep(self.retry_policy.backoff(attempt - 1, retry_after))
+                retry_after = None
+            
+            try:
+                if cached is not None:
+                    response = self.request_page(session, url, {**headers, **HttpCache.conditional_headers(cached)})
+                    if response.status_code == 304:
+                        body = self.http_cache.load(cached)
+                        if body is not None:
+                            self.breaker.success(host)
+                            return body, cached["encoding"]
+                        # The cached file is gone, so fetch the page in full
+                        cached = None
+                        response = self.request_page(session, url, headers)
+                else:
+                    response = self.request_page(session, url, headers)
+            
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                error = e
+                continue
+            except requests.exceptions.RequestException as e:
+                self.log(f"Error scraping {url}: {str(e)}\n", "error")
+                return None
+            
+            if response.status_code in RETRY_STATUSES and attempt < self.retry_policy.retries:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                continue
+            
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                if response.status_code >= 500:
+                    self.record_host_failure(host)
+                elif response.status_code in GONE_STATUSES and self.recrawl is not None:
+                    self.recrawl.mark_gone(url)
+                self.log(f"Error scraping {url}: {str(e)}\n", "error")
+                return None
+            
+            self.breaker.success(host)
+            if self.http_cache is not None:
+                self.http_cache.store(url, response.content, response.encoding, response.headers)
+            
+            # Decoding is left to the parse step, which may run in another process
+            return response.content, response.encoding
+        
+        # Every attempt failed to connect or timed out
+        self.record_host_failure(host)
+        self.log(f"Error scraping {url}: {str(error)}\n", "error")
+        return None
+    
+    def record_host_failure(self, host):
+        if self.breaker.failure(host):
+            if self.breaker.is_dead(host):
+                self.log(f"{host} keeps failing, skipping its remaining pages\n", "error")
+            else:
+                self.log(f"{host} keeps failing, holding back its pages for a while\n", "error")
+    
+    def request_page(self, session, url, headers):
+        # Every outcome is reported to the throttle, so the host's pace can adapt
+        host = url_host(url)
+        started = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=self.timeouts)
+        except requests.exceptions.RequestException:
+            self.throttle.record(host, 0, None)
+            raise
+        
+        # requests reads the whole body before returning; elapsed stops at the headers
+        elapsed = response.elapsed.total_seconds()
+        self.metrics.observe("connect", elapsed, host)
+        self.metrics.observe("download", max(0.0, time.perf_counter() - started - elapsed), host)
+        self.metrics.count("bytes", host, len(response.content))
+        self.throttle.record(host, response.elapsed.total_seconds(), response.status_code,
+                             parse_retry_after(response.headers.get('Retry-After')))
+        return response
+    
+    def fetch_raw(self, url):
+        # Plain download for robots.txt and sitemaps
+        session = self.sessions.get(url, self.get_request_proxy())
+        response = session.get(url, headers={'User-Agent': self.get_random_user_agent()}, timeout=self.timeouts)
+        return response.status_code, response.content
+    
+    def scrape_page(self, url):
+        if self.config.use_selenium:
+            return self.scrape_with_selenium(url)
+        elif self.render_memory is not None:
+            return self.scrape_hybrid(url)
+        else:
+            return self.scrape_with_requests(url)
+    
+    def scrape_hybrid(self, url):
+        # Plain HTTP first; the browser only gets pages that turn out to be rendered by JavaScript
+        decision = self.render_memory.decision(url)
+        if decision == "browser":
+            page = self.scrape_with_selenium(url)
+            if page is not None:
+                self.render_memory.record(url, NEEDED)
+                return page
+            # The browser failed; the plain page is still better than nothing
+            return self.scrape_with_requests(url)
+
+        page = self.scrape_with_requests(url)
+        if page is None or decision == "http":
+            return page
+        if not needs_browser(page[0]):
+            self.render_memory.record(url, STATIC)
+            return page
+        
+        rendered = self.scrape_with_selenium(url)
+        if rendered is None:
+            return page
+        if browser_helped(page[0], rendered[0]):
+            self.render_memory.record(url, NEEDED)
+            return rendered
+        self.render_memory.record(url, WASTED)
+        return page
+    
+    def is_same_domain(self, url1, url2):
+        try:
+            domain1 = urlparse(url1).netloc
+            domain2 = urlparse(url2).netloc
+            return domain1 == domain2
+        except:
+            return False
+    
+    def estimate_progress(self, discovered, completed, max_depth):
+        # Project the pages still to be discovered at each depth from the fan-out seen so far
+        expected_total = 0
+        expected = 0
+        for depth in range(max_depth + 1):
+            found = discovered.get(depth, 0)
+            if depth == 0:
+                expected = found
+            else:
+                parents_done = completed.get(depth - 1, 0)
+                fan_out = found / parents_done if parents_done else 0
+                expected = max(found, expected * fan_out)
+            expected_total += expected
+        
+        done = sum(completed.values())
+        if expected_total <= 0:
+            return 0
+        return min(100, (done / expected_total) * 100)
+    
+    def describe_progress(self, discovered, completed):
+        levels = sorted(set(discovered) | set(completed))
+        return ", ".join(f"D{depth}: {completed.get(depth, 0)}/{discovered.get(depth, 0)}" for depth in levels)
+    
+    def process_url(self, url, options):
+        # Runs on a worker thread: fetch within the host's politeness limits, then extract
+        self.breaker.check(url_host(url))
+        if self.robots is not None and not self.robots.check(url, self.throttle):
+            raise RobotsBlocked(url)
+        
+        host = url_host(url)
+        with self.metrics.timer("wait", host):
+            self.throttle.wait(host)
+        try:
+            page = self.scrape_page(url)
+        finally:
+            self.throttle.done(host)
+        
+        if page is None:
+            return None
+        
+        body, encoding = page
+        
+        # Pages whose content did not change since the last crawl are not parsed again
+        fingerprint = None
+        if self.recrawl is not None:
+            fingerprint = self.recrawl.fingerprint(body)
+            if self.recrawl.unchanged(url, fingerprint):
+                previous = self.recrawl.previous(url)
+                if previous is not None:
+                    return previous[0], previous[1], fingerprint
+        
+        page_data, next_urls = self.parse_page(body, encoding, url, options)
+        return page_data, next_urls, fingerprint
+    
+    def parse_page(self, body, encoding, url, options):
+        if self.parse_pool is not None:
+            # Parse in a worker process; this thread just waits without holding the GIL
+            page_data, next_urls, (parse_time, extract_time) = self.parse_pool.submit(
+                extract_body_timed, body, encoding, url, options, self.crawl_parser).result()
+        else:
+            page_data, next_urls, (parse_time, extract_time) = extract_body_timed(body, encoding, url, options,
+                                                                                  self.crawl_parser)
+        host = url_host(url)
+        self.metrics.observe("parse", parse_time, host)
+        self.metrics.observe("extract", extract_time, host)
+        return page_data, next_urls
+    
+    def open_resources(self):
+        # Sets up fetching and parsing for a crawl; returns how many worker threads to use
+        config = self.config
+        max_workers = max(1, config.max_workers)
+        self.metrics = CrawlMetrics()
+        self.throttle = HostThrottle(config.delay)
+        self.retry_policy = RetryPolicy(retries=config.max_retries)
+        self.breaker = CircuitBreaker()
+        self.timeouts = (max(1, config.connect_timeout), max(1, config.read_timeout))
+        self.crawl_parser = config.html_parser
+        
+        # Parsing is CPU-bound, so it can be moved to worker processes to use every core.
+        # They are not forked: the crawl (and the window or scheduler around it) already runs
+        # threads, and a forked child can inherit a lock one of them held and hang.
+        if config.parse_processes > 0:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self.parse_pool = ProcessPoolExecutor(max_workers=config.parse_processes,
+                                                  mp_context=multiprocessing.get_context(method))
+        self.sessions = SessionPool(pool_size=max(1, config.connection_pool_size))
+        if config.respect_robots:
+            self.robots = RobotsCache(self.fetch_raw)
+        if config.use_http_cache and not config.use_selenium:
+            self.http_cache = HttpCache(os.path.join(config.output_folder, "http_cache"),
+                                        max_bytes=max(10, config.http_cache_mb) * 1024 * 1024)
+        
+        if config.use_selenium:
+            # One worker per browser; each browser is reused for many pages
+            max_workers = max(1, config.browser_instances)
+            self.drivers = DriverPool(self.create_selenium_driver, size=max_workers,
+                                      max_pages=config.browser_max_pages)
+        elif config.use_hybrid:
+            # Workers fetch over HTTP and borrow a browser only for pages that need one
+            self.drivers = DriverPool(self.create_selenium_driver, size=max(1, config.browser_instances),
+                                      max_pages=config.browser_max_pages)
+            self.render_memory = RenderMemory()
+            self.render_memory.load(os.path.join(config.output_folder, "render_memory.json"))
+        return max_workers
+    
+    def close_resources(self):
+        if self.sessions is not None:
+            self.sessions.close()
+        if self.http_cache is not None:
+            self.http_cache.close()
+            self.http_cache = None
+        self.robots = None
+        if self.render_memory is not None:
+            try:
+                self.render_memory.save(os.path.join(self.config.output_folder, "render_memory.json"))
+            except OSError:
+                pass
+            self.render_memory = None
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(wait=False, cancel_futures=True)
+            self.parse_pool = None
+        self.close_selenium_drivers()
+    
+    def save_diagnostics(self):
+        config = self.config
+        try:
+            if config.metrics_file:
+                self.metrics.write_prometheus(config.metrics_file)
+                self.log(f"Metrics saved to:\n{config.metrics_file}\n")
+            if self.profiler is not None:
+                self.profiler.disable()
+                if self.profiler.save(config.profile_file):
+                    self.log(f"Profile saved to:\n{config.profile_file}\n")
+        except OSError as e:
+            self.log(f"Could not save diagnostics: {str(e)}\n", "error")
+        self.profiler = None
+    
+    def run(self, resume=False):
+        # Crawls config.start_url and returns a CrawlResult; errors are reported, not raised
+        config = self.config
+        start_url = config.start_url
+        pool = None
+        sink = None
+        async_fetcher = None
+        checkpoint = None
+        changes = None
+        
+        # Pages are written out as soon as they are scraped
+        os.makedirs(config.output_folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(config.output_folder, f"scraped_data_{timestamp}.{config.output_format}")
+        result = CrawlResult(output_file)
+        try:
+            if config.profile_file:
+                self.profiler = CrawlProfiler()
+                self.profiler.enable()
+            max_depth = config.max_depth
+            follow_external = config.follow_external
+            options = config.options()
+            sink = open_sink(config.output_format, output_file)
+            
+            # Incremental recrawls also write the pages that were added, changed or removed
+            if config.incremental_recrawl:
+                self.recrawl = RecrawlIndex(recrawl_path(config.output_folder, start_url, self.job_id),
+                                            settings=[options, config.html_parser, config.use_selenium,
+                                                      config.use_hybrid])
+                self.recrawl.start(resume)
+                changes_file = os.path.join(config.output_folder, f"scraped_changes_{timestamp}.jsonl")
+                changes = open_sink("jsonl", changes_file)
+            
+            max_workers = self.open_resources()
+            per_host_limit = max(1, config.per_host_limit)
+            if config.use_async and not (config.use_selenium or config.use_hybrid):
+                if not async_backend.is_available():
+                    raise RuntimeError("The async engine needs the aiohttp package (pip install aiohttp)")
+                # One event loop keeps many more requests in flight than the thread pool could
+                max_workers = max(1, config.async_connections)
+                async_fetcher = AsyncFetcher(partial(extract_body_timed, parser=self.crawl_parser), self.throttle,
+                                             get_headers=lambda: {'User-Agent': self.get_random_user_agent(),
+                                                                  'Accept-Encoding': ACCEPT_ENCODING},
+                                             get_proxy=self.get_request_proxy,
+                                             max_connections=max_workers, per_host_limit=per_host_limit,
+                                             timeout=self.timeouts, retry_policy=self.retry_policy,
+                                             breaker=self.breaker,
+                                             parse_executor=self.parse_pool, cache=self.http_cache,
+                                             recrawl=self.recrawl, robots=self.robots, metrics=self.metrics,
+                                             profiler=self.profiler)
+                async_fetcher.start()
+            
+            if async_fetcher is None:
+                pool = ThreadPoolExecutor(max_workers=max_workers)
+            process_url = self.process_url if self.profiler is None else partial(self.profiler.call, self.process_url)
+            metrics_written = time.monotonic()
+            
+            # URLs are deduplicated when queued and kept per host, so a busy host never blocks the others
+            frontier = Frontier(seen=BloomFilter() if config.low_memory_dedupe else None)
+            in_flight = {}  # host -> requests currently running
+            pending = {}  # future -> (url, depth, host)
+            finished = Queue()  # futures are posted here as they complete
+            
+            # Progress is estimated from the live frontier instead of a separate counting crawl
+            discovered = {0: 1}  # depth -> unique URLs discovered
+            completed = {}  # depth -> URLs finished (scraped or failed)
+            
+            # The frontier, seen set and finished pages are saved as the crawl runs
+            if config.save_checkpoints:
+                checkpoint = CrawlCheckpoint(checkpoint_path(config.output_folder, start_url, self.job_id))
+            
+            def enqueue(url, depth):
+                if not (follow_external or self.is_same_domain(start_url, url)):
+                    return False
+                key = frontier.add(url, depth)
+                if key is None:
+                    return False
+                discovered[depth] = discovered.get(depth, 0) + 1
+                if checkpoint is not None:
+                    checkpoint.add_url(key, url, depth)
+                return True
+            
+            if checkpoint is not None and resume:
+                for key in checkpoint.seen_keys():
+                    frontier.seen.add(key)
+                for url, depth in checkpoint.queued_urls():
+                    frontier.push(url, depth)
+                discovered, completed = checkpoint.depth_counts()
+                
+                # Pages from the earlier run go to the new output file first
+                for page_data in checkpoint.pages():
+                    sink.write(page_data)
+                self.log(f"Resuming crawl: {sink.pages} pages already scraped, "
+                         f"{len(frontier)} queued\n", "success")
+            else:
+                if checkpoint is not None:
+                    checkpoint.start(start_url)
+                key = frontier.add(start_url, 0)
+                if checkpoint is not None:
+                    checkpoint.add_url(key, start_url, 0)
+                
+                # Pages listed in the site's sitemaps are queued one level below the start page
+                if config.use_sitemaps and max_depth > 0:
+                    self.listener.update_status("Reading sitemaps...")
+                    robots = self.robots or RobotsCache(self.fetch_raw)
+                    sitemap_urls = robots.sitemaps(start_url) or [urljoin(start_url, "/sitemap.xml")]
+                    seeded = sum(enqueue(url, 1) for url in read_sitemaps(self.fetch_raw, sitemap_urls))
+                    self.log(f"Queued {seeded} pages from sitemaps\n", "success")
+            
+            while (frontier or pending) and not self.stop_requested:
+                # Hand out work to idle workers, skipping hosts that are at their limit or failing
+                batch = frontier.pop_batch(lambda host: self.breaker.limit(host, per_host_limit) - in_flight.get(host, 0),
+                                           max_workers - len(pending))
+                for current_url, depth, host in batch:
+                    in_flight[host] = in_flight.get(host, 0) + 1
+                    if async_fetcher is not None:
+                        future = async_fetcher.submit(current_url, options)
+                    else:
+                        future = pool.submit(process_url, current_url, options)
+                    pending[future] = (current_url, depth, host)
+                    future.add_done_callback(finished.put)
+                
+                if not pending:
+                    # Only hosts that are waiting out their circuit breaker are left
+                    time.sleep(0.2)
+                    continue
+                
+                try:
+                    done = [finished.get(timeout=0.5)]
+                except Empty:
+                    continue
+                while not finished.empty():
+                    done.append(finished.get_nowait())
+                
+                for future in done:
+                    current_url, depth, host = pending.pop(future)
+                    in_flight[host] -= 1
+                    
+                    try:
+                        page = future.result()
+                    except HostUnavailable as e:
+                        if e.deferred:
+                            # Back in the queue until the host's circuit closes again
+                            frontier.push(current_url, depth)
+                            continue
+                        self.log(f"Error scraping {current_url}: {str(e)}\n", "error")
+                        page = None
+                    except RobotsBlocked:
+                        # Skipped, not failed; a recrawl does not keep it either, so it is reported removed
+                        completed[depth] = completed.get(depth, 0) + 1
+                        self.metrics.count("blocked", host)
+                        if checkpoint is not None:
+                            checkpoint.finish_url(current_url, depth, blocked=True)
+                        continue
+                    except Exception as e:
+                        self.log(f"Error scraping {current_url}: {str(e)}\n", "error")
+                        page = None
+                    
+                    completed[depth] = completed.get(depth, 0) + 1
+                    if page is None:
+                        self.metrics.count("errors", host)
+                        if checkpoint is not None:
+                            checkpoint.finish_url(current_url, depth)
+                        if self.recrawl is not None:
+                            # Not reported as removed; the pages it linked to last time are still crawled
+                            next_urls = self.recrawl.keep(current_url)
+                            if depth < max_depth:
+                                for next_url in next_urls:
+                                    enqueue(next_url, depth + 1)
+                        continue
+                    
+                    page_data, next_urls, fingerprint = page
+                    if self.recrawl is not None:
+                        change = self.recrawl.record(current_url, fingerprint, page_data, next_urls)
+                        if change != UNCHANGED:
+                            changes.write({"change": change, **page_data})
+                    
+                    with self.metrics.timer("write"):
+                        sink.write(page_data)
+                    self.metrics.count("pages", host)
+                    if checkpoint is not None:
+                        checkpoint.finish_url(current_url, depth, page_data)
+                    
+                    # Report progress
+                    self.log(f"Scraped: {current_url}\n", "url")
+                    
+                    # Queue additional links on their host
+                    if depth >= max_depth:
+                        continue
+                    for next_url in next_urls:
+                        enqueue(next_url, depth + 1)
+                
+                self.listener.update_status(f"Scraping ({len(pending)} in progress) - {self.describe_progress(discovered, completed)}")
+                self.listener.update_progress(self.estimate_progress(discovered, completed, max_depth))
+                
+                if config.metrics_file and time.monotonic() - metrics_written >= 5:
+                    self.metrics.write_prometheus(config.metrics_file)
+                    metrics_written = time.monotonic()
+            
+            # A finished crawl is not offered for resuming again
+            if checkpoint is not None and not self.stop_requested:
+                checkpoint.mark_complete()
+            
+            # Pages are only known to be gone once the whole site was crawled
+            if self.recrawl is not None and not self.stop_requested:
+                for url in self.recrawl.remove_missing():
+                    changes.write({"change": REMOVED, "url": url})
+            
+            result.pages = sink.pages
+            result.stopped = self.stop_requested
+            # The sink may have taken another name if a crawl started in the same second had this one
+            output_file = result.output_file = sink.path
+            
+            # Save results (pages were already streamed to the output file as they finished)
+            if not self.stop_requested and sink.pages:
+                try:
+                    sink.close()
+                    
+                    # Report the results
+                    self.log("\nScraping completed!\n\n", "success")
+                    self.log(f"Pages scraped: {sink.pages}\n")
+                    if self.http_cache is not None and self.http_cache.hits:
+                        self.log(f"Unchanged pages reused from cache: {self.http_cache.hits}\n")
+                    if self.render_memory is not None:
+                        self.log(f"Pages rendered in a browser: {self.render_memory.rendered}\n")
+                    if self.robots is not None and self.robots.blocked:
+                        self.log(f"Skipped (disallowed by robots.txt): {self.robots.blocked}\n")
+                    if self.recrawl is not None:
+                        counts = self.recrawl.counts
+                        changes.close()
+                        self.log(f"Changes since last crawl: {counts['added']} added, "
+                                 f"{counts['changed']} changed, {counts['removed']} removed, "
+                                 f"{counts['unchanged']} unchanged\n")
+                        if changes.pages:
+                            result.changes_file = changes.path
+                            self.log(f"Changes saved to:\n{changes.path}\n", "success")
+                    self.log(f"Data saved to:\n{output_file}\n\n", "success")
+                    
+                    self.listener.update_status(f"Scraping completed. Data saved to {output_file}")
+                
+                except Exception as e:
+                    result.error = str(e)
+                    self.log(f"\nError saving results: {str(e)}\n", "error")
+                    self.listener.update_status(f"Error saving results: {str(e)}")
+            
+            elif self.stop_requested:
+                self.log("\nScraping stopped by user\n", "error")
+                if sink.pages:
+                    # Keep what was scraped before the stop
+                    sink.close()
+                    self.log(f"Partial data ({sink.pages} pages) saved to:\n{output_file}\n", "success")
+                    self.listener.update_status(f"Scraping stopped by user. Partial data saved to {output_file}")
+                else:
+                    self.listener.update_status("Scraping stopped by user")
+                if checkpoint is not None:
+                    self.log("Start the same URL again to resume the crawl\n")
+            
+            else:
+                self.log("\nNo data scraped\n", "error")
+                self.listener.update_status("No data scraped")
+        
+        except Exception as e:
+            result.error = str(e)
+            self.log(f"\nError: {str(e)}\n", "error")
+            self.listener.update_status(f"Error: {str(e)}")
+        
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            if async_fetcher is not None:
+                async_fetcher.close()
+            if self.recrawl is not None:
+                self.recrawl.close()
+                self.recrawl = None
+            if changes is not None:
+                try:
+                    changes.close()
+                except Exception:
+                    pass
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception:
+                    pass
+            if checkpoint is not None:
+                try:
+                    checkpoint.close()
+                except Exception:
+                    pass
+            self.close_resources()
+            self.save_diagnostics()
+        
+        self.listener.crawl_finished(result)
+        return result
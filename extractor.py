@@ -0,0 +1,186 @@
+from urllib.parse import urljoin
+
+from bs4.element import NavigableString, CData, Tag
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+# get_text() only counts these string types (comments, scripts and styles are skipped)
+TEXT_TYPES = (NavigableString, CData)
+
+
+def categorize_text(text):
+    length = len(text.split())
+    if length < 50:
+        return "(Short)"
+    elif length < 200:
+        return "(Medium)"
+    else:
+        return "(Long)"
+
+
+class PageExtractor:
+    # Builds a page record from start/text/end events in document order, so the tree
+    # is walked once and the text of every element is joined once.
+    #
+    # Every element whose text is needed gets a list of stripped strings that collects
+    # the text of its whole subtree; on its end event the list is collapsed into the
+    # element's final text, which is what get_text(strip=True) would have returned.
+    def __init__(self, url, options):
+        self.url = url
+        self.options = options
+        self.title = None
+        self.title_seen = False
+        
+        self.headings = []  # (tag name, text holder)
+        self.paragraphs = []  # text holders
+        self.lists = []
+        self.tables = []  # table -> rows -> cell text holders
+        self.images = []  # (src, alt)
+        self.links = []  # (href, text holder)
+        self.next_urls = []  # every <a href>, for the crawl frontier
+        
+        self.stack = []  # per open element: (text holder or None, opened a row, opened a table)
+        self.collectors = []  # text holders of the open elements
+        self.open_tables = []
+        self.open_rows = []
+    
+    def start(self, name, attrs):
+        holder = None
+        opened_row = False
+        options = self.options
+        
+        if name in HEADING_TAGS:
+            if options["headings"]:
+                holder = []
+                self.headings.append((name, holder))
+        elif name == 'p':
+            if options["paragraphs"]:
+                holder = []
+                self.paragraphs.append(holder)
+        elif name == 'li':
+            if options["lists"]:
+                holder = []
+                self.lists.append(holder)
+        elif name == 'a':
+            href = attrs.get('href')
+            if href is not None:
+                self.next_urls.append(urljoin(self.url, href))
+                if href and options["links"]:
+                    if not href.startswith(('http://', 'https://')):
+                        href = urljoin(self.url, href)
+                    holder = []
+                    self.links.append((href, holder))
+        elif name == 'td' or name == 'th':
+            # A cell belongs to every row it is nested in, like row.find_all(['td', 'th'])
+            if self.open_rows:
+                holder = []
+                for row in self.open_rows:
+                    row.append(holder)
+        elif name == 'tr':
+            # ...and a row to every table it is nested in, like table.find_all('tr')
+            if self.open_tables:
+                row = []
+                for table in self.open_tables:
+                    table.append(row)
+                self.open_rows.append(row)
+                opened_row = True
+        elif name == 'table':
+            if options["tables"]:
+                table = []
+                self.tables.append(table)
+                self.open_tables.append(table)
+                self.stack.append((None, False, True))
+                return
+        elif name == 'img':
+            if options["images"]:
+                src = attrs.get('src', '')
+                if src:
+                    if not src.startswith(('http://', 'https://')):
+                        src = urljoin(self.url, src)
+                    self.images.append((src, attrs.get('alt', '')))
+        
+        if holder is not None:
+            self.collectors.append(holder)
+        self.stack.append((holder, opened_row, False))
+    
+    def text(self, value):
+        if self.collectors:
+            value = value.strip()
+            if value:
+                for holder in self.collectors:
+                    holder.append(value)
+    
+    def end(self):
+        holder, opened_row, opened_table = self.stack.pop()
+        if holder is not None:
+            self.collectors.pop()
+            holder[:] = ["".join(holder)]
+        elif opened_row:
+            self.open_rows.pop()
+        elif opened_table:
+            self.open_tables.pop()
+    
+    def set_title(self, title):
+        # Only the first <title> in the document counts, as with soup.title
+        if not self.title_seen:
+            self.title_seen = True
+            self.title = title
+    
+    def record(self):
+        page_data = {
+            "url": self.url,
+            "title": self.title if self.title_seen else "",
+            "headings": [],
+            "paragraphs": [],
+            "lists": [],
+            "tables": [],
+            "images": self.images,
+            "links": []
+        }
+        
+        for name, holder in self.headings:
+            if holder[0]:
+                page_data["headings"].append((name, holder[0], categorize_text(holder[0])))
+        
+        for section, holders in (("paragraphs", self.paragraphs), ("lists", self.lists)):
+            for holder in holders:
+                if holder[0]:
+                    page_data[section].append((holder[0], categorize_text(holder[0])))
+        
+        for table in self.tables:
+            for row in table:
+                row_text = " | ".join(cell[0] for cell in row)
+                page_data["tables"].append((row_text, categorize_text(row_text)))
+        
+        page_data["links"] = [(href, holder[0]) for href, holder in self.links]
+        return page_data
+
+
+def walk_soup(soup, extractor):
+    start = extractor.start
+    text = extractor.text
+    end = extractor.end
+    
+    # Iterative depth-first walk, so very deep documents cannot hit the recursion limit
+    stack = [iter(soup.contents)]
+    while stack:
+        for node in stack[-1]:
+            if isinstance(node, Tag):
+                if node.name == 'title':
+                    extractor.set_title(node.string)
+                start(node.name, node.attrs)
+                stack.append(iter(node.contents))
+                break
+            elif type(node) in TEXT_TYPES:
+                text(node)
+        else:
+            stack.pop()
+            if stack:
+                end()
+
+
+def extract_page(soup, url, options):
+    # Returns the page record and every outgoing URL found on the page
+    extractor = PageExtractor(url, options)
+    walk_soup(soup, extractor)
+    return extractor.record(), extractor.next_urls
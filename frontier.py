@@ -0,0 +1,136 @@
+import hashlib
+import math
+import re
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit, unquote_plus
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'ref_src'}
+TRACKING_PREFIXES = ('utm_',)
+
+PERCENT_ESCAPE = re.compile(r'%[0-9a-fA-F]{2}')
+
+
+def url_host(url):
+    # Host key for per-host limits, throttling, circuit breakers and metrics, so that
+    # Example.com and example.com share them
+    return urlsplit(url).netloc.lower()
+
+
+def canonicalize_url(url):
+    # Key used to decide whether two URLs are the same page: lowercase scheme and host,
+    # no credentials, default port, fragment, trailing slash or tracking parameters, and
+    # query parameters sorted by name. The path and the parameters keep their case and
+    # encoding, and a repeated parameter keeps its order (?x=1&x=0 may not be ?x=0&x=1).
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+    
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"  # IPv6 literal
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    
+    path = PERCENT_ESCAPE.sub(lambda m: m.group(0).upper(), parts.path)
+    path = path.rstrip('/') or '/'
+    
+    params = []
+    for param in parts.query.split('&'):
+        name = unquote_plus(param.split('=', 1)[0]).lower()
+        if not param or name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES):
+            continue
+        params.append(PERCENT_ESCAPE.sub(lambda m: m.group(0).upper(), param))
+    # A stable sort by name, so only parameters with different names change places
+    params.sort(key=lambda param: param.split('=', 1)[0])
+    
+    return urlunsplit((scheme, host, path, '&'.join(params), ''))
+
+
+class BloomFilter:
+    # Fixed-size seen set for very large crawls; a false positive (about error_rate of
+    # lookups once `capacity` URLs were added) only means a page is skipped
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        self.bit_count = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+    
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.bit_count for i in range(self.hash_count)]
+    
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+    
+    def __len__(self):
+        return self.count
+
+
+class Frontier:
+    # URLs waiting to be crawled, deduplicated by canonical URL when they are added and
+    # queued per host so the crawl loop can spread work over hosts round-robin
+    def __init__(self, seen=None):
+        self.seen = seen if seen is not None else set()
+        self.queues = {}  # host -> deque of (url, depth)
+        self.hosts = deque()  # hosts that have queued URLs
+        self.size = 0
+    
+    def add(self, url, depth):
+        # Returns the canonical key of a newly queued URL, or None when the page was
+        # already seen under any of its URL variants
+        key = canonicalize_url(url)
+        if key in self.seen:
+            return None
+        self.seen.add(key)
+        self.push(url.split('#', 1)[0], depth)
+        return key
+    
+    def push(self, url, depth):
+        host = url_host(url)
+        queue = self.queues.get(host)
+        if queue is None:
+            queue = self.queues[host] = deque()
+            self.hosts.append(host)
+        queue.append((url, depth))
+        self.size += 1
+    
+    def pop_batch(self, host_slots, limit):
+        # Takes up to `limit` URLs, visiting each host once and taking at most
+        # host_slots(host) URLs from it. Returns (url, depth, host) tuples.
+        batch = []
+        for _ in range(len(self.hosts)):
+            if len(batch) >= limit:
+                break
+            
+            host = self.hosts.popleft()
+            queue = self.queues[host]
+            for _ in range(min(host_slots(host), limit - len(batch), len(queue))):
+                url, depth = queue.popleft()
+                batch.append((url, depth, host))
+            
+            if queue:
+                self.hosts.append(host)
+            else:
+                del self.queues[host]
+        
+        self.size -= len(batch)
+        return batch
+    
+    def __len__(self):
+        return self.size
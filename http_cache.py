@@ -0,0 +1,133 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from frontier import canonicalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, file TEXT NOT NULL, size INTEGER NOT NULL,
+                                    etag TEXT, last_modified TEXT, encoding TEXT,
+                                    stored REAL NOT NULL, used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+class HttpCache:
+    # Response bodies on disk, indexed in SQLite by canonical URL. Only responses with an
+    # ETag or Last-Modified are kept, since those are the ones that can be revalidated.
+    def __init__(self, folder, max_bytes=500 * 1024 * 1024, max_age=30 * 24 * 3600):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.hits = 0
+        
+        self.conn = sqlite3.connect(os.path.join(folder, "index.sqlite3"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.evict()
+    
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry["etag"]:
+            headers['If-None-Match'] = entry["etag"]
+        if entry["last_modified"]:
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+    
+    def lookup(self, url):
+        key = canonicalize_url(url)
+        with self.lock:
+            row = self.conn.execute("SELECT file, etag, last_modified, encoding FROM entries WHERE key = ?",
+                                    (key,)).fetchone()
+        if row is None:
+            return None
+        return {"key": key, "file": row[0], "etag": row[1], "last_modified": row[2], "encoding": row[3]}
+    
+    def load(self, entry):
+        # Body for a 304 response; also marks the entry as freshly validated
+        try:
+            with open(os.path.join(self.folder, entry["file"]), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        
+        now = time.time()
+        with self.lock:
+            self.hits += 1
+            with self.conn:
+                self.conn.execute("UPDATE entries SET stored = ?, used = ? WHERE key = ?", (now, now, entry["key"]))
+        return body
+    
+    def store(self, url, body, encoding, headers):
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not (etag or last_modified) or 'no-store' in headers.get('Cache-Control', '').lower():
+            return
+        if len(body) > self.max_bytes // 10:
+            return
+        
+        key = canonicalize_url(url)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        file = os.path.join(name[:2], name)
+        path = os.path.join(self.folder, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Write to a temporary file first so a crash never leaves a truncated body behind
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, path)
+        
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (key, file, len(body), etag, last_modified, encoding, now, now))
+            self.total_bytes += len(body) - (old[0] if old else 0)
+        
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+    
+    def evict(self):
+        # Drop entries that were not validated within max_age, then the least recently
+        # used ones until the cache is back under 90% of its size limit
+        with self.lock:
+            expired = self.conn.execute("SELECT key, file, size FROM entries WHERE stored < ?",
+                                        (time.time() - self.max_age,)).fetchall()
+            removed = list(expired)
+            remaining = self.total_bytes - sum(size for _, _, size in expired)
+            
+            if remaining > self.max_bytes:
+                expired_keys = {key for key, _, _ in expired}
+                for key, file, size in self.conn.execute("SELECT key, file, size FROM entries ORDER BY used"):
+                    if remaining <= self.max_bytes * 0.9:
+                        break
+                    if key in expired_keys:
+                        continue
+                    removed.append((key, file, size))
+                    remaining -= size
+            
+            if not removed:
+                return
+            
+            with self.conn:
+                self.conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _, _ in removed])
+            self.total_bytes = remaining
+        
+        for _, file, _ in removed:
+            try:
+                os.remove(os.path.join(self.folder, file))
+            except OSError:
+                pass
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,115 @@
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+# Containers that single-page apps render into; empty in the HTML the server sends
+SPA_ROOT = re.compile(r'<(div|main)\b[^>]*\bid=["\']?(root|app|__next|__nuxt|svelte)\b[^>]*>\s*</\1>'
+                      r'|<app-root\b[^>]*>\s*</app-root>', re.IGNORECASE)
+NOSCRIPT_WARNING = re.compile(r'<noscript\b[^>]*>[^<]*(?:<[^/][^>]*>[^<]*)*?(enable|requires?|turn on)[^<]*javascript',
+                              re.IGNORECASE)
+SCRIPT_OR_STYLE = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+TAG = re.compile(r'<[^>]+>')
+SPACE = re.compile(r'\s+')
+
+MIN_TEXT = 200  # visible characters below which a page with scripts is probably rendered by them
+
+
+def visible_text_length(html):
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    text = TAG.sub(' ', SCRIPT_OR_STYLE.sub(' ', html))
+    return len(SPACE.sub(' ', text).strip())
+
+
+def needs_browser(html):
+    # Cheap checks on the raw HTML, before any parsing
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    
+    text = visible_text_length(html)
+    has_scripts = '<script' in html.lower()
+    if not has_scripts:
+        return False
+    if text < MIN_TEXT:
+        return True
+    if SPA_ROOT.search(html) and text < 5 * MIN_TEXT:
+        return True
+    return bool(NOSCRIPT_WARNING.search(html)) and text < 5 * MIN_TEXT
+
+
+def browser_helped(http_body, rendered_body):
+    # The rendered page counts as better only when it has clearly more text
+    http_text = visible_text_length(http_body)
+    return visible_text_length(rendered_body) > http_text + max(50, http_text // 5)
+
+
+def url_pattern(url):
+    # Pages under the same first path segment usually share a template: /products/123
+    # and /products/456 both become example.com/products/*
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if not segments:
+        return f"{parts.netloc.lower()}/"
+    first = '*' if any(char.isdigit() for char in segments[0]) else segments[0].lower()
+    return f"{parts.netloc.lower()}/{first}" + ("/*" if len(segments) > 1 else "")
+
+
+# Outcomes recorded per URL pattern
+NEEDED = 0  # the browser found content plain HTTP did not
+STATIC = 1  # plain HTTP already had the content
+WASTED = 2  # looked like a JS page, but the browser found nothing more
+
+
+class RenderMemory:
+    # Counts of each outcome per URL pattern. Once a pattern has enough pages, its pages
+    # go straight to the browser, or stop being escalated when that never helped.
+    def __init__(self, min_pages=3, browser_share=0.8, recheck_every=20, max_count=100):
+        self.min_pages = min_pages
+        self.browser_share = browser_share
+        self.recheck_every = recheck_every
+        self.max_count = max_count
+        self.lock = threading.Lock()
+        self.patterns = {}  # pattern -> [needed, static, wasted]
+        self.rendered = 0
+    
+    def decision(self, url):
+        # "browser", "http" or None while the pattern is still being learned
+        with self.lock:
+            needed, static, wasted = self.patterns.get(url_pattern(url), (0, 0, 0))
+        total = needed + static + wasted
+        if total >= self.min_pages and needed >= self.browser_share * total:
+            # Now and then try plain HTTP again, in case the site changed
+            if needed % self.recheck_every == 0:
+                return None
+            return "browser"
+        if wasted >= self.min_pages and needed == 0:
+            return "http"
+        return None
+    
+    def record(self, url, outcome):
+        with self.lock:
+            counts = self.patterns.setdefault(url_pattern(url), [0, 0, 0])
+            counts[outcome] += 1
+            if outcome == NEEDED:
+                self.rendered += 1
+            # Old evidence fades, so a pattern can change its mind
+            if sum(counts) > self.max_count:
+                counts[:] = [count // 2 for count in counts]
+    
+    def load(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.patterns = {pattern: list(counts) for pattern, counts in json.load(f).items()
+                                 if len(counts) == 3}
+        except (OSError, ValueError):
+            pass
+    
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            patterns = dict(self.patterns)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(patterns, f, indent=2)
+
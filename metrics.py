@@ -0,0 +1,251 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Upper bounds of the histogram buckets, in seconds (the last bucket is unbounded)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Where a crawl spends its time, in the order a page goes through them
+PHASES = {
+    "wait": "waiting for the host's turn (delay and politeness limits)",
+    "backoff": "sleeping before a retry",
+    "connect": "DNS, connect and waiting for the first byte",
+    "download": "reading the response body",
+    "render": "loading the page in a browser",
+    "parse": "decoding and building the HTML tree",
+    "extract": "collecting the page record from the tree",
+    "write": "writing records to the output file",
+    "ui": "applying queued updates to the window",
+}
+
+# Per-host series beyond this many hosts are added up under "other"
+MAX_HOSTS = 50
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, fraction):
+        # Estimated from the buckets, interpolating inside the bucket the quantile falls in
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class Timer:
+    # with metrics.timer("parse", host): ...
+    def __init__(self, metrics, phase, host):
+        self.metrics = metrics
+        self.phase = phase
+        self.host = host
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.phase, time.perf_counter() - self.started, self.host)
+
+
+class CrawlMetrics:
+    # Per-phase and per-host timings and counters of one crawl. Safe to update from any
+    # thread; reading takes a snapshot, so the stats panel never blocks the workers for long.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.histograms = {}  # (phase, host) -> Histogram
+        self.counters = {}  # (name, host) -> value
+        self.hosts = set()
+
+    def host_label(self, host):
+        # Called with the lock held
+        if host in self.hosts or not host:
+            return host
+        if len(self.hosts) >= MAX_HOSTS:
+            return "other"
+        self.hosts.add(host)
+        return host
+
+    def observe(self, phase, seconds, host=""):
+        with self.lock:
+            key = (phase, self.host_label(host))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, phase, host=""):
+        return Timer(self, phase, host)
+
+    def count(self, name, host="", amount=1):
+        with self.lock:
+            key = (name, self.host_label(host))
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def copy(self):
+        with self.lock:
+            histograms = {}
+            for key, histogram in self.histograms.items():
+                histograms[key] = Histogram()
+                histograms[key].merge(histogram)
+            return histograms, dict(self.counters)
+
+    def phase_summary(self):
+        # phase -> Histogram over all hosts, in PHASES order
+        histograms, counters = self.copy()
+        phases = {}
+        for (phase, host), histogram in histograms.items():
+            phases.setdefault(phase, Histogram()).merge(histogram)
+        return {phase: phases[phase] for phase in sorted(phases, key=lambda name: list(PHASES).index(name)
+                                                         if name in PHASES else len(PHASES))}
+
+    def host_summary(self):
+        # host -> {"pages", "errors", "bytes", "fetch": Histogram of connect + download + render}
+        histograms, counters = self.copy()
+        hosts = {}
+        for (name, host), value in counters.items():
+            if host:
+                hosts.setdefault(host, {"pages": 0, "errors": 0, "bytes": 0, "fetch": Histogram()})[name] = value
+        for (phase, host), histogram in histograms.items():
+            if host and phase in ("connect", "download", "render"):
+                hosts.setdefault(host, {"pages": 0, "errors": 0, "bytes": 0, "fetch": Histogram()})["fetch"].merge(histogram)
+        return hosts
+
+    def prometheus_text(self):
+        histograms, counters = self.copy()
+        lines = ["# HELP scraper_phase_seconds Time spent in each crawl phase, per host",
+                 "# TYPE scraper_phase_seconds histogram"]
+        for (phase, host), histogram in sorted(histograms.items()):
+            labels = f'phase="{phase}",host="{escape_label(host)}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f'scraper_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"scraper_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"scraper_phase_seconds_count{{{labels}}} {histogram.count}")
+
+        for name, help_text in (("pages", "Pages scraped"), ("errors", "Pages that failed"),
+                                ("blocked", "Pages disallowed by robots.txt"), ("bytes", "Response bytes downloaded")):
+            lines.append(f"# HELP scraper_{name}_total {help_text}, per host")
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            for (counter, host), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'scraper_{name}_total{{host="{escape_label(host)}"}} {value}')
+
+        lines.append("# HELP scraper_crawl_start_time_seconds When the crawl started")
+        lines.append("# TYPE scraper_crawl_start_time_seconds gauge")
+        lines.append(f"scraper_crawl_start_time_seconds {self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # For node_exporter's textfile collector: replaced in one step, never read half written
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def serve_metrics(get_metrics, port, host="127.0.0.1"):
+    # Serves GET /metrics for Prometheus on a background thread. `get_metrics` returns the
+    # CrawlMetrics to show (or None), so one server can outlive several crawls.
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            metrics = get_metrics()
+            body = (metrics.prometheus_text() if metrics is not None else "").encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class CrawlProfiler:
+    # cProfile for a crawl that runs on many threads: cProfile only sees the thread that
+    # enabled it, so every thread gets its own profile and they are merged when saved.
+    # Parser processes are not included.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = []
+
+    def thread_profile(self):
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
+
+    def enable(self):
+        self.thread_profile().enable()
+
+    def disable(self):
+        self.thread_profile().disable()
+
+    def call(self, function, *args):
+        profile = self.thread_profile()
+        profile.enable()
+        try:
+            return function(*args)
+        finally:
+            profile.disable()
+
+    def save(self, path):
+        # Readable with python -m pstats or snakeviz
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
@@ -0,0 +1,144 @@
+import time
+
+from bs4 import BeautifulSoup
+
+from extractor import PageExtractor, walk_soup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+PARSERS = ("html.parser", "lxml")
+
+# bs4 stores the strings inside these tags as special string types that get_text() skips
+HIDDEN_TEXT_TAGS = ('script', 'style', 'template', 'rt', 'rp')
+
+
+def available_parsers():
+    return [name for name in PARSERS if name != "lxml" or lxml is not None]
+
+
+def default_parser():
+    # lxml is faster, but libxml2 repairs broken markup differently from html.parser, so
+    # switching to it can change the text of records; it is only used when asked for
+    return "html.parser"
+
+
+def extract_html(html, url, options, parser="html.parser", timings=None):
+    # Parses the HTML with the chosen engine and returns (page record, outgoing URLs).
+    # Every engine feeds the same PageExtractor, so the records only depend on the tree:
+    # each engine gives what BeautifulSoup with the same tree builder would. Broken markup
+    # is repaired differently by libxml2 and html.parser, so there the engines can differ.
+    # `timings` gets the moment the tree was built, between parsing and extraction.
+    extractor = PageExtractor(url, options)
+    if parser == "lxml" and lxml is not None:
+        root = parse_lxml(html)
+        parsed = time.perf_counter()
+        if root is not None:
+            walk_lxml(root, extractor)
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        parsed = time.perf_counter()
+        walk_soup(soup, extractor)
+    if timings is not None:
+        timings.append(parsed)
+    return extractor.record(), extractor.next_urls
+
+
+def decode_body(body, encoding):
+    # Same rules as requests' Response.text, but run wherever the page gets parsed
+    if isinstance(body, str):
+        return body
+    
+    if encoding is None:
+        encoding = 'utf-8'
+        if charset_normalizer is not None:
+            encoding = charset_normalizer.detect(body)['encoding'] or encoding
+    
+    try:
+        return str(body, encoding, errors='replace')
+    except (LookupError, TypeError):
+        return str(body, errors='replace')
+
+
+def extract_body(body, encoding, url, options, parser="html.parser"):
+    # Entry point for parser worker processes: takes the raw response body and sends
+    # back only the page record and outgoing URLs
+    return extract_html(decode_body(body, encoding), url, options, parser)
+
+
+def extract_body_timed(body, encoding, url, options, parser="html.parser"):
+    # extract_body that also returns (parse seconds, extract seconds); parsing includes decoding
+    started = time.perf_counter()
+    timings = []
+    page_data, next_urls = extract_html(decode_body(body, encoding), url, options, parser, timings)
+    return page_data, next_urls, (timings[0] - started, time.perf_counter() - timings[0])
+
+
+def parse_lxml(html):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        if isinstance(html, str):
+            return lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+        raise
+    except etree.ParserError:
+        # Empty document
+        return None
+
+
+def lxml_string(element):
+    # Mirrors bs4's Tag.string: the only string inside the element, or None
+    while True:
+        if len(element) == 0:
+            return element.text
+        if len(element) > 1 or element.text or element[0].tail or not isinstance(element[0].tag, str):
+            return None
+        element = element[0]
+
+
+def walk_lxml(root, extractor):
+    start = extractor.start
+    text = extractor.text
+    end = extractor.end
+    hidden = 0  # > 0 while inside a tag whose text bs4 would not count
+    
+    # lxml keeps the text before an element's first child in .text and the text
+    # that follows an element (inside its parent) in .tail
+    def open_element(element):
+        nonlocal hidden
+        tag = element.tag
+        if tag == 'title':
+            extractor.set_title(lxml_string(element))
+        start(tag, element.attrib)
+        if tag in HIDDEN_TEXT_TAGS:
+            hidden += 1
+        elif element.text and not hidden:
+            text(element.text)
+    
+    open_element(root)
+    stack = [(root, iter(root))]
+    while stack:
+        for child in stack[-1][1]:
+            if isinstance(child.tag, str):
+                open_element(child)
+                stack.append((child, iter(child)))
+                break
+            elif child.tail and not hidden:
+                # Comments and processing instructions only contribute their tail
+                text(child.tail)
+        else:
+            element = stack.pop()[0]
+            end()
+            if element.tag in HIDDEN_TEXT_TAGS:
+                hidden -= 1
+            if element.tail and not hidden:
+                text(element.tail)
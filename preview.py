@@ -0,0 +1,163 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from sinks import format_page_text
+
+PAGE_SIZE = 20  # scraped pages per preview screen
+SEPARATOR = "=" * 80
+
+
+def binary_lines(f):
+    # Lines of a file opened in binary mode, each with the offset it starts at
+    while True:
+        offset = f.tell()
+        line = f.readline()
+        if not line:
+            return
+        yield offset, line.decode('utf-8', errors='replace')
+
+
+def read_jsonl(path, offset=0):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for start, line in binary_lines(f):
+            if line.strip():
+                yield start, format_page_text(json.loads(line))
+
+
+def read_json(path, offset=0):
+    # JsonSink (like json.dump(pages, indent=2)) starts every page on a line of its own
+    # that is exactly "  {" and ends it on "  }", so pages can be read one at a time
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        start = None
+        lines = []
+        for line_start, line in binary_lines(f):
+            if line.rstrip() == "  {":
+                start = line_start
+                lines = [line]
+            elif start is not None:
+                lines.append(line)
+                if line.rstrip() in ("  }", "  },"):
+                    yield start, format_page_text(json.loads("".join(lines).rstrip().rstrip(",")))
+                    start = None
+
+
+def read_text(path, offset=0):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        start = None
+        lines = []
+        for line_start, line in binary_lines(f):
+            if start is None:
+                if not line.strip():
+                    continue
+                start = line_start
+            lines.append(line)
+            if line.rstrip('\r\n') == SEPARATOR:
+                yield start, "".join(lines) + "\n"
+                start = None
+                lines = []
+        if lines:
+            yield start, "".join(lines)
+
+
+def read_csv(path, offset=0):
+    # One page is the run of rows that share a URL
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig', errors='replace')]), [])
+        f.seek(max(offset, f.tell()))
+        
+        position = [f.tell()]
+        
+        def lines():
+            # Tracks where the next row starts; csv never reads ahead of the row it returns
+            for _, line in binary_lines(f):
+                position[0] = f.tell()
+                yield line
+        
+        rows = csv.DictReader(lines(), fieldnames=header)
+        url = None
+        start = None
+        text = []
+        while True:
+            row_start = position[0]
+            row = next(rows, None)
+            if row is None or row.get('url') != url:
+                if text:
+                    yield start, "".join(text) + SEPARATOR + "\n\n"
+                if row is None:
+                    return
+                url = row.get('url')
+                start = row_start
+                text = [f"URL: {url}\n\n"]
+            category = f" {row['category']}" if row.get('category') else ""
+            text.append(f"{(row.get('type') or '').upper()}: {row.get('content')}{category}\n")
+
+
+def read_xlsx(path, offset=0):
+    # Workbooks are zip files; read-only mode streams the Summary sheet row by row.
+    # There is no offset to seek to, so every read starts at the first row.
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(path, read_only=True)
+    try:
+        sheet = workbook['Summary'] if 'Summary' in workbook.sheetnames else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        for row in rows:
+            yield None, "".join(f"{name}: {'' if value is None else value}\n" for name, value in zip(header, row)) + "\n"
+    finally:
+        workbook.close()
+
+
+READERS = {
+    ".jsonl": read_jsonl,
+    ".json": read_json,
+    ".csv": read_csv,
+    ".xlsx": read_xlsx,
+    ".txt": read_text,
+}
+
+
+class ResultPages:
+    # Screens of scraped pages from a result file, read only when they are shown.
+    # Paging forward continues where the last screen stopped; paging back seeks to the
+    # remembered offset of that screen, so only one screen is ever held in memory.
+    def __init__(self, path, total=None, page_size=PAGE_SIZE):
+        self.path = path
+        self.total = total  # number of pages, when known
+        self.page_size = page_size
+        self.reader = READERS.get(os.path.splitext(path)[1].lower(), read_text)
+        self.pages = None
+        self.position = 0
+        self.offsets = {0: 0}  # first page of a screen -> file offset it starts at
+    
+    def read(self, start):
+        start = max(0, start)
+        if self.pages is None or start != self.position:
+            self.close()
+            # Resume from the closest remembered screen at or before `start`
+            known = max(index for index in self.offsets if index <= start)
+            self.pages = self.reader(self.path, self.offsets[known] or 0)
+            self.position = known
+            skipped = sum(1 for _ in islice(self.pages, start - known))
+            self.position += skipped
+            if self.position < start:
+                self.total = self.position
+                return []
+        
+        screen = list(islice(self.pages, self.page_size))
+        if screen and screen[0][0] is not None:
+            self.offsets[start] = screen[0][0]
+        self.position = start + len(screen)
+        if len(screen) < self.page_size:
+            self.total = self.position
+        return [text for offset, text in screen]
+    
+    def close(self):
+        if self.pages is not None:
+            self.pages.close()
+            self.pages = None
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from frontier import canonicalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, url TEXT NOT NULL, fingerprint BLOB NOT NULL,
+                                  record TEXT NOT NULL, links TEXT NOT NULL, run INTEGER NOT NULL);
+"""
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+# Answers that mean a page is gone, rather than failing for now
+GONE_STATUSES = (404, 410)
+
+
+def recrawl_path(folder, start_url, job_id=None):
+    # Kept per job like the checkpoints, so a job's changes are always against its own last run
+    if job_id is not None:
+        return os.path.join(folder, "recrawl", f"job_{job_id}.sqlite3")
+    digest = hashlib.sha1(start_url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(folder, "recrawl", f"site_{digest}.sqlite3")
+
+
+class RecrawlIndex:
+    # Content fingerprint, record and links of every page from the previous crawl of a
+    # site. A page whose body hashes the same is not parsed again: its stored record and
+    # links are reused. `settings` goes into every fingerprint, so changing the content
+    # options or the parser makes all pages count as changed.
+    def __init__(self, path, settings, batch_size=200, flush_interval=2.0):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.hasher = hashlib.blake2b(json.dumps(settings, sort_keys=True).encode('utf-8'), digest_size=16)
+        
+        # Workers read stored pages while the crawl loop writes, so the connection is shared under a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        
+        # Only the fingerprints are held in memory; workers compare against them
+        self.fingerprints = dict(self.conn.execute("SELECT key, fingerprint FROM pages"))
+        self.run = 0
+        self.updates = []
+        self.touched = []
+        self.gone = set()
+        self.last_flush = time.monotonic()
+        self.counts = {ADDED: 0, CHANGED: 0, UNCHANGED: 0, REMOVED: 0}
+    
+    def start(self, resume=False):
+        # A resumed crawl continues the same run, so its earlier pages are not seen as removed
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'run'").fetchone()
+        self.run = int(row[0]) if row else 0
+        if not resume or row is None:
+            self.run += 1
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('run', ?)", (str(self.run),))
+    
+    def fingerprint(self, body):
+        if isinstance(body, str):
+            # Selenium hands back the rendered page as text
+            body = body.encode('utf-8')
+        hasher = self.hasher.copy()
+        hasher.update(body)
+        return hasher.digest()
+    
+    def unchanged(self, url, fingerprint):
+        # Safe to call from worker threads
+        return self.fingerprints.get(canonicalize_url(url)) == fingerprint
+    
+    def previous(self, url):
+        # Record and links saved for an unchanged page, or None when they are not stored yet
+        with self.lock:
+            row = self.conn.execute("SELECT record, links FROM pages WHERE key = ?",
+                                    (canonicalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1])
+    
+    def mark_gone(self, url):
+        # Safe to call from worker threads
+        self.gone.add(canonicalize_url(url))
+    
+    def keep(self, url):
+        # A page that failed this time (timeout, server error, host skipped) is not gone: its
+        # row stays, and its stored links are returned so the pages under it are still reached.
+        # Pages that answered 404 or 410 are left to remove_missing.
+        key = canonicalize_url(url)
+        if key in self.gone or key not in self.fingerprints:
+            return []
+        self.touched.append((self.run, key))
+        previous = self.previous(url)
+        return previous[1] if previous is not None else []
+    
+    def record(self, url, fingerprint, page_data, next_urls):
+        # Returns whether the page was added, changed or unchanged since the last crawl
+        key = canonicalize_url(url)
+        old = self.fingerprints.get(key)
+        if old == fingerprint:
+            self.touched.append((self.run, key))
+            change = UNCHANGED
+        else:
+            self.fingerprints[key] = fingerprint
+            self.updates.append((key, url, fingerprint, json.dumps(page_data, ensure_ascii=False),
+                                 json.dumps(list(next_urls)), self.run))
+            change = ADDED if old is None else CHANGED
+        
+        self.counts[change] += 1
+        if len(self.updates) + len(self.touched) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+        return change
+    
+    def flush(self):
+        if self.updates or self.touched:
+            with self.lock, self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)", self.updates)
+                self.conn.executemany("UPDATE pages SET run = ? WHERE key = ?", self.touched)
+            self.updates = []
+            self.touched = []
+        self.last_flush = time.monotonic()
+    
+    def remove_missing(self):
+        # Only call this after a complete crawl: pages that answered 404/410 or were not linked
+        # from anywhere this time are gone
+        self.flush()
+        with self.lock, self.conn:
+            removed = [url for (url,) in self.conn.execute("SELECT url FROM pages WHERE run != ?", (self.run,))]
+            self.conn.execute("DELETE FROM pages WHERE run != ?", (self.run,))
+        self.counts[REMOVED] = len(removed)
+        return removed
+    
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+
+# Statuses worth asking again for; anything else is final
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HostUnavailable(Exception):
+    # Raised instead of fetching from a host whose circuit breaker is open. `deferred`
+    # pages should go back to the frontier; the others are given up on.
+    def __init__(self, host, deferred):
+        if deferred:
+            super().__init__(f"{host} is failing, page put back in the queue")
+        else:
+            super().__init__(f"{host} stopped responding, page skipped")
+        self.host = host
+        self.deferred = deferred
+
+
+class RetryPolicy:
+    def __init__(self, retries=2, base_delay=0.5, max_delay=30):
+        self.retries = max(0, retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def backoff(self, attempt, retry_after=None):
+        # Exponential backoff with full jitter, so workers that failed together do not
+        # all come back at the same moment; Retry-After wins when it asks for longer
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+
+class HostCircuit:
+    def __init__(self):
+        self.failures = 0  # consecutive failures
+        self.open_until = 0
+        self.trips = 0
+        self.dead = False
+
+
+class CircuitBreaker:
+    # Stops sending requests to a host after `threshold` failures in a row. The host
+    # is left alone for `cooldown` seconds (doubling each time), then one trial request
+    # decides whether it is back. After `max_trips` openings the host is given up on.
+    # `clock` is there for tests.
+    def __init__(self, threshold=5, cooldown=10, max_trips=3, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.hosts = {}  # host -> HostCircuit
+    
+    def circuit(self, host):
+        circuit = self.hosts.get(host)
+        if circuit is None:
+            circuit = HostCircuit()
+            self.hosts[host] = circuit
+        return circuit
+    
+    def limit(self, host, limit):
+        # How many requests the host may have running: none while open, one trial once
+        # the cooldown is over, and all of them for dead hosts so their pages fail fast
+        with self.lock:
+            circuit = self.hosts.get(host)
+            if circuit is None or circuit.dead or circuit.trips == 0:
+                return limit
+            if circuit.open_until > self.clock():
+                return 0
+            return min(limit, 1)
+    
+    def check(self, host):
+        with self.lock:
+            circuit = self.hosts.get(host)
+            if circuit is None:
+                return
+            if circuit.dead:
+                raise HostUnavailable(host, deferred=False)
+            if circuit.open_until > self.clock():
+                raise HostUnavailable(host, deferred=True)
+    
+    def success(self, host):
+        with self.lock:
+            circuit = self.hosts.get(host)
+            if circuit is not None and not circuit.dead:
+                circuit.failures = 0
+                circuit.trips = 0
+    
+    def failure(self, host):
+        # Returns True when this failure opened the circuit
+        with self.lock:
+            circuit = self.circuit(host)
+            if circuit.dead:
+                return False
+            circuit.failures += 1
+            
+            # A failed trial re-opens the circuit straight away
+            if circuit.failures < self.threshold and circuit.trips == 0:
+                return False
+            if circuit.open_until > self.clock():
+                return False
+            
+            circuit.trips += 1
+            if circuit.trips >= self.max_trips:
+                circuit.dead = True
+            else:
+                circuit.open_until = self.clock() + self.cooldown * 2 ** (circuit.trips - 1)
+            return True
+    
+    def is_dead(self, host):
+        with self.lock:
+            circuit = self.hosts.get(host)
+            return circuit is not None and circuit.dead
@@ -0,0 +1,190 @@
+import gzip
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from frontier import url_host
+
+
+class RobotsBlocked(Exception):
+    # Raised instead of fetching a page robots.txt disallows. The page is skipped, not
+    # failed: it is not counted as an error, and an incremental recrawl reports it removed.
+    def __init__(self, url):
+        super().__init__(f"{url} is disallowed by robots.txt")
+        self.url = url
+
+
+class RobotRules(RobotFileParser):
+    # RobotFileParser drops Crawl-delay values that are not whole seconds, but sites
+    # often ask for things like 0.5, so the delays are read again here as floats
+    def parse(self, lines):
+        lines = list(lines)
+        super().parse(lines)
+        
+        self.delays = {}  # user agent -> delay
+        agents = []
+        in_rules = False
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, value = (part.strip() for part in line.split(':', 1))
+            field = field.lower()
+            if field == 'user-agent':
+                if in_rules:
+                    agents = []
+                    in_rules = False
+                agents.append(value.lower())
+            elif field == 'crawl-delay' and agents:
+                in_rules = True
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    self.delays.setdefault(agent, delay)
+            elif field in ('allow', 'disallow', 'request-rate'):
+                in_rules = True
+    
+    def crawl_delay(self, useragent):
+        delays = getattr(self, 'delays', {})
+        token = useragent.split('/')[0].lower()
+        for agent, delay in delays.items():
+            if agent != '*' and agent in token:
+                return delay
+        if '*' in delays:
+            return delays['*']
+        return super().crawl_delay(useragent)
+
+
+class RobotsCache:
+    # Parsed robots.txt per host, fetched once and kept for `ttl` seconds. `fetch(url)`
+    # returns (status_code, body bytes) and raises on network errors.
+    def __init__(self, fetch, user_agent="*", ttl=24 * 3600, error_ttl=600, max_hosts=10000, max_delay=120):
+        self.fetch = fetch
+        self.max_delay = max_delay
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_hosts = max_hosts
+        self.lock = threading.Lock()
+        self.host_locks = {}
+        self.rules = OrderedDict()  # (scheme, host) -> (parser, expires)
+        self.blocked = 0
+    
+    def get_rules(self, url):
+        parts = urlparse(url)
+        key = (parts.scheme, parts.netloc.lower())
+        
+        with self.lock:
+            cached = self.rules.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                self.rules.move_to_end(key)
+                return cached[0]
+            host_lock = self.host_locks.setdefault(key, threading.Lock())
+        
+        # Only one worker downloads a host's robots.txt; the others wait for its result
+        with host_lock:
+            with self.lock:
+                cached = self.rules.get(key)
+                if cached is not None and cached[1] > time.monotonic():
+                    return cached[0]
+            
+            parser, ttl = self.load(f"{key[0]}://{key[1]}/robots.txt")
+            with self.lock:
+                self.rules[key] = (parser, time.monotonic() + ttl)
+                self.rules.move_to_end(key)
+                while len(self.rules) > self.max_hosts:
+                    old_key, _ = self.rules.popitem(last=False)
+                    self.host_locks.pop(old_key, None)
+            return parser
+    
+    def load(self, robots_url):
+        parser = RobotRules(robots_url)
+        try:
+            status, body = self.fetch(robots_url)
+        except Exception:
+            # Unreachable robots.txt: crawl, but try again soon
+            parser.allow_all = True
+            return parser, self.error_ttl
+        
+        # Same rules as RobotFileParser.read(): 401/403 block the site, other 4xx allow it
+        if status in (401, 403):
+            parser.disallow_all = True
+        elif status >= 500:
+            parser.allow_all = True
+            return parser, self.error_ttl
+        elif status >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(body.decode('utf-8', errors='replace').splitlines())
+        parser.modified()
+        return parser, self.ttl
+    
+    def allowed(self, url):
+        if self.get_rules(url).can_fetch(self.user_agent, url):
+            return True
+        with self.lock:
+            self.blocked += 1
+        return False
+    
+    def crawl_delay(self, url):
+        # Capped, so one site asking for hours between requests cannot stall the crawl
+        parser = self.get_rules(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is not None:
+            return min(float(delay), self.max_delay)
+        rate = parser.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            return min(rate.seconds / rate.requests, self.max_delay)
+        return None
+    
+    def check(self, url, throttle=None):
+        # Runs before every fetch; also hands the host's Crawl-delay to the throttle
+        if not self.allowed(url):
+            return False
+        delay = self.crawl_delay(url)
+        if delay and throttle is not None:
+            throttle.set_delay(url_host(url), delay)
+        return True
+    
+    def sitemaps(self, url):
+        return self.get_rules(url).site_maps() or []
+
+
+def read_sitemaps(fetch, sitemap_urls, max_urls=50000, max_sitemaps=50):
+    # Page URLs listed in the given sitemaps, following sitemap index files
+    queue = list(sitemap_urls)
+    visited = set()
+    urls = []
+    
+    while queue and len(urls) < max_urls and len(visited) < max_sitemaps:
+        sitemap_url = queue.pop(0)
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        
+        try:
+            status, body = fetch(sitemap_url)
+            if status >= 400:
+                continue
+            if body[:2] == b'\x1f\x8b':
+                body = gzip.decompress(body)
+            root = ET.fromstring(body)
+        except Exception:
+            continue
+        
+        # <sitemapindex> lists more sitemaps, <urlset> lists pages
+        is_index = root.tag.endswith('sitemapindex')
+        for element in root.iter():
+            if element.tag.endswith('loc') and element.text:
+                location = element.text.strip()
+                if is_index:
+                    queue.append(location)
+                elif len(urls) < max_urls:
+                    urls.append(location)
+    
+    return urls
@@ -0,0 +1,396 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from engine import Crawler, CrawlConfig, CrawlListener, normalize_start_url
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+KINDS = ("once", "daily", "weekly", "interval")
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def parse_time(text):
+    # "HH:MM" -> (hour, minute)
+    try:
+        hour, minute = (int(part) for part in text.split(":"))
+    except ValueError:
+        raise ValueError(f"Expected a time like 06:30, got {text!r}")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Expected a time like 06:30, got {text!r}")
+    return hour, minute
+
+
+def parse_duration(text):
+    # "45s", "30m", "2h", "1d" or a plain number of minutes -> seconds
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = str(text).strip().lower()
+    try:
+        if text and text[-1] in units:
+            seconds = float(text[:-1]) * units[text[-1]]
+        else:
+            seconds = float(text) * 60
+    except ValueError:
+        raise ValueError(f"Expected a duration like 30m or 2h, got {text!r}")
+    if seconds <= 0:
+        raise ValueError(f"Expected a duration like 30m or 2h, got {text!r}")
+    return seconds
+
+
+def parse_weekday(text):
+    name = text.strip().lower()[:3]
+    if name not in WEEKDAYS:
+        raise ValueError(f"Expected a weekday like mon, got {text!r}")
+    return WEEKDAYS.index(name)
+
+
+class Job:
+    # One recurring crawl: what to crawl (the CrawlConfig settings) and when to run it
+    def __init__(self, start_url, settings=None, kind="daily", at="00:00", weekday=0, every=3600,
+                 misfire_grace=3600, name=None, job_id=None, next_run=None, last_run=None,
+                 last_status=None, last_output=None, enabled=True):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown schedule {kind!r}, expected one of {', '.join(KINDS)}")
+        parse_time(at)
+        
+        self.id = job_id or uuid.uuid4().hex[:8]
+        self.start_url = normalize_start_url(start_url)
+        self.name = name or urlparse(self.start_url).netloc
+        self.settings = dict(settings or {})
+        CrawlConfig(self.start_url, **self.settings)  # rejects unknown settings now, not when due
+        self.kind = kind
+        self.at = at
+        self.weekday = weekday
+        self.every = every
+        self.misfire_grace = misfire_grace  # seconds a run may start late before it counts as missed
+        self.next_run = next_run  # timestamp
+        self.last_run = last_run
+        self.last_status = last_status
+        self.last_output = last_output
+        self.enabled = enabled
+        
+        if self.next_run is None:
+            self.next_run = self.next_after(datetime.now())
+    
+    @property
+    def host(self):
+        return urlparse(self.start_url).netloc.lower()
+    
+    def next_after(self, moment):
+        # Timestamp of the first run strictly after `moment` (a datetime), or None
+        if self.kind == "interval":
+            return (moment + timedelta(seconds=self.every)).timestamp()
+        
+        hour, minute = parse_time(self.at)
+        candidate = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if self.kind == "weekly":
+            candidate += timedelta(days=(self.weekday - moment.weekday()) % 7)
+            if candidate <= moment:
+                candidate += timedelta(days=7)
+        elif candidate <= moment:
+            candidate += timedelta(days=1)
+        
+        if self.kind == "once" and self.last_run is not None:
+            return None
+        return candidate.timestamp()
+    
+    def describe(self):
+        if self.kind == "interval":
+            if self.every >= 3600:
+                when = f"every {self.every / 3600:g}h"
+            elif self.every >= 60:
+                when = f"every {self.every / 60:g}m"
+            else:
+                when = f"every {self.every:g}s"
+        elif self.kind == "weekly":
+            when = f"weekly on {WEEKDAYS[self.weekday]} at {self.at}"
+        else:
+            when = f"{self.kind} at {self.at}"
+        next_run = datetime.fromtimestamp(self.next_run).strftime("%Y-%m-%d %H:%M") if self.next_run else "-"
+        return f"{self.id}  {self.name}  {when}  next: {next_run}  last: {self.last_status or '-'}"
+    
+    def to_dict(self):
+        return {
+            "id": self.id, "name": self.name, "start_url": self.start_url, "settings": self.settings,
+            "kind": self.kind, "at": self.at, "weekday": self.weekday, "every": self.every,
+            "misfire_grace": self.misfire_grace, "next_run": self.next_run, "last_run": self.last_run,
+            "last_status": self.last_status, "last_output": self.last_output, "enabled": self.enabled,
+        }
+    
+    @staticmethod
+    def from_dict(data):
+        data = dict(data)
+        return Job(data.pop("start_url"), job_id=data.pop("id", None), **data)
+
+
+class JobLock:
+    # An OS lock on a file per job, held while the job runs, so the Tk app and
+    # `cli.py schedule run` never run the same job at once. The OS drops the lock when the
+    # process dies. The file keeps the due time of the last run it started, so a process that
+    # read the schedule just before another one ran the job does not run it again.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+    
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+', encoding='utf-8')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self.file = f
+        return True
+    
+    def last_due(self):
+        self.file.seek(0)
+        try:
+            return float(self.file.read())
+        except ValueError:
+            return None
+    
+    def mark(self, due):
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(repr(due))
+        self.file.flush()
+    
+    def release(self):
+        if self.file is None:
+            return
+        if fcntl is None:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+
+class Scheduler:
+    # Runs due jobs in this process on a bounded pool of crawl threads. At most `max_jobs`
+    # crawls run at once, and at most `per_host` of them against the same site. Jobs are
+    # kept in a JSON file, which is re-read when another process (the command line) edits it;
+    # a JobLock keeps two processes from running the same job.
+    def __init__(self, path, max_jobs=2, per_host=1, listener_factory=None, notify=None):
+        self.path = path
+        self.max_jobs = max(1, max_jobs)
+        self.per_host = max(1, per_host)
+        self.listener_factory = listener_factory or (lambda job: CrawlListener())
+        self.notify = notify or (lambda message: None)
+        
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.jobs = {}  # id -> Job
+        self.running = {}  # id -> Crawler
+        self.hosts = {}  # host -> jobs running against it
+        self.loaded_mtime = None
+        self.pool = None
+        self.thread = None
+        self.stopping = False
+        self.load()
+    
+    def load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                jobs = [Job.from_dict(data) for data in json.load(f)]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            self.notify(f"Could not read {self.path}: {e}")
+            return
+        self.jobs = {job.id: job for job in jobs}
+        self.loaded_mtime = mtime
+    
+    def reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self.loaded_mtime:
+            self.load()
+    
+    def save(self):
+        # Written to a temporary file first, so a crash never leaves half a schedule behind
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump([job.to_dict() for job in self.jobs.values()], f, indent=2)
+        os.replace(temp_path, self.path)
+        self.loaded_mtime = os.path.getmtime(self.path)
+    
+    def add_job(self, job):
+        with self.lock:
+            self.reload_if_changed()
+            self.jobs[job.id] = job
+            self.save()
+            self.wakeup.notify_all()
+        return job
+    
+    def remove_job(self, job_id):
+        with self.lock:
+            self.reload_if_changed()
+            job = self.jobs.pop(job_id, None)
+            if job is not None:
+                self.save()
+            crawler = self.running.get(job_id)
+        if crawler is not None:
+            crawler.stop()
+        return job is not None
+    
+    def list_jobs(self):
+        with self.lock:
+            self.reload_if_changed()
+            return sorted(self.jobs.values(), key=lambda job: job.next_run or float('inf'))
+    
+    def run_pending(self, now=None):
+        # Starts every due job that has a free slot; returns seconds until the next due job
+        now = now if now is not None else time.time()
+        changed = False
+        with self.lock:
+            self.reload_if_changed()
+            for job in sorted(self.jobs.values(), key=lambda job: job.next_run or float('inf')):
+                if not job.enabled or job.next_run is None or job.next_run > now:
+                    continue
+                
+                if now - job.next_run > job.misfire_grace:
+                    # The scheduler was not running (or had no free slot) when the job was due.
+                    # Missed runs are not replayed; the job waits for its next time.
+                    job.last_status = f"missed {datetime.fromtimestamp(job.next_run):%Y-%m-%d %H:%M}"
+                    self.notify(f"{job.name}: {job.last_status}")
+                    self.reschedule(job, now)
+                    changed = True
+                    continue
+                
+                if job.id in self.running:
+                    # The previous run overran its interval; never run the same job twice at once
+                    job.last_status = "skipped, previous run still going"
+                    self.notify(f"{job.name}: {job.last_status}")
+                    self.reschedule(job, now)
+                    changed = True
+                    continue
+                
+                if len(self.running) >= self.max_jobs or self.hosts.get(job.host, 0) >= self.per_host:
+                    # Stays due until a slot frees up, within its misfire grace
+                    continue
+                
+                lock = JobLock(self.lock_path(job))
+                if not lock.acquire():
+                    # Running in another process, which moves the job on in the file
+                    continue
+                if lock.last_due() == job.next_run:
+                    # Another process already ran this occurrence after the file was read
+                    lock.release()
+                    self.reschedule(job, now)
+                    changed = True
+                    continue
+                
+                self.start_job(job, now, lock)
+                changed = True
+            
+            if changed:
+                self.save()
+            upcoming = [job.next_run for job in self.jobs.values() if job.enabled and job.next_run]
+        if not upcoming:
+            return 60
+        return max(0, min(upcoming) - now)
+    
+    def lock_path(self, job):
+        return os.path.join(os.path.dirname(self.path) or ".", "job_locks", f"job_{job.id}.lock")
+    
+    def reschedule(self, job, now):
+        # Moves a job past an occurrence it did not run; a one-off job is then done
+        job.next_run = None if job.kind == "once" else job.next_after(datetime.fromtimestamp(now))
+        if job.next_run is None:
+            job.enabled = False
+    
+    def start_job(self, job, now, lock):
+        # Called with the lock held
+        due = job.next_run
+        lock.mark(due)
+        job.last_run = now
+        job.last_status = "running"
+        
+        # Keep the cadence of interval jobs, unless the job fell a whole interval behind
+        job.next_run = job.next_after(datetime.fromtimestamp(due))
+        if job.next_run is not None and job.next_run <= now:
+            job.next_run = job.next_after(datetime.fromtimestamp(now))
+        if job.next_run is None:
+            job.enabled = False
+        
+        crawler = Crawler(CrawlConfig(job.start_url, **job.settings), listener=self.listener_factory(job),
+                          job_id=job.id)
+        self.running[job.id] = crawler
+        self.hosts[job.host] = self.hosts.get(job.host, 0) + 1
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_jobs)
+        self.notify(f"{job.name}: crawl started")
+        self.pool.submit(self.run_job, job, crawler, lock)
+    
+    def run_job(self, job, crawler, lock):
+        try:
+            result = crawler.run()
+            if result.error is not None:
+                status = f"error: {result.error}"
+            elif result.stopped:
+                status = "stopped"
+            else:
+                status = f"ok, {result.pages} pages"
+            output = result.output_file if result.pages else None
+        except Exception as e:
+            status = f"error: {e}"
+            output = None
+        
+        with self.lock:
+            self.running.pop(job.id, None)
+            self.hosts[job.host] -= 1
+            if self.hosts[job.host] <= 0:
+                del self.hosts[job.host]
+            
+            # The job may have been edited or removed while it ran
+            self.reload_if_changed()
+            current = self.jobs.get(job.id)
+            if current is not None:
+                current.last_status = status
+                if output:
+                    current.last_output = output
+                self.save()
+            # Only let go once the file shows the run, so no other process starts it again
+            lock.release()
+            self.wakeup.notify_all()
+        self.notify(f"{job.name}: crawl finished ({status})")
+    
+    def run_forever(self):
+        while not self.stopping:
+            wait = self.run_pending()
+            with self.lock:
+                if not self.stopping:
+                    # Wake up for the next due job, a finished crawl, or a changed file
+                    self.wakeup.wait(timeout=min(max(wait, 0.5), 30))
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.run_forever, daemon=True)
+        self.thread.start()
+    
+    def stop(self, wait=True):
+        with self.lock:
+            self.stopping = True
+            crawlers = list(self.running.values())
+            self.wakeup.notify_all()
+        for crawler in crawlers:
+            crawler.stop()
+        if self.pool is not None:
+            self.pool.shutdown(wait=wait)
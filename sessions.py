@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# urllib3 only decodes brotli responses when one of these packages is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+
+class SessionPool:
+    # Keep-alive sessions keyed by (scheme, host, proxy), so pages on the same host
+    # reuse open connections instead of paying for a new TCP/TLS handshake each time
+    def __init__(self, pool_size=10, max_sessions=256):
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()
+    
+    def get(self, url, proxy=None):
+        parts = urlparse(url)
+        key = (parts.scheme, parts.netloc, proxy)
+        
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                self.sessions.move_to_end(key)
+                return session
+            
+            session = self.create_session(proxy)
+            self.sessions[key] = session
+            
+            # Drop the least recently used hosts on very wide crawls
+            while len(self.sessions) > self.max_sessions:
+                _, old_session = self.sessions.popitem(last=False)
+                old_session.close()
+            
+            return session
+    
+    def create_session(self, proxy):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        
+        if proxy:
+            session.proxies = {
+                'http': proxy,
+                'https': proxy
+            }
+        
+        return session
+    
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
@@ -0,0 +1,205 @@
+import csv
+import json
+import os
+import textwrap
+
+SECTIONS = ['headings', 'paragraphs', 'lists', 'tables', 'images', 'links']
+
+
+def format_page_text(page):
+    lines = [f"URL: {page['url']}\n", f"Title: {page['title']}\n\n"]
+    
+    if page['headings']:
+        lines.append("=== Headings ===\n")
+        for tag, text, category in page['headings']:
+            lines.append(f"{tag.upper()}: {text} {category}\n")
+        lines.append("\n")
+    
+    if page['paragraphs']:
+        lines.append("=== Paragraphs ===\n")
+        for text, category in page['paragraphs']:
+            lines.append(f"{textwrap.fill(text, width=80)} {category}\n")
+        lines.append("\n")
+    
+    if page['lists']:
+        lines.append("=== Lists ===\n")
+        for text, category in page['lists']:
+            lines.append(f"- {text} {category}\n")
+        lines.append("\n")
+    
+    if page['tables']:
+        lines.append("=== Table Data ===\n")
+        for text, category in page['tables']:
+            lines.append(f"{text} {category}\n")
+        lines.append("\n")
+    
+    if page['images']:
+        lines.append("=== Images ===\n")
+        for src, alt in page['images']:
+            lines.append(f"SRC: {src}\nALT: {alt}\n\n")
+    
+    if page['links']:
+        lines.append("=== Links ===\n")
+        for href, text in page['links']:
+            lines.append(f"LINK: {href}\nTEXT: {text}\n\n")
+    
+    lines.append("="*80 + "\n\n")
+    return "".join(lines)
+
+
+class ResultSink:
+    # Writes each page as soon as it is scraped, so memory stays flat and a crash only
+    # loses the pages still in flight. The file is created with the first page; `path`
+    # may then change (see claim_path).
+    def __init__(self, path):
+        self.path = path
+        self.pages = 0
+        self.file = None
+    
+    def write(self, page):
+        if self.file is None:
+            self.claim_path()
+            self.open()
+        self.write_page(page)
+        self.pages += 1
+    
+    def claim_path(self):
+        # Output names only carry the second a crawl started, so crawls started together
+        # (scheduled jobs due at once, or a job and a manual crawl) would share one file.
+        # The file is created exclusively, and a taken name gets a _2, _3... suffix.
+        base, extension = os.path.splitext(self.path)
+        attempt = 1
+        while True:
+            try:
+                with open(self.path, 'x'):
+                    return
+            except FileExistsError:
+                attempt += 1
+                self.path = f"{base}_{attempt}{extension}"
+    
+    def open(self):
+        self.file = open(self.path, 'w', encoding='utf-8', newline='')
+    
+    def write_page(self, page):
+        raise NotImplementedError
+    
+    def close(self):
+        if self.file is not None:
+            self.finish()
+            self.file.close()
+            self.file = None
+    
+    def finish(self):
+        pass
+
+
+class JsonSink(ResultSink):
+    # Streams the same indented JSON array that json.dump(pages, indent=2) would write
+    def write_page(self, page):
+        self.file.write("[\n" if self.pages == 0 else ",\n")
+        self.file.write(textwrap.indent(json.dumps(page, indent=2, ensure_ascii=False), "  "))
+    
+    def finish(self):
+        self.file.write("\n]")
+
+
+class JsonLinesSink(ResultSink):
+    def write_page(self, page):
+        self.file.write(json.dumps(page, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+
+class CsvSink(ResultSink):
+    def open(self):
+        super().open()
+        self.writer = csv.DictWriter(self.file, fieldnames=['url', 'type', 'content', 'category', 'alt_text'])
+        self.writer.writeheader()
+    
+    def write_page(self, page):
+        # One row per extracted item
+        for section in SECTIONS:
+            for item in page[section]:
+                row = {
+                    'url': page['url'],
+                    'type': section[:-1],  # Remove 's' (headings -> heading)
+                    'content': item[0],
+                    'category': item[1] if len(item) > 1 else ''
+                }
+                if section == 'images' and len(item) > 1:
+                    row['alt_text'] = item[1]
+                self.writer.writerow(row)
+
+
+class TextSink(ResultSink):
+    def write_page(self, page):
+        self.file.write(format_page_text(page))
+
+
+class XlsxSink(ResultSink):
+    # openpyxl's write-only mode streams rows to disk instead of keeping every cell in
+    # memory. Sheets are added when their first row arrives and put in order on close.
+    SUMMARY_COLUMNS = ['URL', 'Title', 'Headings', 'Paragraphs', 'List Items', 'Tables', 'Images', 'Links']
+    
+    def open(self):
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        
+        self.clean = lambda value: ILLEGAL_CHARACTERS_RE.sub('', value) if isinstance(value, str) else value
+        self.file = Workbook(write_only=True)
+        self.sheets = {}
+        self.summary = self.file.create_sheet('Summary')
+        self.summary.append(self.SUMMARY_COLUMNS)
+    
+    def write_page(self, page):
+        clean = self.clean
+        for section in SECTIONS:
+            for item in page[section]:
+                sheet = self.sheets.get(section)
+                if sheet is None:
+                    sheet = self.file.create_sheet(section.capitalize())
+                    header = ['URL', 'Content', 'Category']
+                    if section == 'images':
+                        header.append('Alt Text')
+                    sheet.append(header)
+                    self.sheets[section] = sheet
+                
+                row = [page['url'], clean(item[0]), clean(item[1]) if len(item) > 1 else '']
+                if section == 'images' and len(item) > 1:
+                    row.append(clean(item[1]))
+                sheet.append(row)
+        
+        self.summary.append([
+            page['url'],
+            clean(page['title']),
+            len(page['headings']),
+            len(page['paragraphs']),
+            len(page['lists']),
+            len(page['tables']),
+            len(page['images']),
+            len(page['links']),
+        ])
+    
+    def close(self):
+        if self.file is None:
+            return
+        
+        # Content sheets first, in the usual section order, then the summary
+        order = [self.sheets[section] for section in SECTIONS if section in self.sheets] + [self.summary]
+        for index, sheet in enumerate(order):
+            self.file.move_sheet(sheet.title, offset=index - self.file.index(sheet))
+        
+        self.file.save(self.path)
+        self.file = None
+
+
+SINKS = {
+    "json": JsonSink,
+    "jsonl": JsonLinesSink,
+    "csv": CsvSink,
+    "xlsx": XlsxSink,
+    "txt": TextSink,
+}
+
+
+def open_sink(output_format, path):
+    return SINKS.get(output_format, TextSink)(path)
@@ -0,0 +1,59 @@
+from urllib.parse import urljoin
+
+from extractor import categorize_text
+
+# The page record as the scraper built it before the single-pass extractor: one
+# find_all() and get_text() per section. Tests hold the extractor to these results.
+
+
+def baseline_page(soup, url, options):
+    page_data = {
+        "url": url,
+        "title": soup.title.string if soup.title else "",
+        "headings": [],
+        "paragraphs": [],
+        "lists": [],
+        "tables": [],
+        "images": [],
+        "links": []
+    }
+    
+    if options["headings"]:
+        page_data["headings"] = [(h.name, h.get_text(strip=True), categorize_text(h.get_text(strip=True)))
+                                 for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']) if h.get_text(strip=True)]
+    
+    if options["paragraphs"]:
+        page_data["paragraphs"] = [(p.get_text(strip=True), categorize_text(p.get_text(strip=True)))
+                                   for p in soup.find_all('p') if p.get_text(strip=True)]
+    
+    if options["lists"]:
+        page_data["lists"] = [(li.get_text(strip=True), categorize_text(li.get_text(strip=True)))
+                              for li in soup.find_all('li') if li.get_text(strip=True)]
+    
+    if options["tables"]:
+        tables = []
+        for table in soup.find_all('table'):
+            for row in table.find_all('tr'):
+                cells = row.find_all(['td', 'th'])
+                row_text = " | ".join(cell.get_text(strip=True) for cell in cells)
+                tables.append((row_text, categorize_text(row_text)))
+        page_data["tables"] = tables
+    
+    if options["images"]:
+        for img in soup.find_all('img'):
+            src = img.get('src', '')
+            if src:
+                if not src.startswith(('http://', 'https://')):
+                    src = urljoin(url, src)
+                page_data["images"].append((src, img.get('alt', '')))
+    
+    if options["links"]:
+        for a in soup.find_all('a', href=True):
+            href = a['href']
+            if href:
+                if not href.startswith(('http://', 'https://')):
+                    href = urljoin(url, href)
+                page_data["links"].append((href, a.get_text(strip=True)))
+    
+    next_urls = [urljoin(url, link['href']) for link in soup.find_all('a', href=True)]
+    return page_data, next_urls
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+# The scraper is a folder of modules, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Site:
+    # A local web site for crawl tests. `pages` maps a path to its HTML, or to a status
+    # code to answer with instead; every request is recorded as (path, status).
+    def __init__(self):
+        self.pages = {}
+        self.robots = None
+        self.requests = []
+        self.base_url = None
+    
+    def url(self, path="/"):
+        return self.base_url + path
+    
+    def page(self, title, links=()):
+        return (f"<html><head><title>{title}</title></head><body><p>{title} text</p>"
+                + "".join(f'<a href="{link}">{link}</a>' for link in links) + "</body></html>")
+    
+    def paths(self, status=None):
+        return [path for path, answered in self.requests if status is None or answered == status]
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        site = self.server.site
+        if self.path == "/robots.txt":
+            content = site.robots
+        else:
+            content = site.pages.get(self.path, 404)
+        
+        if content is None or isinstance(content, int):
+            self.answer(content or 404, b"", {})
+            return
+        
+        body = content.encode('utf-8')
+        # Pages carry an ETag, so the HTTP cache can revalidate them
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.answer(304, b"", {"ETag": etag})
+        else:
+            self.answer(200, body, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+    
+    def answer(self, status, body, headers):
+        self.server.site.requests.append((self.path, status))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    server.site = Site()
+    server.site.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.site
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,97 @@
+import json
+
+from checkpoint import CrawlCheckpoint, checkpoint_path
+from engine import Crawler, CrawlConfig
+from frontier import canonicalize_url
+
+START_URL = "http://example.com/"
+
+
+def saved_crawl(path, done=(), failed=(), queued=()):
+    # A checkpoint as a stopped crawl leaves it: the start page at depth 0, the rest below it
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.start(START_URL)
+    for depth, url in [(0, START_URL)] + [(1, url) for url in (*done, *failed, *queued)]:
+        checkpoint.add_url(canonicalize_url(url), url, depth)
+    checkpoint.finish_url(START_URL, 0, {"url": START_URL, "title": "Start"})
+    for url in done:
+        checkpoint.finish_url(url, 1, {"url": url, "title": "Done"})
+    for url in failed:
+        checkpoint.finish_url(url, 1)
+    checkpoint.close()
+
+
+def test_resume_queues_only_unfinished_urls(tmp_path):
+    path = str(tmp_path / "crawl.sqlite3")
+    saved_crawl(path, done=["http://example.com/a"], failed=["http://example.com/b"],
+                queued=["http://example.com/c", "http://example.com/d"])
+    
+    checkpoint = CrawlCheckpoint(path)
+    try:
+        assert checkpoint.queued_urls() == [("http://example.com/c", 1), ("http://example.com/d", 1)]
+        assert set(checkpoint.seen_keys()) == {canonicalize_url(START_URL)} | {f"http://example.com/{name}"
+                                                                               for name in "abcd"}
+        assert [page["url"] for page in checkpoint.pages()] == [START_URL, "http://example.com/a"]
+        assert checkpoint.depth_counts() == ({0: 1, 1: 4}, {0: 1, 1: 2})
+    finally:
+        checkpoint.close()
+
+
+def test_summary(tmp_path):
+    path = str(tmp_path / "crawl.sqlite3")
+    assert CrawlCheckpoint.summary(path) is None
+    saved_crawl(path, queued=["http://example.com/a"])
+    assert CrawlCheckpoint.summary(path) == {"status": "running", "start_url": START_URL, "pages": 1, "queued": 1}
+    
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.mark_complete()
+    checkpoint.close()
+    assert CrawlCheckpoint.summary(path)["status"] == "complete"
+
+
+def test_changes_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "crawl.sqlite3")
+    checkpoint = CrawlCheckpoint(path, batch_size=3, flush_interval=3600)
+    checkpoint.start(START_URL)
+    checkpoint.add_url(canonicalize_url(START_URL), START_URL, 0)
+    checkpoint.add_url("http://example.com/a", "http://example.com/a", 1)
+    assert CrawlCheckpoint.summary(path)["queued"] == 0
+    checkpoint.add_url("http://example.com/b", "http://example.com/b", 1)
+    assert CrawlCheckpoint.summary(path)["queued"] == 3
+    checkpoint.close()
+
+
+def test_start_forgets_the_previous_crawl(tmp_path):
+    path = str(tmp_path / "crawl.sqlite3")
+    saved_crawl(path, done=["http://example.com/a"], queued=["http://example.com/b"])
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.start(START_URL)
+    checkpoint.close()
+    assert CrawlCheckpoint.summary(path) == {"status": "running", "start_url": START_URL, "pages": 0, "queued": 0}
+
+
+def test_resumed_crawl_skips_finished_pages(site, tmp_path):
+    site.pages = {"/": site.page("Start", ["/a", "/b", "/c"]), "/a": site.page("A"), "/b": site.page("B"),
+                  "/c": site.page("C")}
+    config = CrawlConfig(site.url("/"), output_folder=str(tmp_path), output_format="jsonl", delay=0,
+                         respect_robots=False, use_http_cache=False)
+    
+    # The earlier run scraped / and /a and gave up on /b
+    checkpoint = CrawlCheckpoint(checkpoint_path(config.output_folder, config.start_url))
+    checkpoint.start(config.start_url)
+    for depth, path in [(0, "/"), (1, "/a"), (1, "/b"), (1, "/c")]:
+        checkpoint.add_url(canonicalize_url(site.url(path)), site.url(path), depth)
+    checkpoint.finish_url(site.url("/"), 0, {"url": site.url("/"), "title": "Start (earlier run)"})
+    checkpoint.finish_url(site.url("/a"), 1, {"url": site.url("/a"), "title": "A (earlier run)"})
+    checkpoint.finish_url(site.url("/b"), 1)
+    checkpoint.close()
+    
+    crawler = Crawler(config)
+    assert crawler.saved_crawl()["queued"] == 1
+    result = crawler.run(resume=True)
+    
+    assert site.paths() == ["/c"]
+    with open(result.output_file, encoding='utf-8') as f:
+        titles = [json.loads(line)["title"] for line in f]
+    assert titles == ["Start (earlier run)", "A (earlier run)", "C"]
+    assert crawler.saved_crawl() is None
@@ -0,0 +1,138 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import distributed
+from distributed import PARTITIONS, SqliteFrontierStore, check_settings, host_partition, owned_partitions
+
+START_URL = "http://example.com/"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(distributed, "time", SimpleNamespace(time=clock, strftime=time.strftime))
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = SqliteFrontierStore(str(tmp_path / "crawl.sqlite3"), worker_timeout=30, max_attempts=3)
+    store.setup(START_URL, {})
+    yield store
+    store.close()
+
+
+def leased_urls(batch):
+    return [url for key, url, depth in batch]
+
+
+def test_expired_lease_goes_to_another_worker(store, clock):
+    batch = store.lease("a", 10, lease_seconds=60)
+    assert leased_urls(batch) == [START_URL]
+    # Worker b may own the host, but a still holds the lease
+    assert store.lease("b", 10, lease_seconds=60) == []
+    
+    # a dies; once its lease runs out the URL is queued again for b
+    clock.now += 61
+    retry = store.lease("b", 10, lease_seconds=60)
+    assert leased_urls(retry) == [START_URL]
+    
+    # a's late report is dropped, so the page is stored once
+    key = batch[0][0]
+    assert store.complete("a", [(key, {"url": START_URL}, [])], 60) == 0
+    assert store.complete("b", [(key, {"url": START_URL}, [])], 60) == 1
+    assert list(store.pages()) == [{"url": START_URL}]
+    assert store.status()["done"] == 1
+
+
+def test_reporting_renews_the_lease(store, clock):
+    key = store.lease("a", 10, lease_seconds=60)[0][0]
+    clock.now += 50
+    store.complete("a", [], 60)
+    # a's hosts have moved on (no call for over 30 s), but its lease is still good
+    clock.now += 50
+    assert store.lease("b", 10, lease_seconds=60) == []
+    clock.now += 11
+    assert [row[0] for row in store.lease("b", 10, lease_seconds=60)] == [key]
+
+
+def test_url_is_given_up_after_max_attempts(store, clock):
+    for worker in ("a", "b", "c"):
+        assert leased_urls(store.lease(worker, 10, lease_seconds=60)) == [START_URL]
+        clock.now += 61
+    assert store.lease("d", 10, lease_seconds=60) == []
+    status = store.status()
+    assert (status["queued"], status["leased"], status["failed"]) == (0, 0, 1)
+
+
+def test_release_does_not_count_as_an_attempt(tmp_path, clock):
+    store = SqliteFrontierStore(str(tmp_path / "crawl.sqlite3"), max_attempts=1)
+    store.setup(START_URL, {})
+    for _ in range(3):
+        batch = store.lease("a", 10, lease_seconds=60)
+        assert leased_urls(batch) == [START_URL]
+        store.release("a", [batch[0][0]])
+    store.close()
+
+
+def test_links_are_queued_once(store):
+    key = store.lease("a", 10, lease_seconds=60)[0][0]
+    links = [("http://example.com/a", 1), ("http://example.com/a#top", 1), ("http://example.com/b", 1)]
+    store.complete("a", [(key, {"url": START_URL}, links)], 60)
+    assert store.add_urls([("http://example.com/b/", 1), ("http://example.com/c", 1)]) == 1
+    assert store.status()["queued"] == 3
+
+
+def test_live_workers_split_the_partitions():
+    owners = {worker: set(owned_partitions(["a", "b", "c"], worker)) for worker in ("a", "b", "c")}
+    assert set.union(*owners.values()) == set(range(PARTITIONS))
+    assert sum(len(owned) for owned in owners.values()) == PARTITIONS
+    assert all(owners.values())
+    
+    # When c leaves, only c's partitions move
+    for worker in ("a", "b"):
+        assert owners[worker] <= set(owned_partitions(["a", "b"], worker))
+    assert owned_partitions(["a", "b"], "c") == []
+
+
+def test_each_host_is_leased_by_its_owner_only(store, clock):
+    urls = [f"http://host{index}.example/page" for index in range(40)]
+    store.add_urls([(url, 1) for url in urls])
+    # Both workers call in before either leases
+    store.lease("a", 0, lease_seconds=60)
+    store.lease("b", 0, lease_seconds=60)
+    
+    leased = {worker: leased_urls(store.lease(worker, 100, lease_seconds=60)) for worker in ("a", "b")}
+    assert leased["a"] and leased["b"]
+    assert sorted(leased["a"] + leased["b"]) == sorted(urls + [START_URL])
+    for worker, worker_urls in leased.items():
+        owned = owned_partitions(["a", "b"], worker)
+        assert all(host_partition(url) in owned for url in worker_urls)
+
+
+def test_dead_workers_hosts_move_to_the_others(store, clock):
+    urls = [f"http://host{index}.example/page" for index in range(40)]
+    store.add_urls([(url, 1) for url in urls])
+    store.lease("a", 0, lease_seconds=60)
+    store.lease("b", 0, lease_seconds=60)
+    
+    # b goes quiet without leasing anything; after worker_timeout a owns every host
+    clock.now += 31
+    assert sorted(leased_urls(store.lease("a", 100, lease_seconds=60))) == sorted(urls + [START_URL])
+
+
+@pytest.mark.parametrize("setting", ["use_async", "incremental_recrawl"])
+def test_unsupported_settings_are_rejected(setting):
+    with pytest.raises(ValueError):
+        check_settings({setting: True})
+    check_settings({setting: False, "use_hybrid": True})
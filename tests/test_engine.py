@@ -0,0 +1,35 @@
+import json
+import multiprocessing
+
+import pytest
+
+import async_backend
+from engine import Crawler, CrawlConfig
+
+
+def crawl(site, folder, **settings):
+    config = CrawlConfig(site.url("/"), output_folder=str(folder), output_format="jsonl", delay=0,
+                         respect_robots=False, use_http_cache=False, save_checkpoints=False, **settings)
+    result = Crawler(config).run()
+    with open(result.output_file, encoding='utf-8') as f:
+        return sorted((json.loads(line) for line in f), key=lambda record: record["url"])
+
+
+@pytest.mark.parametrize("use_async", [False, pytest.param(True, marks=pytest.mark.skipif(
+    not async_backend.is_available(), reason="aiohttp is not installed"))])
+def test_parse_processes_give_the_same_records(site, tmp_path, use_async):
+    site.pages = {"/": site.page("Start", ["/a", "/b"]), "/a": site.page("A"), "/b": site.page("B")}
+    in_process = crawl(site, tmp_path / "threads", use_async=use_async)
+    assert len(in_process) == 3
+    assert crawl(site, tmp_path / "processes", use_async=use_async, parse_processes=2) == in_process
+
+
+def test_parse_processes_are_not_forked(tmp_path):
+    crawler = Crawler(CrawlConfig("http://example.com/", output_folder=str(tmp_path), parse_processes=1))
+    crawler.open_resources()
+    try:
+        method = crawler.parse_pool._mp_context.get_start_method()
+    finally:
+        crawler.close_resources()
+    assert method in ("forkserver", "spawn")
+    assert method in multiprocessing.get_all_start_methods()
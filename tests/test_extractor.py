@@ -0,0 +1,79 @@
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from baseline import baseline_page
+from extractor import extract_page
+from parsers import available_parsers
+
+URL = "http://example.com/docs/page.html"
+
+OPTIONS = [
+    {"headings": True, "paragraphs": True, "lists": True, "tables": True, "images": True, "links": True},
+    {"headings": False, "paragraphs": True, "lists": False, "tables": True, "images": False, "links": True},
+]
+
+WELL_FORMED = [
+    "",
+    "<html><head><title>Plain</title></head><body><h1>Heading</h1><p>One <b>bold</b> word.</p></body></html>",
+    "<html><head><title>Lists</title></head><body><ul><li>one</li><li>two <a href='/two'>link</a></li>"
+    "<li>three<ol><li>nested</li></ol></li></ul></body></html>",
+    "<html><body><table><tr><th>Name</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr>"
+    "<tr><td>inner<table><tr><td>x</td></tr></table></td><td>2</td></tr></table></body></html>",
+    "<html><body><p>" + "word " * 120 + "</p><h2>" + "w " * 300 + "</h2></body></html>",
+    "<html><body><a href='https://other.example/'>abs</a><a href='rel/x'>rel</a><a href=''>empty</a>"
+    "<a>no href</a><img src='pic.png' alt='Pic'><img alt='no src'><img src='https://cdn.example/i.gif'></body></html>",
+    "<html><head><title>Hidden</title><style>p {}</style></head><body><p>shown<!-- comment --> "
+    "<script>var hidden = 1;</script>text &amp; more&nbsp;</p><![CDATA[cdata]]></body></html>",
+]
+
+MALFORMED = [
+    "<b><p>bold</b>para</p>",
+    "<p>a<h2>b</p>c",
+    "<p><tr>world<a href=/x>world<h2></tr><b>x</b></p>",
+    "<li>one<li>two<p>para<p>next",
+    "<title>first<b>bold</b></title><title>second</title><h3>open heading<style>p{}</style>x",
+    "<table><td>bare cell</td><tr><td>row</td></tr></table><tr><td>outside</td></tr>",
+    "</p></li></table>stray end tags<p>after</div>",
+    "<a href='/a'>outer<a href='/b'>inner</a></a><p>text<table><tr><td>cell<p>in cell</table>",
+]
+
+# Tags for generated markup: random open and close tags, comments and text
+TAGS = ['p', 'li', 'ul', 'ol', 'table', 'tr', 'td', 'th', 'h1', 'h4', 'a', 'img', 'div', 'span', 'b',
+        'title', 'script']
+
+
+def generated_markup(count, seed=1):
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        parts = []
+        for index in range(rng.randint(1, 60)):
+            tag = rng.choice(TAGS)
+            roll = rng.random()
+            if roll < 0.4:
+                parts.append(f"<{tag} href='/l{index}' src='s{index}.png' alt='a'>")
+            elif roll < 0.7:
+                parts.append(f"</{tag}>")
+            elif roll < 0.8:
+                parts.append("<!-- c -->")
+            else:
+                parts.append(rng.choice([" ", "x y", "  z\n", "w" * rng.randint(1, 5)]))
+        documents.append("".join(parts))
+    return documents
+
+
+@pytest.mark.parametrize("parser", available_parsers())
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize("html", WELL_FORMED + MALFORMED)
+def test_extract_page_matches_baseline(html, options, parser):
+    soup = BeautifulSoup(html, parser)
+    assert extract_page(soup, URL, options) == baseline_page(soup, URL, options)
+
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_extract_page_matches_baseline_on_generated_markup(parser):
+    for html in generated_markup(300):
+        soup = BeautifulSoup(html, parser)
+        assert extract_page(soup, URL, OPTIONS[0]) == baseline_page(soup, URL, OPTIONS[0]), html
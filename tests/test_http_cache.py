@@ -0,0 +1,129 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import async_backend
+import http_cache
+from engine import Crawler, CrawlConfig
+from http_cache import HttpCache
+
+ETAG = {"ETag": '"v1"'}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_cache, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / "cache"), max_bytes=10_000, max_age=3600)
+    yield cache
+    cache.close()
+
+
+def url(index):
+    return f"http://example.com/page/{index}"
+
+
+def cached_urls(cache):
+    return [index for index in range(20) if cache.lookup(url(index)) is not None]
+
+
+def test_only_responses_that_can_be_revalidated_are_stored(cache):
+    cache.store(url(0), b"body", "utf-8", {})
+    cache.store(url(1), b"body", "utf-8", {"ETag": '"v1"', "Cache-Control": "private, no-store"})
+    cache.store(url(2), b"x" * 1001, "utf-8", ETAG)  # over a tenth of the cache
+    cache.store(url(3), b"body", "utf-8", {"Last-Modified": "Sat, 01 Jan 2022 00:00:00 GMT"})
+    assert cached_urls(cache) == [3]
+
+
+def test_revalidated_entry_gives_back_the_stored_body(cache):
+    cache.store(url(0) + "?utm_source=feed", b"<html>old</html>", "iso-8859-1",
+                {"ETag": '"v1"', "Last-Modified": "Sat, 01 Jan 2022 00:00:00 GMT"})
+    entry = cache.lookup(url(0))
+    assert HttpCache.conditional_headers(entry) == {"If-None-Match": '"v1"',
+                                                    "If-Modified-Since": "Sat, 01 Jan 2022 00:00:00 GMT"}
+    assert entry["encoding"] == "iso-8859-1"
+    assert cache.load(entry) == b"<html>old</html>"
+    assert cache.hits == 1
+
+
+def test_missing_body_file_is_a_miss(cache):
+    cache.store(url(0), b"body", "utf-8", ETAG)
+    entry = cache.lookup(url(0))
+    os.remove(os.path.join(cache.folder, entry["file"]))
+    assert cache.load(entry) is None
+    assert cache.hits == 0
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_limit(cache, clock):
+    for index in range(10):
+        cache.store(url(index), b"x" * 900, "utf-8", ETAG)
+        clock.now += 1
+    # Page 0 was just revalidated, so 1 and 2 are now the least recently used
+    cache.load(cache.lookup(url(0)))
+    clock.now += 1
+    assert cache.total_bytes == 9000
+    
+    cache.store(url(10), b"x" * 900, "utf-8", ETAG)
+    cache.store(url(11), b"x" * 900, "utf-8", ETAG)
+    # Back under 90% of the limit
+    assert cached_urls(cache) == [0] + list(range(3, 12))
+    assert cache.total_bytes == 9000
+    files = [name for folder, _, names in os.walk(cache.folder) for name in names if not name.startswith("index")]
+    assert len(files) == 10
+
+
+def test_entries_not_validated_within_max_age_are_evicted(tmp_path, clock):
+    folder = str(tmp_path / "cache")
+    cache = HttpCache(folder, max_age=3600)
+    cache.store(url(0), b"body", "utf-8", ETAG)
+    cache.store(url(1), b"body", "utf-8", ETAG)
+    clock.now += 3000
+    cache.load(cache.lookup(url(1)))
+    cache.close()
+    
+    clock.now += 1000
+    cache = HttpCache(folder, max_age=3600)
+    try:
+        assert cached_urls(cache) == [1]
+        assert cache.total_bytes == 4
+    finally:
+        cache.close()
+
+
+@pytest.mark.parametrize("use_async", [False, pytest.param(True, marks=pytest.mark.skipif(
+    not async_backend.is_available(), reason="aiohttp is not installed"))])
+def test_unchanged_pages_are_not_downloaded_again(site, tmp_path, use_async):
+    site.pages = {"/": site.page("Start", ["/a", "/b"]), "/a": site.page("A"), "/b": site.page("B")}
+    config = CrawlConfig(site.url("/"), output_folder=str(tmp_path), output_format="jsonl", delay=0,
+                         respect_robots=False, save_checkpoints=False, use_async=use_async)
+    
+    def crawl():
+        result = Crawler(config).run()
+        with open(result.output_file, encoding='utf-8') as f:
+            return sorted((json.loads(line) for line in f), key=lambda record: record["url"])
+    
+    first = crawl()
+    assert sorted(site.paths(200)) == ["/", "/a", "/b"]
+    site.requests.clear()
+    site.pages["/b"] = site.page("B changed")
+    
+    second = crawl()
+    assert sorted(site.paths(304)) == ["/", "/a"]
+    assert site.paths(200) == ["/b"]
+    assert second[:2] == first[:2]
+    assert second[2]["title"] == "B changed"
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from baseline import baseline_page
+from engine import CrawlConfig
+from parsers import available_parsers, default_parser, extract_body
+
+URL = "http://example.com/docs/page.html"
+OPTIONS = {"headings": True, "paragraphs": True, "lists": True, "tables": True, "images": True, "links": True}
+
+# Saved pages; the malformed_* ones have misnested, unclosed or stray tags
+PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+FIXTURES = sorted(name for name in os.listdir(PAGES) if name.endswith(".html"))
+WELL_FORMED = [name for name in FIXTURES if not name.startswith("malformed_")]
+MALFORMED = [name for name in FIXTURES if name.startswith("malformed_")]
+
+# Pages with an XML declaration make bs4 warn that html.parser is not an XML parser
+pytestmark = pytest.mark.filterwarnings("ignore::bs4.XMLParsedAsHTMLWarning")
+
+
+def read_page(name):
+    with open(os.path.join(PAGES, name), 'rb') as f:
+        return f.read()
+
+
+def extract(name, parser):
+    return extract_body(read_page(name), "utf-8", URL, OPTIONS, parser)
+
+
+def tree_independent(page_data, next_urls):
+    # The parts of a record that do not depend on how broken markup is repaired
+    return (page_data["title"], page_data["images"], [href for href, text in page_data["links"]], next_urls)
+
+
+@pytest.mark.parametrize("parser", available_parsers())
+@pytest.mark.parametrize("name", FIXTURES)
+def test_engine_matches_baseline(name, parser):
+    # Each engine gives what the original find_all() code gives on BeautifulSoup's tree
+    # from the same parser, broken markup included
+    soup = BeautifulSoup(read_page(name).decode("utf-8"), parser)
+    assert extract(name, parser) == baseline_page(soup, URL, OPTIONS)
+
+
+@pytest.mark.skipif(len(available_parsers()) < 2, reason="lxml is not installed")
+@pytest.mark.parametrize("name", WELL_FORMED)
+def test_engines_agree_on_well_formed_pages(name):
+    records = [extract(name, parser) for parser in available_parsers()]
+    assert all(record == records[0] for record in records)
+
+
+@pytest.mark.skipif(len(available_parsers()) < 2, reason="lxml is not installed")
+@pytest.mark.parametrize("name", MALFORMED)
+def test_engines_agree_on_links_and_images_of_malformed_pages(name):
+    # libxml2 and html.parser repair broken markup differently, so the text can be grouped
+    # into other paragraphs, headings or rows; the title, links and images are the same
+    records = [tree_independent(*extract(name, parser)) for parser in available_parsers()]
+    assert all(record == records[0] for record in records)
+
+
+def test_html_parser_is_the_default():
+    # lxml can group the text of broken pages differently, so it is only used when chosen
+    assert default_parser() == "html.parser"
+    assert CrawlConfig("http://example.com/").html_parser == "html.parser"
+    assert CrawlConfig("http://example.com/", html_parser="lxml").html_parser == "lxml"
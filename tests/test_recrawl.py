@@ -0,0 +1,185 @@
+import json
+
+import pytest
+
+import async_backend
+from checkpoint import BLOCKED, CrawlCheckpoint, checkpoint_path
+from engine import Crawler, CrawlConfig
+from recrawl import ADDED, CHANGED, REMOVED, UNCHANGED, RecrawlIndex
+
+SETTINGS = [{"headings": True}, "html.parser"]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "recrawl" / "site.sqlite3")
+
+
+def open_index(path, resume=False):
+    index = RecrawlIndex(path, settings=SETTINGS)
+    index.start(resume)
+    return index
+
+
+def record(index, url, body, links=()):
+    return index.record(url, index.fingerprint(body), {"url": url}, list(links))
+
+
+def test_pages_are_added_changed_unchanged_and_removed(index_path):
+    index = open_index(index_path)
+    assert record(index, "http://example.com/a", b"a") == ADDED
+    assert record(index, "http://example.com/b", b"b") == ADDED
+    assert record(index, "http://example.com/c", b"c") == ADDED
+    assert index.remove_missing() == []
+    index.close()
+    
+    index = open_index(index_path)
+    assert record(index, "http://example.com/a", b"a") == UNCHANGED
+    assert record(index, "http://example.com/b", b"b, edited") == CHANGED
+    assert index.remove_missing() == ["http://example.com/c"]
+    assert index.counts == {ADDED: 0, CHANGED: 1, UNCHANGED: 1, REMOVED: 1}
+    index.close()
+
+
+def test_unchanged_page_reuses_the_stored_record(index_path):
+    index = open_index(index_path)
+    record(index, "http://example.com/a", b"a", ["http://example.com/b"])
+    index.close()
+    
+    index = open_index(index_path)
+    fingerprint = index.fingerprint(b"a")
+    assert index.unchanged("http://example.com/a#top", fingerprint)
+    assert index.previous("http://example.com/a") == ({"url": "http://example.com/a"}, ["http://example.com/b"])
+    assert not index.unchanged("http://example.com/a", index.fingerprint(b"a, edited"))
+    index.close()
+
+
+def test_other_settings_change_every_fingerprint(index_path):
+    index = open_index(index_path)
+    other = RecrawlIndex(index_path.replace("site", "other"), settings=[{"headings": False}, "html.parser"])
+    assert index.fingerprint(b"a") != other.fingerprint(b"a")
+    other.close()
+    index.close()
+
+
+def test_failed_page_is_kept_with_its_links(index_path):
+    index = open_index(index_path)
+    record(index, "http://example.com/a", b"a", ["http://example.com/b"])
+    record(index, "http://example.com/b", b"b")
+    index.close()
+    
+    index = open_index(index_path)
+    # /a timed out this time; /b is still reached through the links stored for it
+    assert index.keep("http://example.com/a") == ["http://example.com/b"]
+    record(index, "http://example.com/b", b"b")
+    assert index.remove_missing() == []
+    index.close()
+
+
+def test_page_that_is_gone_is_not_kept(index_path):
+    index = open_index(index_path)
+    record(index, "http://example.com/a", b"a", ["http://example.com/b"])
+    index.close()
+    
+    index = open_index(index_path)
+    index.mark_gone("http://example.com/a")
+    assert index.keep("http://example.com/a") == []
+    assert index.remove_missing() == ["http://example.com/a"]
+    index.close()
+
+
+def test_resumed_crawl_continues_the_same_run(index_path):
+    index = open_index(index_path)
+    record(index, "http://example.com/a", b"a")
+    index.close()
+    
+    index = open_index(index_path)
+    record(index, "http://example.com/a", b"a")
+    index.close()
+    
+    # Stopped after /a; the resumed run must not count /a as missing
+    index = open_index(index_path, resume=True)
+    record(index, "http://example.com/b", b"b")
+    assert index.remove_missing() == []
+    index.close()
+
+
+def counter(crawler, name):
+    histograms, counters = crawler.metrics.copy()
+    return sum(value for (counter_name, host), value in counters.items() if counter_name == name)
+
+
+@pytest.fixture
+def crawl(site, tmp_path):
+    # Crawls the site with incremental recrawl on; returns the crawler and its changes
+    def crawl(respect_robots=False, save_checkpoints=False, use_async=False):
+        config = CrawlConfig(site.url("/"), output_folder=str(tmp_path), output_format="jsonl", delay=0,
+                             max_depth=2, max_retries=0, use_http_cache=False, incremental_recrawl=True,
+                             respect_robots=respect_robots, save_checkpoints=save_checkpoints, use_async=use_async)
+        crawler = Crawler(config)
+        result = crawler.run()
+        assert result.completed
+        if result.changes_file is None:
+            return crawler, {}
+        with open(result.changes_file, encoding='utf-8') as f:
+            changes = [json.loads(line) for line in f]
+        return crawler, {change["url"]: change["change"] for change in changes}
+    return crawl
+
+
+@pytest.fixture
+def pages(site):
+    site.pages = {"/": site.page("Start", ["/a", "/b"]), "/a": site.page("A", ["/c"]), "/b": site.page("B"),
+                  "/c": site.page("C")}
+    return site.pages
+
+
+def test_crawl_reports_changes(site, pages, crawl):
+    crawler, changes = crawl()
+    assert sorted(changes.values()) == [ADDED] * 4
+    
+    pages["/b"] = site.page("B, edited")
+    crawler, changes = crawl()
+    assert changes == {site.url("/b"): CHANGED}
+
+
+def test_page_that_failed_this_run_is_not_removed(site, pages, crawl):
+    crawl()
+    pages["/a"] = 500
+    site.requests.clear()
+    
+    crawler, changes = crawl()
+    assert changes == {}
+    # /c is only linked from /a, and still crawled
+    assert sorted(site.paths(200)) == ["/", "/b", "/c"]
+    assert counter(crawler, "errors") == 1
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_page_that_is_gone_is_removed(site, pages, crawl, status):
+    crawl()
+    pages["/b"] = status
+    crawler, changes = crawl()
+    assert changes == {site.url("/b"): REMOVED}
+
+
+@pytest.mark.parametrize("use_async", [False, pytest.param(True, marks=pytest.mark.skipif(
+    not async_backend.is_available(), reason="aiohttp is not installed"))])
+def test_page_disallowed_by_robots_is_removed_not_failed(site, pages, crawl, tmp_path, use_async):
+    crawl()
+    site.robots = "User-agent: *\nDisallow: /a\n"
+    site.requests.clear()
+    
+    crawler, changes = crawl(respect_robots=True, save_checkpoints=True, use_async=use_async)
+    # /c was only reached through /a
+    assert changes == {site.url("/a"): REMOVED, site.url("/c"): REMOVED}
+    assert "/a" not in site.paths()
+    assert counter(crawler, "blocked") == 1
+    assert counter(crawler, "errors") == 0
+    
+    checkpoint = CrawlCheckpoint(checkpoint_path(str(tmp_path), site.url("/")))
+    try:
+        states = dict(checkpoint.conn.execute("SELECT url, state FROM urls"))
+    finally:
+        checkpoint.close()
+    assert states[site.url("/a")] == BLOCKED
@@ -0,0 +1,115 @@
+import pytest
+
+from retry import CircuitBreaker, HostUnavailable, RetryPolicy
+
+HOST = "example.com"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(threshold=3, cooldown=10, max_trips=3, clock=clock)
+
+
+def trip(breaker):
+    return [breaker.failure(HOST) for _ in range(breaker.threshold)]
+
+
+def test_opens_after_threshold_failures_in_a_row(breaker):
+    assert trip(breaker) == [False, False, True]
+    assert breaker.limit(HOST, 4) == 0
+    with pytest.raises(HostUnavailable) as error:
+        breaker.check(HOST)
+    assert error.value.deferred and error.value.host == HOST
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.failure(HOST)
+    breaker.failure(HOST)
+    breaker.success(HOST)
+    assert breaker.failure(HOST) is False
+    assert breaker.limit(HOST, 4) == 4
+    breaker.check(HOST)
+
+
+def test_other_hosts_are_not_affected(breaker):
+    trip(breaker)
+    assert breaker.limit("other.example", 4) == 4
+    breaker.check("other.example")
+
+
+def test_one_trial_request_after_the_cooldown(breaker, clock):
+    trip(breaker)
+    clock.now += 9.9
+    assert breaker.limit(HOST, 4) == 0
+    clock.now += 0.1
+    assert breaker.limit(HOST, 4) == 1
+    breaker.check(HOST)
+
+
+def test_failures_while_open_do_not_trip_again(breaker, clock):
+    trip(breaker)
+    # Requests that were already running when the circuit opened
+    assert breaker.failure(HOST) is False
+    clock.now += 10
+    assert breaker.limit(HOST, 4) == 1
+
+
+def test_failed_trial_reopens_with_double_cooldown(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    assert breaker.failure(HOST) is True
+    clock.now += 19.9
+    assert breaker.limit(HOST, 4) == 0
+    clock.now += 0.1
+    assert breaker.limit(HOST, 4) == 1
+
+
+def test_successful_trial_closes_the_circuit(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    breaker.success(HOST)
+    assert breaker.limit(HOST, 4) == 4
+    # Back to needing `threshold` failures in a row
+    assert trip(breaker) == [False, False, True]
+
+
+def test_host_is_dead_after_max_trips(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    breaker.failure(HOST)
+    clock.now += 20
+    assert breaker.failure(HOST) is True
+    assert breaker.is_dead(HOST)
+    # Its remaining pages run straight into HostUnavailable instead of waiting
+    assert breaker.limit(HOST, 4) == 4
+    with pytest.raises(HostUnavailable) as error:
+        breaker.check(HOST)
+    assert not error.value.deferred
+    breaker.success(HOST)
+    assert breaker.is_dead(HOST)
+    assert breaker.failure(HOST) is False
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(retries=3, base_delay=0.5, max_delay=2)
+    for attempt in range(6):
+        for _ in range(50):
+            assert 0 <= policy.backoff(attempt) <= min(2, 0.5 * 2 ** attempt)
+
+
+def test_retry_after_wins_when_longer():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2)
+    assert policy.backoff(0, retry_after=30) == 30
@@ -0,0 +1,70 @@
+import glob
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from scheduler import Scheduler, Job
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    # /0 links to /1 .. /3
+    def do_GET(self):
+        page = int(self.path.strip("/") or 0)
+        links = "".join(f'<a href="/{child}">page {child}</a>' for child in range(1, 4) if page == 0)
+        body = f"<html><head><title>Page {page}</title></head><body><p>text {page}</p>{links}</body></html>"
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for_jobs(scheduler, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with scheduler.lock:
+            if not scheduler.running:
+                return
+        time.sleep(0.05)
+    raise AssertionError("scheduled crawls did not finish")
+
+
+def test_jobs_due_together_write_separate_files(site, tmp_path):
+    output_folder = str(tmp_path / "out")
+    settings = {"output_folder": output_folder, "output_format": "jsonl", "delay": 0, "respect_robots": False,
+                "use_http_cache": False, "save_checkpoints": False}
+    scheduler = Scheduler(str(tmp_path / "schedules.json"), max_jobs=2, per_host=2)
+    now = time.time()
+    for name in ("first", "second"):
+        scheduler.add_job(Job(site, settings, kind="interval", every=3600, name=name, next_run=now))
+    
+    try:
+        scheduler.run_pending(now)
+        wait_for_jobs(scheduler)
+    finally:
+        scheduler.stop()
+    
+    outputs = [job.last_output for job in scheduler.list_jobs()]
+    assert all(outputs) and len(set(outputs)) == 2
+    assert sorted(outputs) == sorted(glob.glob(os.path.join(output_folder, "scraped_data_*.jsonl")))
+    for output in outputs:
+        with open(output, encoding='utf-8') as f:
+            assert sorted(json.loads(line)["title"] for line in f) == ["Page 0", "Page 1", "Page 2", "Page 3"]
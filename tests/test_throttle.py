@@ -0,0 +1,132 @@
+import pytest
+
+from throttle import HostThrottle, parse_retry_after
+
+HOST = "example.com"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def interval(throttle):
+    return throttle.bucket(HOST).interval
+
+
+def crawl(throttle, clock, requests, response_time, status_for):
+    # One request at a time; returns the time the crawl took
+    started = clock.now
+    for index in range(requests):
+        clock.now += throttle.reserve(HOST)
+        clock.now += response_time
+        throttle.record(HOST, response_time, status_for(index))
+        throttle.done(HOST)
+    return clock.now - started
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_slow_down_statuses_double_the_interval(clock, status):
+    throttle = HostThrottle(1, clock=clock)
+    throttle.record(HOST, 0.1, status)
+    assert interval(throttle) == 2
+    throttle.record(HOST, 0.1, status)
+    assert interval(throttle) == 4
+
+
+def test_backoff_is_capped(clock):
+    throttle = HostThrottle(1, max_interval=60, clock=clock)
+    for _ in range(10):
+        throttle.record(HOST, 0.1, 503)
+    assert interval(throttle) == 60
+
+
+def test_unthrottled_host_backs_off_from_its_own_pace(clock):
+    # A host getting a request every 5 ms goes to every 10 ms, not to the 0.25 s floor
+    throttle = HostThrottle(0, clock=clock)
+    crawl(throttle, clock, 50, 0.005, lambda index: 200)
+    throttle.record(HOST, 0.005, 503)
+    assert interval(throttle) == pytest.approx(0.01)
+
+
+def test_first_backoff_of_an_unknown_host_uses_the_floor(clock):
+    throttle = HostThrottle(0, backoff_floor=0.25, clock=clock)
+    throttle.record(HOST, 0.1, 503)
+    assert interval(throttle) == 0.25
+
+
+def test_recovery_curve(clock):
+    throttle = HostThrottle(1, clock=clock)
+    throttle.record(HOST, 0.1, 503)
+    throttle.record(HOST, 0.1, 503)
+    curve = []
+    for _ in range(20):
+        throttle.record(HOST, 0.1)
+        curve.append(interval(throttle))
+    # Each healthy response takes 10% off, down to the configured delay and never below it
+    expected = [max(1, 4 * 0.9 ** step) for step in range(1, 21)]
+    assert curve == pytest.approx(expected)
+    assert curve[-1] == 1
+
+
+def test_recovery_stops_at_crawl_delay(clock):
+    throttle = HostThrottle(0, clock=clock)
+    throttle.set_delay(HOST, 2)
+    throttle.record(HOST, 0.1, 503)
+    for _ in range(100):
+        throttle.record(HOST, 0.1)
+    assert interval(throttle) == 2
+
+
+def test_retry_after_blocks_the_host(clock):
+    throttle = HostThrottle(0, clock=clock)
+    throttle.record(HOST, 0.1, 429, retry_after=30)
+    assert throttle.reserve(HOST) == pytest.approx(30)
+    assert throttle.reserve("other.example") == 0
+
+
+def test_sustained_slow_responses_back_off(clock):
+    throttle = HostThrottle(0.1, clock=clock)
+    for _ in range(5):
+        throttle.record(HOST, 0.1)
+    # One slow response is noise
+    throttle.record(HOST, 2.0)
+    assert interval(throttle) == pytest.approx(0.1)
+    for _ in range(5):
+        throttle.record(HOST, 2.0)
+    assert interval(throttle) > 0.1
+
+
+def test_failed_requests_are_left_to_the_circuit_breaker(clock):
+    throttle = HostThrottle(1, clock=clock)
+    throttle.record(HOST, 0, None)
+    assert interval(throttle) == 1
+
+
+def test_occasional_errors_cost_little_throughput(clock):
+    # One response in 20 is a 503; before, every one of them dropped the host to
+    # 4 requests a second and the crawl took many times longer
+    healthy = crawl(HostThrottle(0, clock=clock), clock, 1000, 0.005, lambda index: 200)
+    with_errors = crawl(HostThrottle(0, clock=clock), clock, 1000, 0.005,
+                        lambda index: 503 if index % 20 == 19 else 200)
+    assert with_errors < 1.2 * healthy
+
+
+def test_host_that_keeps_failing_stays_slow(clock):
+    throttle = HostThrottle(0, clock=clock)
+    crawl(throttle, clock, 100, 0.005, lambda index: 200)
+    crawl(throttle, clock, 20, 0.005, lambda index: 503)
+    assert interval(throttle) >= 1
+
+
+@pytest.mark.parametrize("value, expected", [("120", 120), ("-5", 0), ("99999", 600), ("soon", None), (None, None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
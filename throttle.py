@@ -0,0 +1,129 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Statuses that mean the host wants fewer requests
+SLOW_DOWN_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, max_wait=600):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+    return min(max(0, seconds), max_wait)
+
+
+class HostBucket:
+    # Token bucket of one host, kept as the time the next token is due (GCRA)
+    def __init__(self, interval):
+        self.min_interval = interval  # never faster than the configured delay or Crawl-delay
+        self.interval = interval  # current seconds per request, raised while the host struggles
+        self.next_token = 0
+        self.blocked_until = 0
+        self.latency = None  # moving average of response times
+        self.best_latency = None
+        self.pace = None  # moving average of the time between requests actually sent
+        self.last_request = None
+
+
+class HostThrottle:
+    # Per-host request pacing that adapts to each host. A host starts at one request
+    # per `delay` seconds and is slowed down when it answers 429/503, sends Retry-After
+    # or gets much slower than usual, then sped up again while it stays healthy.
+    # Each slow-down halves the rate the host was actually getting, so one 503 from a
+    # fast host costs a little throughput instead of dropping it to a few pages a second.
+    # `clock` is there for tests.
+    def __init__(self, delay, burst=1, max_interval=60, backoff_floor=0.25, clock=time.monotonic):
+        self.delay = max(0, delay)
+        self.burst = max(1, burst)
+        self.max_interval = max_interval
+        self.backoff_floor = backoff_floor  # the most a single slow-down starts from
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.hosts = {}  # host -> HostBucket
+    
+    def bucket(self, host):
+        bucket = self.hosts.get(host)
+        if bucket is None:
+            bucket = HostBucket(self.delay)
+            self.hosts[host] = bucket
+        return bucket
+    
+    def set_delay(self, host, delay):
+        # A host's own delay (robots.txt Crawl-delay) only ever makes the crawl slower
+        with self.lock:
+            bucket = self.bucket(host)
+            bucket.min_interval = max(self.delay, delay)
+            bucket.interval = max(bucket.interval, bucket.min_interval)
+    
+    def reserve(self, host):
+        # Claims the next token for the host and returns how long to wait for it
+        with self.lock:
+            bucket = self.bucket(host)
+            now = self.clock()
+            tolerance = (self.burst - 1) * bucket.interval
+            start = max(now, bucket.next_token - tolerance, bucket.blocked_until)
+            bucket.next_token = max(bucket.next_token, start) + bucket.interval
+            if bucket.last_request is not None:
+                spacing = start - bucket.last_request
+                bucket.pace = spacing if bucket.pace is None else 0.8 * bucket.pace + 0.2 * spacing
+            bucket.last_request = start
+            return start - now
+    
+    def wait(self, host):
+        wait_time = self.reserve(host)
+        if wait_time > 0:
+            time.sleep(wait_time)
+    
+    def done(self, host):
+        # The pause also counts from the end of a request, so slow pages do not pile up
+        with self.lock:
+            bucket = self.bucket(host)
+            if self.burst == 1:
+                bucket.next_token = max(bucket.next_token, self.clock() + bucket.interval)
+    
+    def record(self, host, latency, status=200, retry_after=None):
+        # Feedback from a finished request; status is None when the request failed outright.
+        # Hosts that do not answer at all are left to the circuit breaker (retry.py).
+        if status is None:
+            return
+        
+        with self.lock:
+            bucket = self.bucket(host)
+            now = self.clock()
+            
+            if retry_after:
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+            
+            if status in SLOW_DOWN_STATUSES:
+                self.slow_down(bucket)
+                return
+            
+            bucket.latency = latency if bucket.latency is None else 0.8 * bucket.latency + 0.2 * latency
+            if bucket.best_latency is None or bucket.latency < bucket.best_latency:
+                bucket.best_latency = bucket.latency
+            
+            if bucket.latency > 3 * bucket.best_latency and bucket.latency > 0.5:
+                # Responses got much slower than this host's norm: it is probably overloaded.
+                # Back off once per rise, not on every slow response.
+                self.slow_down(bucket)
+                bucket.best_latency = bucket.latency / 2
+            else:
+                # Healthy again: step back towards the configured rate
+                bucket.interval = max(bucket.min_interval, bucket.interval * 0.9)
+                if bucket.interval - bucket.min_interval < 0.01:
+                    bucket.interval = bucket.min_interval
+    
+    def slow_down(self, bucket):
+        # Halve the rate the host was getting. A host running unthrottled has no interval
+        # to double, so it goes to half its measured pace; the floor caps that, as the pace
+        # also counts idle gaps, and is used before the host has a pace.
+        floor = self.backoff_floor if bucket.pace is None else min(self.backoff_floor, bucket.pace * 2)
+        bucket.interval = min(self.max_interval, max(bucket.interval * 2, floor))
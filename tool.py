@@ -1,23 +1,31 @@
-import requests
-from bs4 import BeautifulSoup
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, filedialog, ttk, Menu
-import textwrap
 import os
 import threading
-from urllib.parse import urljoin, urlparse
 import time
 import json
 import csv
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime
-import random
-from fake_useragent import UserAgent
+from queue import Queue, Empty
+from user_agents import UserAgents, USER_AGENT_FILE
+from parsers import available_parsers, default_parser
+from preview import ResultPages
+from engine import Crawler, CrawlConfig, CrawlListener
+from metrics import PHASES
+from scheduler import Scheduler, Job, WEEKDAYS
+import async_backend
+
+class ScheduledCrawlListener(CrawlListener):
+    # Scheduled crawls run next to the one on screen, so they only add their messages
+    # (not every scraped URL, status or progress) to the log, marked with the job's name
+    def __init__(self, app, job):
+        self.app = app
+        self.name = job.name
+    
+    def log(self, message, tag=None):
+        if tag == "url" or not message.strip():
+            return
+        self.app.log(f"[{self.name}] {message.strip()}\n", tag)
 
 class WebScraperApp:
     def __init__(self, root):
@@ -28,27 +36,60 @@ class WebScraperApp:
         
         # Variables
         self.scraping = False
-        self.stop_scraping = False
         self.output_format = tk.StringVar(value="xlsx")
         self.theme_mode = tk.StringVar(value="dark")
         self.use_selenium = tk.BooleanVar(value=False)
+        self.use_hybrid = tk.BooleanVar(value=False)
+        self.use_async = tk.BooleanVar(value=False)
         self.use_proxy = tk.BooleanVar(value=False)
         self.follow_external = tk.BooleanVar(value=False)
         self.respect_robots = tk.BooleanVar(value=True)
+        self.use_sitemaps = tk.BooleanVar(value=False)
+        self.max_workers = tk.IntVar(value=4)
+        self.per_host_limit = tk.IntVar(value=1)
+        self.async_connections = tk.IntVar(value=500)
+        self.connection_pool_size = tk.IntVar(value=10)
+        self.max_retries = tk.IntVar(value=2)
+        self.connect_timeout = tk.IntVar(value=5)
+        self.read_timeout = tk.IntVar(value=10)
+        self.browser_instances = tk.IntVar(value=2)
+        self.browser_max_pages = tk.IntVar(value=100)
+        self.html_parser = tk.StringVar(value=default_parser())
+        self.parse_processes = tk.IntVar(value=0)
+        self.low_memory_dedupe = tk.BooleanVar(value=False)
+        self.save_checkpoints = tk.BooleanVar(value=True)
+        self.use_http_cache = tk.BooleanVar(value=True)
+        self.http_cache_mb = tk.IntVar(value=500)
+        self.incremental_recrawl = tk.BooleanVar(value=False)
+        self.profile_crawl = tk.BooleanVar(value=False)
+        
+        # Crawl threads never touch Tk widgets; they post here and the main loop applies
+        # the updates in batches (see process_ui_events)
+        self.ui_events = Queue()
+        self.max_log_lines = 5000
+        self.first_line_number = 1
+        self.shown_line_numbers = 0
         
         # Create UI
         self.create_widgets()
         self.create_menu()
+        self.root.after(100, self.process_ui_events)
         
         # Ensure output folder exists
         self.output_folder = os.path.join(os.getcwd(), "scraper_output")
         os.makedirs(self.output_folder, exist_ok=True)
         
-        # Selenium driver (will be initialized when needed)
-        self.driver = None
+        # The crawl engine of the running scrape (see engine.py); the app is its listener
+        self.crawler = None
         
-        # User agent generator
-        self.ua = UserAgent()
+        # Scheduled crawls run in this process while the app is open (see scheduler.py)
+        self.scheduler = Scheduler(os.path.join(self.output_folder, "schedules.json"),
+                                   listener_factory=lambda job: ScheduledCrawlListener(self, job),
+                                   notify=lambda message: self.log(f"[Scheduler] {message}\n", "success"))
+        self.scheduler.start()
+        
+        # User agents rotated between requests (bundled list, or user_agents.txt)
+        self.ua = UserAgents()
         
         # Initialize proxy list
         self.proxies = []
@@ -61,6 +102,8 @@ class WebScraperApp:
         file_menu = Menu(menubar, tearoff=0)
         file_menu.add_command(label="New Scrape", command=self.reset_scraper)
         file_menu.add_command(label="Save As...", command=self.save_as)
+        file_menu.add_command(label="Preview Results...", command=self.open_preview)
+        file_menu.add_command(label="Scheduled Crawls...", command=self.show_scheduled_crawls)
         file_menu.add_command(label="Open Output Folder", command=self.open_output_folder)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
@@ -69,18 +112,37 @@ class WebScraperApp:
         # Settings menu
         settings_menu = Menu(menubar, tearoff=0)
         settings_menu.add_checkbutton(label="Use Selenium (for JS sites)", variable=self.use_selenium)
+        settings_menu.add_checkbutton(label="Hybrid Mode (browser only when needed)", variable=self.use_hybrid)
+        settings_menu.add_checkbutton(label="Use Async Engine (aiohttp)", variable=self.use_async)
         settings_menu.add_checkbutton(label="Use Proxies", variable=self.use_proxy)
         settings_menu.add_checkbutton(label="Follow External Links", variable=self.follow_external)
         settings_menu.add_checkbutton(label="Respect robots.txt", variable=self.respect_robots)
+        settings_menu.add_checkbutton(label="Seed Crawl From Sitemaps", variable=self.use_sitemaps)
+        settings_menu.add_checkbutton(label="Low-Memory URL Tracking (Bloom filter)", variable=self.low_memory_dedupe)
+        settings_menu.add_checkbutton(label="Save Checkpoints (resume crawls)", variable=self.save_checkpoints)
+        settings_menu.add_checkbutton(label="Cache Pages (revalidate on recrawl)", variable=self.use_http_cache)
+        settings_menu.add_checkbutton(label="Incremental Recrawl (report changes)", variable=self.incremental_recrawl)
+        settings_menu.add_checkbutton(label="Profile Crawls (cProfile)", variable=self.profile_crawl)
+        
+        parser_menu = Menu(settings_menu, tearoff=0)
+        parser_labels = {"html.parser": "Standard (html.parser)",
+                         "lxml": "Fast (lxml, text may differ on broken pages)"}
+        for name in available_parsers():
+            parser_menu.add_radiobutton(label=parser_labels[name], variable=self.html_parser, value=name)
+        settings_menu.add_cascade(label="HTML Parser", menu=parser_menu)
+        
         settings_menu.add_separator()
         settings_menu.add_command(label="Configure Proxies...", command=self.configure_proxies)
         settings_menu.add_command(label="Configure User Agents...", command=self.configure_user_agents)
+        settings_menu.add_command(label="Crawl Settings...", command=self.configure_crawling)
         menubar.add_cascade(label="Settings", menu=settings_menu)
         
         # View menu
         view_menu = Menu(menubar, tearoff=0)
         view_menu.add_radiobutton(label="Dark Mode", variable=self.theme_mode, value="dark", command=self.toggle_theme)
         view_menu.add_radiobutton(label="Light Mode", variable=self.theme_mode, value="light", command=self.toggle_theme)
+        view_menu.add_separator()
+        view_menu.add_command(label="Crawl Stats...", command=self.show_crawl_stats)
         menubar.add_cascade(label="View", menu=view_menu)
         
         # Help menu
@@ -142,7 +204,7 @@ class WebScraperApp:
         tk.Label(options_frame, text="Format:", font=("Arial", 10), 
                 fg="#ECF0F1", bg="#2C3E50").pack(side=tk.LEFT, padx=(20,5))
         
-        formats = [("Excel", "xlsx"), ("JSON", "json"), ("CSV", "csv"), ("Text", "txt")]
+        formats = [("Excel", "xlsx"), ("JSON", "json"), ("JSON Lines", "jsonl"), ("CSV", "csv"), ("Text", "txt")]
         for text, value in formats:
             tk.Radiobutton(options_frame, text=text, variable=self.output_format, 
                          value=value, bg="#2C3E50", fg="#ECF0F1", selectcolor="#34495E").pack(side=tk.LEFT, padx=2)
@@ -218,14 +280,105 @@ class WebScraperApp:
         self.update_line_numbers()
     
     def update_line_numbers(self, event=None):
-        self.line_numbers.config(state='normal')
-        self.line_numbers.delete(1.0, tk.END)
+        # Only the lines added or removed since the last call are numbered or dropped
+        line_count = int(self.text_area.index('end-1c').split('.')[0])
+        shown = self.shown_line_numbers
+        
+        if line_count != shown:
+            self.line_numbers.config(state='normal')
+            if line_count > shown:
+                first = self.first_line_number + shown
+                numbers = "\n".join(str(i) for i in range(first, self.first_line_number + line_count))
+                self.line_numbers.insert(tk.END, "\n" + numbers if shown else numbers)
+            else:
+                self.line_numbers.delete(f"{line_count}.end", tk.END)
+            self.line_numbers.config(state='disabled')
+            self.shown_line_numbers = line_count
         
-        line_count = self.text_area.get('1.0', tk.END).count('\n')
-        line_numbers_string = "\n".join(str(i) for i in range(1, line_count + 1))
+        self.line_numbers.yview_moveto(self.text_area.yview()[0])
+    
+    def clear_log(self):
+        self.text_area.delete('1.0', tk.END)
+        self.line_numbers.config(state='normal')
+        self.line_numbers.delete('1.0', tk.END)
+        self.line_numbers.config(state='disabled')
+        self.first_line_number = 1
+        self.shown_line_numbers = 0
+        self.update_line_numbers()
+    
+    def trim_log(self):
+        # The log keeps only its newest lines, so a long crawl cannot grow the widget forever
+        line_count = int(self.text_area.index('end-1c').split('.')[0])
+        excess = line_count - self.max_log_lines
+        if excess <= 0:
+            return
         
-        self.line_numbers.insert(1.0, line_numbers_string)
+        self.text_area.delete('1.0', f"{excess + 1}.0")
+        # The gutter can be behind the text (it is numbered after the insert), so it loses
+        # at most the lines it has, and its count is read back from the widget
+        self.line_numbers.config(state='normal')
+        self.line_numbers.delete('1.0', f"{min(excess, self.gutter_line_count()) + 1}.0")
         self.line_numbers.config(state='disabled')
+        self.first_line_number += excess
+        self.shown_line_numbers = self.gutter_line_count()
+    
+    def gutter_line_count(self):
+        # An empty Text widget still reports line 1
+        if self.line_numbers.compare('end-1c', '==', '1.0'):
+            return 0
+        return int(self.line_numbers.index('end-1c').split('.')[0])
+    
+    def log(self, message, tag=None):
+        self.ui_events.put(("log", message, tag))
+    
+    def post(self, callback, *args):
+        # Runs callback(*args) on the Tk main loop
+        self.ui_events.put(("call", callback, args))
+    
+    def process_ui_events(self, max_events=5000):
+        # Applies everything posted since the last run in one go: consecutive log lines
+        # become a single insert, and only the latest status and progress are shown
+        log_args = []
+        status = None
+        progress = None
+        handled = 0
+        started = time.perf_counter()
+        
+        try:
+            for _ in range(max_events):
+                try:
+                    event = self.ui_events.get_nowait()
+                except Empty:
+                    break
+                handled += 1
+                
+                kind = event[0]
+                if kind == "log":
+                    log_args.extend((event[1], event[2] or ()))
+                elif kind == "status":
+                    status = event[1]
+                elif kind == "progress":
+                    progress = event[1]
+                else:
+                    # Calls run in order, after the log lines posted before them
+                    if log_args:
+                        self.text_area.insert(tk.END, *log_args)
+                        log_args = []
+                    event[1](*event[2])
+            
+            if log_args:
+                self.text_area.insert(tk.END, *log_args)
+                self.trim_log()
+                self.text_area.see(tk.END)
+                self.update_line_numbers()
+            if status is not None:
+                self.status_label.config(text=status)
+            if progress is not None:
+                self.progress['value'] = progress
+        finally:
+            if handled and self.crawler is not None:
+                self.crawler.metrics.observe("ui", time.perf_counter() - started)
+            self.root.after(100, self.process_ui_events)
     
     def toggle_theme(self):
         if self.theme_mode.get() == "dark":
@@ -279,93 +432,56 @@ class WebScraperApp:
         tk.Button(button_frame, text="Cancel", command=proxy_window.destroy).pack(side=tk.RIGHT, padx=5)
     
     def configure_user_agents(self):
-        messagebox.showinfo("User Agents", "User agents are automatically rotated using the fake-useragent library.")
-    
-    def get_random_proxy(self):
-        if not self.proxies:
-            return None
-        return random.choice(self.proxies)
-    
-    def get_random_user_agent(self):
-        return self.ua.random
-    
-    def init_selenium_driver(self):
-        if self.driver is not None:
-            return
-        
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        
-        if self.use_proxy.get() and self.proxies:
-            proxy = self.get_random_proxy()
-            options.add_argument(f'--proxy-server={proxy}')
-        
-        user_agent = self.get_random_user_agent()
-        options.add_argument(f'user-agent={user_agent}')
-        
-        self.driver = webdriver.Chrome(options=options)
+        messagebox.showinfo("User Agents", f"User agents are rotated from a built-in list of {len(self.ua.agents)} "
+                            f"common browsers.\n\nTo use your own, put them in {USER_AGENT_FILE}, one per line, "
+                            "and restart the app.")
     
-    def close_selenium_driver(self):
-        if self.driver is not None:
-            self.driver.quit()
-            self.driver = None
-    
-    def scrape_with_selenium(self, url):
-        try:
-            self.init_selenium_driver()
-            self.driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Get the page source after JavaScript execution
-            page_source = self.driver.page_source
-            return BeautifulSoup(page_source, 'html.parser')
+    def configure_crawling(self):
+        crawl_window = tk.Toplevel(self.root)
+        crawl_window.title("Crawl Settings")
+        crawl_window.geometry("400x300")
+        
+        form_frame = tk.Frame(crawl_window)
+        form_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # (label, setting, minimum, maximum, increment)
+        fields = [
+            ("Concurrent workers:", self.max_workers, 1, 64, 1),
+            ("Max requests per host:", self.per_host_limit, 1, 16, 1),
+            ("Async engine connections:", self.async_connections, 10, 5000, 10),
+            ("Keep-alive connections per host:", self.connection_pool_size, 1, 100, 1),
+            ("Retries per page:", self.max_retries, 0, 10, 1),
+            ("Connect timeout (s):", self.connect_timeout, 1, 60, 1),
+            ("Read timeout (s):", self.read_timeout, 1, 300, 1),
+            ("Browsers (Selenium mode):", self.browser_instances, 1, 16, 1),
+            ("Pages per browser before restart:", self.browser_max_pages, 10, 10000, 10),
+            ("Parser processes (0 = off):", self.parse_processes, 0, 64, 1),
+            ("Page cache size (MB):", self.http_cache_mb, 10, 100000, 50),
+        ]
         
-        except Exception as e:
-            self.text_area.insert(tk.END, f"Error with Selenium: {str(e)}\n", "error")
-            return None
-    
-    def scrape_with_requests(self, url):
-        headers = {
-            'User-Agent': self.get_random_user_agent()
-        }
-        
-        proxies = None
-        if self.use_proxy.get() and self.proxies:
-            proxy = self.get_random_proxy()
-            proxies = {
-                'http': proxy,
-                'https': proxy
-            }
+        # Edit copies so that Cancel leaves the settings untouched
+        edits = []
+        for row, (label, variable, low, high, step) in enumerate(fields):
+            tk.Label(form_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=5)
+            value = tk.StringVar(value=str(variable.get()))
+            tk.Spinbox(form_frame, from_=low, to=high, increment=step, textvariable=value, 
+                     width=6).grid(row=row, column=1, sticky=tk.W, padx=10)
+            edits.append((variable, value))
         
-        try:
-            response = requests.get(url, headers=headers, proxies=proxies, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
+        button_frame = tk.Frame(crawl_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        except requests.exceptions.RequestException as e:
-            self.text_area.insert(tk.END, f"Error scraping {url}: {str(e)}\n", "error")
-            return None
-    
-    def scrape_page(self, url):
-        if self.use_selenium.get():
-            return self.scrape_with_selenium(url)
-        else:
-            return self.scrape_with_requests(url)
-    
-    def is_same_domain(self, url1, url2):
-        try:
-            domain1 = urlparse(url1).netloc
-            domain2 = urlparse(url2).netloc
-            return domain1 == domain2
-        except:
-            return False
+        def save_settings():
+            try:
+                for variable, value in edits:
+                    variable.set(type(variable.get())(value.get()))
+            except ValueError:
+                messagebox.showerror("Error", "Please enter numeric values")
+                return
+            crawl_window.destroy()
+        
+        tk.Button(button_frame, text="Save", command=save_settings).pack(side=tk.RIGHT)
+        tk.Button(button_frame, text="Cancel", command=crawl_window.destroy).pack(side=tk.RIGHT, padx=5)
     
     def toggle_scraping(self):
         if self.scraping:
@@ -379,38 +495,104 @@ class WebScraperApp:
             messagebox.showerror("Error", "Please enter a valid URL")
             return
         
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        if self.use_async.get() and not self.use_selenium.get() and not async_backend.is_available():
+            messagebox.showerror("Error", "The async engine needs the aiohttp package.\nInstall it with: pip install aiohttp")
+            return
+        
+        self.crawler = Crawler(self.crawl_config(url), listener=self, ua=self.ua)
+        
+        # Offer to continue a crawl of the same URL that did not finish
+        resume = False
+        saved = self.crawler.saved_crawl()
+        if saved:
+            resume = messagebox.askyesno("Resume Crawl", f"An unfinished crawl of {self.crawler.config.start_url} was found "
+                                         f"({saved['pages']} pages scraped, {saved['queued']} queued).\n\n"
+                                         "Resume where it stopped?")
         
         self.scraping = True
-        self.stop_scraping = False
         self.scrape_button.config(text="Stop Scraping", bg="#E74C3C")
         self.stop_button.config(state=tk.NORMAL)
-        self.text_area.delete('1.0', tk.END)
+        self.clear_log()
         self.update_status("Starting scraping process...")
         
         # Start scraping in a separate thread
-        threading.Thread(target=self.scrape_website, args=(url,), daemon=True).start()
+        threading.Thread(target=self.scrape_website, args=(self.crawler, resume), daemon=True).start()
     
     def stop_scraping_process(self):
-        self.stop_scraping = True
+        if self.crawler is not None:
+            # Browsers are closed by the crawl once its workers have let go of them
+            self.crawler.stop()
         self.update_status("Stopping scraping process...")
-        self.close_selenium_driver()
+    
+    def crawl_config(self, url):
+        # The current settings as an engine configuration
+        return CrawlConfig(
+            url,
+            output_folder=self.output_folder,
+            output_format=self.output_format.get(),
+            max_depth=self.depth_var.get(),
+            delay=self.delay_var.get(),
+            headings=self.scrape_headings.get(),
+            paragraphs=self.scrape_paragraphs.get(),
+            lists=self.scrape_lists.get(),
+            tables=self.scrape_tables.get(),
+            images=self.scrape_images.get(),
+            links=self.scrape_links.get(),
+            use_selenium=self.use_selenium.get(),
+            use_hybrid=self.use_hybrid.get(),
+            use_async=self.use_async.get(),
+            use_proxy=self.use_proxy.get(),
+            proxies=list(self.proxies),
+            follow_external=self.follow_external.get(),
+            respect_robots=self.respect_robots.get(),
+            use_sitemaps=self.use_sitemaps.get(),
+            max_workers=self.max_workers.get(),
+            per_host_limit=self.per_host_limit.get(),
+            async_connections=self.async_connections.get(),
+            connection_pool_size=self.connection_pool_size.get(),
+            max_retries=self.max_retries.get(),
+            connect_timeout=self.connect_timeout.get(),
+            read_timeout=self.read_timeout.get(),
+            browser_instances=self.browser_instances.get(),
+            browser_max_pages=self.browser_max_pages.get(),
+            html_parser=self.html_parser.get(),
+            parse_processes=self.parse_processes.get(),
+            low_memory_dedupe=self.low_memory_dedupe.get(),
+            save_checkpoints=self.save_checkpoints.get(),
+            use_http_cache=self.use_http_cache.get(),
+            http_cache_mb=self.http_cache_mb.get(),
+            incremental_recrawl=self.incremental_recrawl.get(),
+            profile_file=(os.path.join(self.output_folder, f"profile_{datetime.now():%Y%m%d_%H%M%S}.prof")
+                          if self.profile_crawl.get() else None),
+        )
+    
+    def scrape_website(self, crawler, resume=False):
+        # Runs on the crawl thread; the engine reports back through log/update_status/update_progress
+        try:
+            crawler.run(resume)
+        finally:
+            self.scraping = False
+            self.post(self.scrape_button.config, {"text": "Start Scraping", "bg": "#27AE60"})
+            self.post(self.stop_button.config, {"state": tk.DISABLED})
+            self.update_progress(0)
+    
+    def crawl_finished(self, result):
+        if result.completed:
+            self.post(messagebox.showinfo, "Success", f"Data saved to {result.output_file}")
+            self.post(self.show_preview, result.output_file, result.pages)
     
     def reset_scraper(self):
         self.stop_scraping_process()
         self.url_entry.delete(0, tk.END)
-        self.text_area.delete('1.0', tk.END)
+        self.clear_log()
         self.update_status("Ready")
         self.update_progress(0)
     
     def update_status(self, message):
-        self.status_label.config(text=message)
-        self.root.update_idletasks()
+        self.ui_events.put(("status", message))
     
     def update_progress(self, value):
-        self.progress['value'] = value
-        self.root.update_idletasks()
+        self.ui_events.put(("progress", value))
     
     def save_as(self):
         file_types = [
@@ -434,6 +616,9 @@ class WebScraperApp:
                 ext = os.path.splitext(file_path)[1].lower()
                 
                 if ext == '.xlsx':
+                    # pandas is only needed here and is slow to import, so it is loaded on first use
+                    import pandas as pd
+                    
                     # Try to parse as structured data first
                     try:
                         data = []
@@ -484,6 +669,73 @@ class WebScraperApp:
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save file: {e}")
     
+    def open_preview(self):
+        file_path = filedialog.askopenfilename(
+            initialdir=self.output_folder,
+            title="Preview Results",
+            filetypes=[
+                ("Scraped data", "*.xlsx *.json *.jsonl *.csv *.txt"),
+                ("All files", "*.*")
+            ]
+        )
+        if file_path:
+            self.show_preview(file_path)
+    
+    def show_preview(self, file_path, total=None):
+        # Shows a result file one screen of pages at a time, however large it is
+        results = ResultPages(file_path, total)
+        
+        preview_window = tk.Toplevel(self.root)
+        preview_window.title(f"Preview - {os.path.basename(file_path)}")
+        preview_window.geometry("800x600")
+        
+        nav_frame = tk.Frame(preview_window)
+        nav_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+        
+        text_area = scrolledtext.ScrolledText(preview_window, font=("Consolas", 10), wrap=tk.WORD)
+        text_area.pack(fill=tk.BOTH, expand=True)
+        
+        prev_button = tk.Button(nav_frame, text="< Previous", width=12)
+        prev_button.pack(side=tk.LEFT, padx=10)
+        page_label = tk.Label(nav_frame, text="")
+        page_label.pack(side=tk.LEFT, expand=True)
+        next_button = tk.Button(nav_frame, text="Next >", width=12)
+        next_button.pack(side=tk.RIGHT, padx=10)
+        
+        position = [0]
+        
+        def show(start):
+            try:
+                screen = results.read(start)
+            except Exception as e:
+                screen = []
+                messagebox.showerror("Error", f"Failed to read {file_path}: {e}", parent=preview_window)
+            if not screen and start > 0:
+                # Ran past the last page; stay on the current screen
+                next_button.config(state=tk.DISABLED)
+                return
+            
+            position[0] = start
+            text_area.config(state=tk.NORMAL)
+            text_area.delete('1.0', tk.END)
+            text_area.insert(tk.END, "".join(screen) if screen else "No pages found in this file")
+            text_area.config(state=tk.DISABLED)
+            
+            total_text = f" of {results.total}" if results.total is not None else ""
+            page_label.config(text=f"Pages {start + 1}-{start + len(screen)}{total_text}" if screen else "")
+            prev_button.config(state=tk.NORMAL if start > 0 else tk.DISABLED)
+            more = results.total is None or start + len(screen) < results.total
+            next_button.config(state=tk.NORMAL if more else tk.DISABLED)
+        
+        def close():
+            results.close()
+            preview_window.destroy()
+        
+        prev_button.config(command=lambda: show(position[0] - results.page_size))
+        next_button.config(command=lambda: show(position[0] + results.page_size))
+        preview_window.protocol("WM_DELETE_WINDOW", close)
+        show(0)
+    
     def open_output_folder(self):
         try:
             os.startfile(self.output_folder)
@@ -493,7 +745,7 @@ class WebScraperApp:
     def schedule_scraping(self):
         schedule_window = tk.Toplevel(self.root)
         schedule_window.title("Schedule Scraping")
-        schedule_window.geometry("400x300")
+        schedule_window.geometry("400x360")
         
         tk.Label(schedule_window, text="Schedule Options", font=("Arial", 12, "bold")).pack(pady=10)
         
@@ -503,7 +755,20 @@ class WebScraperApp:
         self.schedule_type = tk.StringVar(value="once")
         tk.Radiobutton(schedule_window, text="Once", variable=self.schedule_type, value="once").pack(anchor=tk.W, padx=40)
         tk.Radiobutton(schedule_window, text="Daily", variable=self.schedule_type, value="daily").pack(anchor=tk.W, padx=40)
-        tk.Radiobutton(schedule_window, text="Weekly", variable=self.schedule_type, value="weekly").pack(anchor=tk.W, padx=40)
+        
+        weekly_frame = tk.Frame(schedule_window)
+        weekly_frame.pack(anchor=tk.W, padx=40)
+        tk.Radiobutton(weekly_frame, text="Weekly on", variable=self.schedule_type, value="weekly").pack(side=tk.LEFT)
+        self.schedule_weekday = tk.StringVar(value=WEEKDAYS[0].capitalize())
+        ttk.Combobox(weekly_frame, textvariable=self.schedule_weekday, values=[day.capitalize() for day in WEEKDAYS],
+                     width=5, state="readonly").pack(side=tk.LEFT)
+        
+        interval_frame = tk.Frame(schedule_window)
+        interval_frame.pack(anchor=tk.W, padx=40)
+        tk.Radiobutton(interval_frame, text="Every", variable=self.schedule_type, value="interval").pack(side=tk.LEFT)
+        self.schedule_every = tk.IntVar(value=6)
+        tk.Spinbox(interval_frame, from_=1, to=168, textvariable=self.schedule_every, width=4).pack(side=tk.LEFT)
+        tk.Label(interval_frame, text="hours").pack(side=tk.LEFT)
         
         # Time selection
         tk.Label(schedule_window, text="At:").pack(anchor=tk.W, padx=20)
@@ -526,302 +791,111 @@ class WebScraperApp:
         tk.Button(button_frame, text="Cancel", command=schedule_window.destroy).pack(side=tk.LEFT)
     
     def confirm_schedule(self, window):
-        schedule_type = self.schedule_type.get()
-        time_str = f"{self.schedule_hour.get():02d}:{self.schedule_minute.get():02d}"
+        url = self.url_entry.get().strip()
+        if not url:
+            messagebox.showerror("Error", "Please enter the URL to scrape first", parent=window)
+            return
         
-        message = f"Scraping scheduled to run {schedule_type} at {time_str}"
+        # The job keeps the current settings, so later changes do not affect it
+        try:
+            schedule_type = self.schedule_type.get()
+            time_str = f"{self.schedule_hour.get():02d}:{self.schedule_minute.get():02d}"
+            settings = self.crawl_config(url).settings()
+            if schedule_type == "interval":
+                job = Job(url, settings, kind="interval", every=max(1, self.schedule_every.get()) * 3600)
+            else:
+                weekday = WEEKDAYS.index(self.schedule_weekday.get().lower())
+                job = Job(url, settings, kind=schedule_type, at=time_str, weekday=weekday)
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", f"Invalid schedule: {e}", parent=window)
+            return
+        
+        self.scheduler.add_job(job)
+        next_run = datetime.fromtimestamp(job.next_run).strftime("%Y-%m-%d %H:%M")
+        message = f"Scraping of {job.name} scheduled. Next run: {next_run}\n\nScheduled crawls run while the app is open."
         messagebox.showinfo("Scheduled", message)
         window.destroy()
     
-    def categorize_text(self, text):
-        length = len(text.split())
-        if length < 50:
-            return "(Short)"
-        elif length < 200:
-            return "(Medium)"
-        else:
-            return "(Long)"
-    
-    def extract_images(self, soup, base_url):
-        images = []
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
-            if src:
-                if not src.startswith(('http://', 'https://')):
-                    src = urljoin(base_url, src)
-                images.append((src, img.get('alt', '')))
-        return images
-    
-    def extract_links(self, soup, base_url):
-        links = []
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if href:
-                if not href.startswith(('http://', 'https://')):
-                    href = urljoin(base_url, href)
-                links.append((href, a.get_text(strip=True)))
-        return links
-    
-    def scrape_website(self, start_url):
-        try:
-            visited_urls = set()
-            to_visit = [(start_url, 0)]  # (url, depth)
-            all_data = []
-            
-            max_depth = self.depth_var.get()
-            delay = self.delay_var.get()
-            total_pages = 0
-            processed_pages = 0
-            
-            # First pass to count pages (for progress bar)
-            if not self.stop_scraping:
-                self.update_status("Counting pages to scrape...")
-                temp_visited = set()
-                temp_queue = [(start_url, 0)]
-                while temp_queue and not self.stop_scraping:
-                    current_url, depth = temp_queue.pop(0)
-                    if current_url in temp_visited or depth > max_depth:
-                        continue
-                    temp_visited.add(current_url)
-                    total_pages += 1
-                    
-                    try:
-                        soup = self.scrape_page(current_url)
-                        if soup is None:
-                            continue
-                        
-                        for link in soup.find_all('a', href=True):
-                            next_url = urljoin(current_url, link['href'])
-                            if (self.follow_external.get() or self.is_same_domain(start_url, next_url)) and next_url not in temp_visited and depth < max_depth:
-                                temp_queue.append((next_url, depth + 1))
-                    except:
-                        continue
-            
-            if total_pages == 0:
-                total_pages = 1  # Prevent division by zero
-            
-            # Actual scraping
-            while to_visit and not self.stop_scraping:
-                current_url, depth = to_visit.pop(0)
-                
-                if current_url in visited_urls or depth > max_depth:
-                    continue
-                
-                self.update_status(f"Scraping: {current_url} (Depth: {depth})")
-                self.update_progress((processed_pages / total_pages) * 100)
-                
-                try:
-                    soup = self.scrape_page(current_url)
-                    if soup is None:
-                        continue
-                    
-                    page_data = {
-                        "url": current_url,
-                        "title": soup.title.string if soup.title else "",
-                        "headings": [],
-                        "paragraphs": [],
-                        "lists": [],
-                        "tables": [],
-                        "images": [],
-                        "links": []
-                    }
-                    
-                    # Extract requested content
-                    if self.scrape_headings.get():
-                        headings = [(h.name, h.get_text(strip=True), self.categorize_text(h.get_text(strip=True))) 
-                                  for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']) if h.get_text(strip=True)]
-                        page_data["headings"] = headings
-                    
-                    if self.scrape_paragraphs.get():
-                        paragraphs = [(p.get_text(strip=True), self.categorize_text(p.get_text(strip=True))) 
-                                    for p in soup.find_all('p') if p.get_text(strip=True)]
-                        page_data["paragraphs"] = paragraphs
-                    
-                    if self.scrape_lists.get():
-                        lists = [(li.get_text(strip=True), self.categorize_text(li.get_text(strip=True))) 
-                               for li in soup.find_all('li') if li.get_text(strip=True)]
-                        page_data["lists"] = lists
-                    
-                    if self.scrape_tables.get():
-                        tables = []
-                        for table in soup.find_all('table'):
-                            rows = table.find_all('tr')
-                            for row in rows:
-                                cells = row.find_all(['td', 'th'])
-                                row_text = " | ".join(cell.get_text(strip=True) for cell in cells)
-                                tables.append((row_text, self.categorize_text(row_text)))
-                        page_data["tables"] = tables
-                    
-                    if self.scrape_images.get():
-                        page_data["images"] = self.extract_images(soup, current_url)
-                    
-                    if self.scrape_links.get():
-                        page_data["links"] = self.extract_links(soup, current_url)
-                    
-                    all_data.append(page_data)
-                    visited_urls.add(current_url)
-                    processed_pages += 1
-                    
-                    # Display progress in text area
-                    self.text_area.insert(tk.END, f"Scraped: {current_url}\n", "url")
-                    self.text_area.see(tk.END)
-                    
-                    # Find and queue additional links
-                    for link in soup.find_all('a', href=True):
-                        next_url = urljoin(current_url, link['href'])
-                        if (self.follow_external.get() or self.is_same_domain(start_url, next_url)) and next_url not in visited_urls and depth < max_depth:
-                            to_visit.append((next_url, depth + 1))
-                    
-                    # Be polite to the server
-                    time.sleep(delay)
-                
-                except Exception as e:
-                    self.text_area.insert(tk.END, f"Error scraping {current_url}: {str(e)}\n", "error")
-                    continue
-            
-            # Save results
-            if not self.stop_scraping and all_data:
-                output_format = self.output_format.get()
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = os.path.join(self.output_folder, f"scraped_data_{timestamp}.{output_format}")
-                
-                try:
-                    if output_format == "json":
-                        with open(output_file, 'w', encoding='utf-8') as f:
-                            json.dump(all_data, f, indent=2, ensure_ascii=False)
-                    elif output_format == "csv":
-                        # Flatten data for CSV
-                        csv_data = []
-                        for page in all_data:
-                            for section in ['headings', 'paragraphs', 'lists', 'tables', 'images', 'links']:
-                                for item in page[section]:
-                                    row = {
-                                        'url': page['url'],
-                                        'type': section[:-1],  # Remove 's' (headings -> heading)
-                                        'content': item[0],
-                                        'category': item[1] if len(item) > 1 else ''
-                                    }
-                                    if section == 'images' and len(item) > 1:
-                                        row['alt_text'] = item[1]
-                                    csv_data.append(row)
-                        
-                        with open(output_file, 'w', encoding='utf-8', newline='') as f:
-                            writer = csv.DictWriter(f, fieldnames=['url', 'type', 'content', 'category', 'alt_text'])
-                            writer.writeheader()
-                            writer.writerows(csv_data)
-                    elif output_format == "xlsx":
-                        # Create a pandas Excel writer
-                        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                            # Create separate sheets for each content type
-                            for content_type in ['headings', 'paragraphs', 'lists', 'tables', 'images', 'links']:
-                                data = []
-                                for page in all_data:
-                                    for item in page[content_type]:
-                                        row = {
-                                            'URL': page['url'],
-                                            'Content': item[0],
-                                            'Category': item[1] if len(item) > 1 else ''
-                                        }
-                                        if content_type == 'images' and len(item) > 1:
-                                            row['Alt Text'] = item[1]
-                                        data.append(row)
-                                
-                                if data:  # Only create sheet if there's data
-                                    df = pd.DataFrame(data)
-                                    df.to_excel(writer, sheet_name=content_type.capitalize(), index=False)
-                            
-                            # Create a summary sheet
-                            summary_data = []
-                            for page in all_data:
-                                summary_data.append({
-                                    'URL': page['url'],
-                                    'Title': page['title'],
-                                    'Headings': len(page['headings']),
-                                    'Paragraphs': len(page['paragraphs']),
-                                    'List Items': len(page['lists']),
-                                    'Tables': len(page['tables']),
-                                    'Images': len(page['images']),
-                                    'Links': len(page['links']),
-                                })
-                            
-                            df = pd.DataFrame(summary_data)
-                            df.to_excel(writer, sheet_name='Summary', index=False)
-                    else:  # txt
-                        with open(output_file, 'w', encoding='utf-8') as f:
-                            for page in all_data:
-                                f.write(f"URL: {page['url']}\n")
-                                f.write(f"Title: {page['title']}\n\n")
-                                
-                                if page['headings']:
-                                    f.write("=== Headings ===\n")
-                                    for tag, text, category in page['headings']:
-                                        f.write(f"{tag.upper()}: {text} {category}\n")
-                                    f.write("\n")
-                                
-                                if page['paragraphs']:
-                                    f.write("=== Paragraphs ===\n")
-                                    for text, category in page['paragraphs']:
-                                        f.write(f"{textwrap.fill(text, width=80)} {category}\n")
-                                    f.write("\n")
-                                
-                                if page['lists']:
-                                    f.write("=== Lists ===\n")
-                                    for text, category in page['lists']:
-                                        f.write(f"- {text} {category}\n")
-                                    f.write("\n")
-                                
-                                if page['tables']:
-                                    f.write("=== Table Data ===\n")
-                                    for text, category in page['tables']:
-                                        f.write(f"{text} {category}\n")
-                                    f.write("\n")
-                                
-                                if page['images']:
-                                    f.write("=== Images ===\n")
-                                    for src, alt in page['images']:
-                                        f.write(f"SRC: {src}\nALT: {alt}\n\n")
-                                
-                                if page['links']:
-                                    f.write("=== Links ===\n")
-                                    for href, text in page['links']:
-                                        f.write(f"LINK: {href}\nTEXT: {text}\n\n")
-                                
-                                f.write("="*80 + "\n\n")
-                    
-                    # Display results in text area
-                    self.text_area.insert(tk.END, "\nScraping completed!\n\n", "success")
-                    self.text_area.insert(tk.END, f"Pages scraped: {len(all_data)}\n")
-                    self.text_area.insert(tk.END, f"Data saved to:\n{output_file}\n\n", "success")
-                    
-                    with open(output_file, 'r', encoding='utf-8') as f:
-                        self.text_area.insert(tk.END, f.read())
-                    
-                    self.update_status(f"Scraping completed. Data saved to {output_file}")
-                    messagebox.showinfo("Success", f"Data saved to {output_file}")
-                
-                except Exception as e:
-                    self.text_area.insert(tk.END, f"\nError saving results: {str(e)}\n", "error")
-                    self.update_status(f"Error saving results: {str(e)}")
-            
-            elif self.stop_scraping:
-                self.text_area.insert(tk.END, "\nScraping stopped by user\n", "error")
-                self.update_status("Scraping stopped by user")
+    def show_scheduled_crawls(self):
+        jobs_window = tk.Toplevel(self.root)
+        jobs_window.title("Scheduled Crawls")
+        jobs_window.geometry("700x300")
+        
+        job_list = tk.Listbox(jobs_window, font=("Consolas", 10))
+        job_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        jobs = []
+        
+        def refresh():
+            jobs[:] = self.scheduler.list_jobs()
+            job_list.delete(0, tk.END)
+            for job in jobs:
+                job_list.insert(tk.END, job.describe() + ("" if job.enabled else "  (done)"))
+        
+        def remove():
+            for index in job_list.curselection():
+                self.scheduler.remove_job(jobs[index].id)
+            refresh()
+        
+        button_frame = tk.Frame(jobs_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Close", command=jobs_window.destroy).pack(side=tk.RIGHT)
+        tk.Button(button_frame, text="Refresh", command=refresh).pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text="Remove", command=remove).pack(side=tk.RIGHT)
+        refresh()
+    
+    def show_crawl_stats(self):
+        stats_window = tk.Toplevel(self.root)
+        stats_window.title("Crawl Stats")
+        stats_window.geometry("820x520")
+        
+        stats_text = tk.Text(stats_window, font=("Consolas", 10), wrap=tk.NONE)
+        stats_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def render(metrics):
+            phases = metrics.phase_summary()
+            total = sum(histogram.sum for histogram in phases.values()) or 1
+            lines = ["Time per phase (all threads added up; p50/p99 are estimates)", "",
+                     f"{'Phase':10} {'Count':>8} {'Total s':>9} {'Share':>6} {'Mean ms':>9} {'p50 ms':>8} {'p99 ms':>8}"]
+            for phase, histogram in phases.items():
+                lines.append(f"{phase:10} {histogram.count:>8} {histogram.sum:>9.1f} {histogram.sum / total:>6.0%} "
+                             f"{histogram.sum / histogram.count * 1000:>9.1f} {histogram.quantile(0.5) * 1000:>8.1f} "
+                             f"{histogram.quantile(0.99) * 1000:>8.1f}")
+            lines += [""] + [f"  {phase}: {description}" for phase, description in PHASES.items() if phase in phases]
             
+            hosts = metrics.host_summary()
+            lines += ["", f"{'Host':36} {'Pages':>7} {'Errors':>7} {'MB':>8} {'Fetch p50':>10} {'Fetch p99':>10}"]
+            for host, row in sorted(hosts.items(), key=lambda item: -item[1]["pages"])[:20]:
+                lines.append(f"{host[:36]:36} {row['pages']:>7} {row['errors']:>7} {row['bytes'] / 1024 / 1024:>8.1f} "
+                             f"{row['fetch'].quantile(0.5) * 1000:>8.0f}ms {row['fetch'].quantile(0.99) * 1000:>8.0f}ms")
+            return "\n".join(lines)
+        
+        def refresh():
+            if not stats_window.winfo_exists():
+                return
+            if self.crawler is None:
+                text = "No crawl has run yet"
             else:
-                self.text_area.insert(tk.END, "\nNo data scraped\n", "error")
-                self.update_status("No data scraped")
-        
-        except Exception as e:
-            self.text_area.insert(tk.END, f"\nError: {str(e)}\n", "error")
-            self.update_status(f"Error: {str(e)}")
-        
-        finally:
-            self.scraping = False
-            self.stop_scraping = False
-            self.scrape_button.config(text="Start Scraping", bg="#27AE60")
-            self.stop_button.config(state=tk.DISABLED)
-            self.update_progress(0)
-            self.close_selenium_driver()
+                text = render(self.crawler.metrics)
+            stats_text.config(state=tk.NORMAL)
+            stats_text.delete(1.0, tk.END)
+            stats_text.insert(tk.END, text)
+            stats_text.config(state=tk.DISABLED)
+            stats_window.after(1000, refresh)
+        
+        def export():
+            if self.crawler is None:
+                return
+            path = filedialog.asksaveasfilename(initialdir=self.output_folder, initialfile="scraper_metrics.prom",
+                                                defaultextension=".prom",
+                                                filetypes=[("Prometheus text", "*.prom"), ("All files", "*.*")])
+            if path:
+                self.crawler.metrics.write_prometheus(path)
+        
+        button_frame = tk.Frame(stats_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Close", command=stats_window.destroy).pack(side=tk.RIGHT)
+        tk.Button(button_frame, text="Export Prometheus File...", command=export).pack(side=tk.RIGHT, padx=5)
+        refresh()
     
     def show_documentation(self):
         docs = """Web Scraper Pro Documentation
@@ -834,10 +908,68 @@ class WebScraperApp:
 - Click "Start Scraping"
 
 2. Advanced Features:
-- Selenium Mode: For JavaScript-heavy websites
+- Selenium Mode: For JavaScript-heavy websites. Several headless browsers
+  load pages in parallel (Settings > Crawl Settings) without images, fonts
+  or stylesheets, and each one is restarted after a number of pages
+- Hybrid Mode: Pages are fetched over plain HTTP and only sent to a
+  browser when they look rendered by JavaScript (almost no text, an empty
+  app container, an "enable JavaScript" notice). What worked is remembered
+  per site section, so later pages go the right way directly
+- HTML Parser: html.parser is the default. lxml is much faster on large
+  pages and gives the same records for well-formed pages, but repairs
+  broken markup (misnested or unclosed tags) differently, so headings,
+  paragraphs, lists and tables can come out grouped differently there.
+  Titles, links and images are the same with both
+- Parser Processes: Parse pages in separate processes so large crawls
+  use every CPU core (Settings > Crawl Settings)
+- Async Engine: Keeps hundreds of requests in flight on one event loop,
+  best for wide, shallow crawls across many sites (needs aiohttp)
 - Proxy Support: Rotate IP addresses to avoid blocking
-- Scheduling: Run scrapes at specific times
-- Export Formats: Excel, JSON, CSV, or Text
+- Adaptive Rate Limiting: Delay is the fastest pace per host. A host that
+  answers 429/503, sends Retry-After or slows down is backed off on its own,
+  and sped up again once it responds normally; other hosts keep their pace
+- Retries: Timeouts, dropped connections and 429/5xx answers are retried
+  after a growing, randomized pause. Connect and read timeouts are set
+  separately (Settings > Crawl Settings). Pages of a host that keeps failing
+  wait in the queue while it recovers, and are skipped if it never does
+- Concurrent Crawling: Settings > Crawl Settings sets the number of workers
+  and how many requests may run against one host at the same time
+- Scheduling: Run a scrape of the current URL and settings once, daily,
+  weekly or every few hours while the app is open (File > Scheduled Crawls
+  lists them). A run that is more than an hour late is skipped, and a job
+  never runs twice at once. For servers: python cli.py schedule
+- robots.txt: With Respect robots.txt on, disallowed pages are skipped
+  before they are requested and a site's Crawl-delay is honored.
+  Seed Crawl From Sitemaps queues the pages listed in the site's sitemaps
+- URL Deduplication: Links that differ only by #fragment, default port,
+  trailing slash or tracking parameters (utm_*, gclid, ...) are crawled
+  once. Low-Memory URL Tracking keeps the seen set in a Bloom filter
+  for crawls of millions of pages
+- Export Formats: Excel, JSON, JSON Lines, CSV, or Text. Pages are written
+  as they are scraped, so stopping a crawl keeps the pages scraped so far
+- Results Preview: Opens after a crawl (or File > Preview Results) and
+  reads the output file 20 pages at a time, so large results open at once
+- Page Cache: Pages are kept in scraper_output/http_cache with their
+  ETag/Last-Modified. A recrawl asks the server whether each page changed
+  and reuses the cached copy when it did not (size set in Crawl Settings)
+- Incremental Recrawl: Remembers a fingerprint of every page. Pages
+  that did not change are not parsed again, and the changes since the
+  last crawl (added, changed, removed) go to scraped_changes_*.jsonl
+- Checkpoints: The queue, visited URLs and scraped pages are saved to
+  scraper_output/checkpoints while crawling. Starting a stopped or
+  crashed crawl of the same URL again offers to resume it
+- Log View: Keeps the newest 5000 lines, so the window stays responsive
+  on long crawls; the full results are always in the output file
+- Command Line: python cli.py crawl <url> runs the same crawl without a
+  window, e.g. on a server (python cli.py crawl -h lists the options)
+- Distributed Crawls: python cli.py coordinator <url> --listen HOST:PORT
+  shares one crawl with python cli.py worker --connect HOST:PORT on other
+  processes or machines. Each site is crawled by one worker at a time
+- Crawl Stats: View > Crawl Stats shows where the crawl spends its time
+  (waiting for the host, connecting, downloading, parsing, extracting,
+  writing, updating the window) with per-host fetch times. Settings >
+  Profile Crawls saves a cProfile file next to the results; on the command
+  line use --metrics-file, --metrics-port and --profile
 
 3. Tips:
 - Use delay to avoid being blocked